@@ -0,0 +1,73 @@
+"""
+Per-operation latency of a connect-per-call client versus the pooled client.
+
+Run against a local Postgres described by ``database.ini``:
+
+    python benchmarks/bench_pool.py --iterations 200
+"""
+
+import time
+import click
+import psycopg2  # type: ignore
+from statistics import mean, median
+from db_cli.psql import PostgresConnect
+
+
+def connect_per_call(db: PostgresConnect):
+    conn = psycopg2.connect(**db.db)
+
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT version()")
+        cur.fetchone()
+        cur.close()
+
+    finally:
+        conn.close()
+
+
+def pooled(db: PostgresConnect):
+    conn = db.pool.getconn()
+
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT version()")
+        cur.fetchone()
+        cur.close()
+
+    finally:
+        db.pool.putconn(conn)
+
+
+def measure(operation, db: PostgresConnect, iterations: int) -> list:
+    timings = []
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        operation(db)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+@click.command()
+@click.option("--config", default="database.ini", help="Path to the database.ini file.")
+@click.option("--iterations", default=100, help="Number of operations per mode.")
+def main(config: str, iterations: int):
+    db = PostgresConnect(config)
+
+    for label, operation in (
+        ("connect-per-call", connect_per_call),
+        ("pooled", pooled),
+    ):
+        timings = measure(operation, db, iterations)
+
+        click.echo(
+            f"{label:>16}: mean {mean(timings):8.3f} ms | median {median(timings):8.3f} ms | max {max(timings):8.3f} ms"
+        )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Repeated select-by-id latency: literal SQL re-parsed and re-planned on every
+call versus a server-side prepared statement.
+
+Needs an existing, non-empty table in the database described by ``database.ini``:
+
+    python benchmarks/bench_prepared.py --iterations 5000 --id 1
+"""
+
+import time
+import click
+from statistics import mean, median
+from db_cli.psql import PostgresConnect
+
+
+def literal(db: PostgresConnect, conn, cur, table: str, id: int):
+    cur.execute(f"SELECT * FROM {table} WHERE id = {id};")
+    cur.fetchall()
+
+
+def prepared(db: PostgresConnect, conn, cur, table: str, id: int):
+    db._execute_prepared(
+        conn, cur, f"select_{table}", "SELECT * FROM {} WHERE id = $1", (id,), table
+    )
+    cur.fetchall()
+
+
+@click.command()
+@click.option("--config", default="database.ini", help="Path to the database.ini file.")
+@click.option("--table", default="milk_production", help="Table to query.")
+@click.option("--id", "id", default=1, help="Id of the record to select.")
+@click.option("--iterations", default=1000, help="Number of queries per mode.")
+def main(config: str, table: str, id: int, iterations: int):
+    db = PostgresConnect(config)
+    conn = db.pool.getconn()
+    cur = conn.cursor()
+
+    for label, operation in (("literal", literal), ("prepared", prepared)):
+        timings = []
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            operation(db, conn, cur, table, id)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        conn.rollback()
+
+        click.echo(
+            f"{label:>8}: mean {mean(timings):7.4f} ms | median {median(timings):7.4f} ms | total {sum(timings):9.2f} ms"
+        )
+
+    cur.close()
+    db.pool.putconn(conn)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
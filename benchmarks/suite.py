@@ -0,0 +1,260 @@
+"""
+End-to-end benchmark suite for db_cli against a local Postgres.
+
+Point it at a throwaway database: it (re)creates milk_production from
+tables.sql and truncates it between stages.
+
+    python benchmarks/suite.py --config database.ini --sizes 10000,1000000
+
+Results are written as JSON (one file per run) so runs from different
+versions can be compared with ``--compare``.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import subprocess
+import click
+from datetime import date, datetime, timedelta
+from statistics import mean, median
+from contextlib import redirect_stdout
+from db_cli.psql import PostgresConnect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("db-cli")
+
+    except Exception:
+        return "unknown"
+
+
+def summarise(timings: list) -> dict:
+    return {
+        "n": len(timings),
+        "mean_ms": round(mean(timings), 4),
+        "median_ms": round(median(timings), 4),
+        "max_ms": round(max(timings), 4),
+    }
+
+
+def quiet(function, *args, **kwargs):
+    """Call a PostgresConnect method with its click output discarded."""
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        return function(*args, **kwargs)
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    quiet(function, *args, **kwargs)
+
+    return (time.perf_counter() - start) * 1000
+
+
+def synthetic_csv(rows: int, cows: int = 200) -> io.StringIO:
+    generator = random.Random(rows)
+    start = date(2020, 1, 1)
+
+    buffer = io.StringIO()
+    buffer.write(
+        "animal,morning_production,afternoon_production,evening_production,production_date\n"
+    )
+
+    for i in range(rows):
+        buffer.write(
+            f"Cow {i % cows},{generator.uniform(4, 12):.2f},{generator.uniform(3, 10):.2f},"
+            f"{generator.uniform(4, 12):.2f},{start + timedelta(days=i // cows)}\n"
+        )
+
+    buffer.seek(0)
+
+    return buffer
+
+
+def reset(db: PostgresConnect):
+    conn = db.pool.getconn()
+
+    try:
+        cur = conn.cursor()
+        cur.execute("TRUNCATE milk_production RESTART IDENTITY")
+        conn.commit()
+        cur.close()
+
+    finally:
+        db.pool.putconn(conn)
+
+
+def bench_startup(config: str, runs: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    cwd = os.path.dirname(os.path.abspath(config))
+    results = {}
+
+    for label, args in (
+        ("help", ["--help"]),
+        ("check_connection", ["check-connection"]),
+    ):
+        timings = []
+
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-m", "db_cli.psql", *args],
+                cwd=cwd,
+                env=env,
+                capture_output=True,
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+
+        results[label] = summarise(timings)
+
+    return results
+
+
+def bench_create_record(db: PostgresConnect, runs: int) -> dict:
+    production_date = datetime(2023, 6, 25)
+
+    timings = [
+        timed(db.create_record, "Cow 1", 10.5, 12.3, 9.2, "Litres", production_date)
+        for _ in range(runs)
+    ]
+
+    return summarise(timings)
+
+
+def bench_view_record(db: PostgresConnect, runs: int) -> dict:
+    timings = [
+        timed(db.view_record, "milk_production", (i % runs) + 1) for i in range(runs)
+    ]
+
+    return summarise(timings)
+
+
+def bench_import(db: PostgresConnect, rows: int) -> dict:
+    stream = synthetic_csv(rows)
+
+    elapsed = timed(db.import_records, stream, "csv", "milk_production", 50000)
+
+    return {
+        "rows": rows,
+        "elapsed_ms": round(elapsed, 2),
+        "rows_per_s": round(rows / (elapsed / 1000)),
+    }
+
+
+def bench_view_all(db: PostgresConnect, rows: int) -> dict:
+    reset(db)
+    quiet(db.import_records, synthetic_csv(rows), "csv", "milk_production", 50000)
+
+    elapsed = timed(db.view_all_records, "milk_production")
+
+    return {
+        "rows": rows,
+        "elapsed_ms": round(elapsed, 2),
+        "rows_per_s": round(rows / (elapsed / 1000)),
+    }
+
+
+def compare(previous: dict, current: dict, prefix: str = ""):
+    for key, value in current.items():
+        old = previous.get(key) if isinstance(previous, dict) else None
+
+        if isinstance(value, dict):
+            compare(old or {}, value, f"{prefix}{key}.")
+
+        elif key in ("median_ms", "elapsed_ms", "rows_per_s") and old:
+            change = (value - old) / old * 100
+
+            click.echo(f"{prefix}{key:<40} {old:>14} -> {value:>14} ({change:+.1f}%)")
+
+
+@click.command()
+@click.option("--config", default="database.ini", help="Path to the database.ini file.")
+@click.option(
+    "--schema", default=os.path.join(ROOT, "tables.sql"), help="Schema to create."
+)
+@click.option("--runs", default=200, help="Iterations for the latency benchmarks.")
+@click.option(
+    "--startup-runs", default=10, help="Iterations for the cold-start benchmarks."
+)
+@click.option(
+    "--sizes", default="10000,1000000", help="Table sizes for view-all-records."
+)
+@click.option(
+    "--ingest-rows", default=200000, help="Rows for the bulk ingest benchmark."
+)
+@click.option(
+    "--output",
+    default=os.path.join(ROOT, "benchmarks", "results"),
+    help="Directory for the JSON results.",
+)
+@click.option(
+    "--compare",
+    "previous",
+    type=click.File("r"),
+    default=None,
+    help="Earlier results file to compare against.",
+)
+def main(config, schema, runs, startup_runs, sizes, ingest_rows, output, previous):
+    db = PostgresConnect(config)
+
+    quiet(db.create_tables, schema)
+    reset(db)
+
+    results = {"startup": bench_startup(config, startup_runs)}
+
+    results["create_record"] = bench_create_record(db, runs)
+    results["view_record"] = bench_view_record(db, runs)
+
+    reset(db)
+    results["bulk_ingest"] = bench_import(db, ingest_rows)
+
+    results["view_all_records"] = {
+        size: bench_view_all(db, int(size)) for size in sizes.split(",")
+    }
+
+    reset(db)
+
+    conn = db.pool.getconn()
+    cur = conn.cursor()
+    cur.execute("SHOW server_version")
+    server_version = cur.fetchone()[0]
+    cur.close()
+    db.pool.putconn(conn)
+    db.close()
+
+    run = {
+        "version": version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "postgres": server_version,
+        "results": results,
+    }
+
+    os.makedirs(output, exist_ok=True)
+
+    path = os.path.join(
+        output, f"{run['version']}-{run['timestamp'].replace(':', '')}.json"
+    )
+
+    with open(path, "w") as file:
+        json.dump(run, file, indent=2)
+
+    click.echo(json.dumps(results, indent=2))
+    click.echo(f"\nResults written to {path}")
+
+    if previous is not None:
+        click.echo()
+        compare(json.load(previous)["results"], results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import io
+import os
+import csv
+import gzip
+from psycopg2 import sql  # type: ignore
+from db_cli.queries import RECORD_SELECT, STORED_COLUMNS
+
+# Archive files hold records as users see them, with the id kept so that a
+# restore is idempotent.
+ARCHIVE_COLUMNS = (
+    "id",
+    "animal",
+    "morning_production",
+    "afternoon_production",
+    "evening_production",
+    "production_unit",
+    "production_date",
+)
+
+
+def bucket_path(directory: str, table: str, day) -> str:
+    """Archive file of the month ``day`` falls in."""
+
+    return os.path.join(directory, f"{table}_{day:%Y-%m}.csv.gz")
+
+
+def write_buckets(directory: str, table: str, rows) -> dict:
+    """
+    Append ``rows`` (ordered like ``ARCHIVE_COLUMNS``) to their monthly
+    archive files and flush them to disk. Each call adds one gzip member per
+    file, which gzip readers treat as one continuous stream.
+
+    Returns ``{path: rows written}``.
+    """
+
+    buckets = {}
+
+    for row in rows:
+        buckets.setdefault(bucket_path(directory, table, row[-1]), []).append(row)
+
+    for path, bucket in buckets.items():
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator="\n")
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            writer.writerow(ARCHIVE_COLUMNS)
+
+        writer.writerows(bucket)
+
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+                compressed.write(text.getvalue().encode("utf-8"))
+
+            raw.flush()
+            os.fsync(raw.fileno())
+
+    return {path: len(bucket) for path, bucket in buckets.items()}
+
+
+def archive_table_ddl(table: str, archive: str):
+    """
+    An unpartitioned copy of ``table``'s columns, keyed on id so that
+    records archived twice (e.g. after a restore from files) are skipped.
+    """
+
+    return sql.SQL(
+        "CREATE TABLE IF NOT EXISTS {archive} (LIKE {table}, PRIMARY KEY (id));"
+        " CREATE INDEX IF NOT EXISTS {index} ON {archive} (production_date)"
+    ).format(
+        archive=sql.Identifier(archive),
+        table=sql.Identifier(table),
+        index=sql.Identifier(f"{archive}_date_idx"),
+    )
+
+
+def move_batch(
+    source: str,
+    where,
+    batch_size: int,
+    target: str | None = None,
+    with_names: bool = False,
+):
+    """
+    Delete the next ``batch_size`` records of ``source`` matching ``where``
+    (in id order), optionally inserting them into ``target`` (skipping ids
+    already there), in a single statement.
+
+    With ``with_names`` the moved records are returned ordered like
+    ``ARCHIVE_COLUMNS``; otherwise one row of (count, last id) is returned.
+    """
+
+    parts = [
+        sql.SQL(
+            "WITH doomed AS (SELECT id FROM {source}{where} ORDER BY id LIMIT {limit}),"
+            " moved AS (DELETE FROM {source} AS t USING doomed"
+            " WHERE t.id = doomed.id RETURNING t.*)"
+        ).format(
+            source=sql.Identifier(source),
+            where=where,
+            limit=sql.Literal(batch_size),
+        )
+    ]
+
+    if target is not None:
+        parts.append(
+            sql.SQL(
+                ", copied AS (INSERT INTO {target} SELECT * FROM moved"
+                " ON CONFLICT DO NOTHING)"
+            ).format(target=sql.Identifier(target))
+        )
+
+    if with_names:
+        parts.append(
+            sql.SQL(
+                RECORD_SELECT
+                + " FROM moved AS r JOIN animals AS a ON a.id = r.animal_id ORDER BY r.id"
+            )
+        )
+
+    else:
+        parts.append(sql.SQL(" SELECT count(*), max(id) FROM moved"))
+
+    return sql.Composed(parts)
+
+
+def restore_staging(staging: str):
+    """A temporary table archive files are copied into, one file at a time."""
+
+    return sql.SQL(
+        "CREATE TEMP TABLE IF NOT EXISTS {} (id INTEGER, animal TEXT,"
+        " morning_production REAL, afternoon_production REAL,"
+        " evening_production REAL, production_unit TEXT, production_date DATE)"
+    ).format(sql.Identifier(staging))
+
+
+def restore_from(table: str, staging: str):
+    """
+    Insert staged archive rows into ``table`` with their original ids.
+    Records that are already there are skipped, so restores can be repeated.
+    """
+
+    return sql.SQL(
+        "INSERT INTO {table} (id, {columns}) SELECT s.id, a.id, {values}"
+        " FROM {staging} AS s JOIN animals AS a ON a.name = s.animal"
+        " ON CONFLICT DO NOTHING"
+    ).format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(", ").join(map(sql.Identifier, STORED_COLUMNS)),
+        values=sql.SQL(", ").join(
+            sql.SQL("s.{}").format(sql.Identifier(column))
+            for column in STORED_COLUMNS[1:]
+        ),
+        staging=sql.Identifier(staging),
+    )
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+
+CACHE_DEFAULTS = {
+    "path": "~/.cache/db_cli/cache.sqlite3",
+    "ttl": 60.0,
+    "max_entries": 1000,
+    "max_bytes": 64 * 1024 * 1024,
+    "max_rows": 10000,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tag TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_tag_idx ON entries (tag);
+CREATE INDEX IF NOT EXISTS entries_accessed_idx ON entries (accessed);
+CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0);
+"""
+
+# Tag of results that depend on the list of tables rather than one table.
+SCHEMA_TAG = ""
+
+
+class CachedResult:
+    """Rows plus a cursor-like ``description``, so results render the same cached or not."""
+
+    def __init__(self, columns: list, rows: list) -> None:
+        self.columns = columns
+        self.rows = rows
+
+    @property
+    def description(self) -> list:
+        return [(column,) for column in self.columns]
+
+    @classmethod
+    def from_cursor(cls, cur, rows: list) -> "CachedResult":
+        return cls([column[0] for column in cur.description], rows)
+
+
+class ResultCache:
+    """
+    An on-disk (SQLite) cache of query results shared by every db_cli process.
+
+    Entries expire after ``ttl`` seconds, and the least recently used entries
+    are evicted once there are more than ``max_entries`` or they take more
+    than ``max_bytes``. Each entry is tagged with the table it was read from,
+    so a write through db_cli can drop exactly the entries it made stale.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_DEFAULTS["path"],
+        ttl: float = CACHE_DEFAULTS["ttl"],
+        max_entries: int = CACHE_DEFAULTS["max_entries"],
+        max_bytes: int = CACHE_DEFAULTS["max_bytes"],
+        max_rows: int = CACHE_DEFAULTS["max_rows"],
+    ) -> None:
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+
+        directory = os.path.dirname(self.path)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    @staticmethod
+    def key(*parts) -> str:
+        return json.dumps(parts, default=str)
+
+    def get(self, key: str):
+        now = time.time()
+
+        row = self._db.execute(
+            "SELECT value, created FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+            self._count("misses")
+
+            return None
+
+        self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+
+        return pickle.loads(row[0])
+
+    def put(self, key: str, tag: str, value) -> None:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if len(data) > self.max_bytes:
+            return
+
+        now = time.time()
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (key, tag, data, len(data), now, now),
+        )
+
+        self._evict()
+
+    def invalidate(self, tag: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE tag = ?", (tag,))
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM entries")
+
+    def stats(self) -> dict:
+        counters = dict(self._db.execute("SELECT name, value FROM stats"))
+
+        entries, size = self._db.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM entries"
+        ).fetchone()
+
+        return {**counters, "entries": entries, "bytes": size}
+
+    def reset_stats(self) -> None:
+        self._db.execute("UPDATE stats SET value = 0")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _count(self, name: str) -> None:
+        self._db.execute("UPDATE stats SET value = value + 1 WHERE name = ?", (name,))
+
+    def _evict(self) -> None:
+        self._db.execute(
+            "DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,)
+        )
+
+        entries, size = self._db.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM entries"
+        ).fetchone()
+
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+
+        # Walk from the least recently used entry until both limits hold.
+        doomed = []
+
+        for key, entry_size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ).fetchall():
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+
+            doomed.append((key,))
+            entries -= 1
+            size -= entry_size
+
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
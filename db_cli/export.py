@@ -0,0 +1,113 @@
+import sys
+import io
+import csv
+import gzip
+import json
+from contextlib import contextmanager
+
+EXPORT_FORMATS = ("csv", "tsv", "jsonl")
+
+# Formats COPY can produce itself; anything else goes through a named cursor.
+COPY_DELIMITERS = {"csv": ",", "tsv": "\\t"}
+
+
+@contextmanager
+def open_output(path: str, compress: bool):
+    """
+    Open ``path`` (or stdout for "-") as a text stream, optionally gzip
+    compressed. Stdout is flushed but never closed.
+    """
+
+    if path == "-":
+        if not compress:
+            stream = sys.stdout
+
+            yield stream
+
+            stream.flush()
+
+            return
+
+        raw = sys.stdout.buffer
+
+        with gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+            with io.TextIOWrapper(compressed, encoding="utf-8", newline="") as stream:
+                yield stream
+
+        raw.flush()
+
+    elif compress:
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as stream:
+            yield stream
+
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as stream:
+            yield stream
+
+
+def header_line(fmt: str, columns) -> str:
+    """The CSV/TSV header line COPY would write; JSON lines have none."""
+
+    if fmt not in COPY_DELIMITERS:
+        return ""
+
+    buffer = io.StringIO()
+
+    csv.writer(
+        buffer, delimiter="\t" if fmt == "tsv" else ",", lineterminator="\n"
+    ).writerow(columns)
+
+    return buffer.getvalue()
+
+
+def write_jsonl(cur, stream) -> int:
+    """Write every row of an executed (server-side) cursor as a JSON line."""
+
+    count = 0
+    columns = None
+
+    for row in cur:
+        if columns is None:
+            columns = [column[0] for column in cur.description]
+
+        stream.write(json.dumps(dict(zip(columns, row)), default=str))
+        stream.write("\n")
+
+        count += 1
+
+    return count
+
+
+def export_query(
+    conn, query: str, fmt: str, stream, header: bool = True, itersize: int = 10000
+) -> int:
+    """
+    Stream the rows of ``query`` (plain SQL with parameters already bound)
+    to ``stream`` and return how many were written.
+    """
+
+    if fmt in COPY_DELIMITERS:
+        options = f"FORMAT csv, DELIMITER E'{COPY_DELIMITERS[fmt]}'"
+
+        if header:
+            options += ", HEADER"
+
+        cur = conn.cursor()
+
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH ({options})", stream)
+
+        count = cur.rowcount
+
+    else:
+        # COPY cannot produce JSON lines, so stream through a named
+        # (server-side) cursor fetching ``itersize`` rows at a time.
+        cur = conn.cursor(name="export_records")
+        cur.itersize = itersize
+
+        cur.execute(query)
+
+        count = write_jsonl(cur, stream)
+
+    cur.close()
+
+    return count
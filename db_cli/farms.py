@@ -0,0 +1,164 @@
+import queue
+import threading
+from decimal import Decimal
+
+# "[farm.<name>]" sections of database.ini each hold the connection settings
+# of one farm's database, laid out like "[postgresql]".
+FARM_PREFIX = "farm."
+
+
+class FarmError(Exception):
+    pass
+
+
+def farm_names(sections) -> list:
+    return [
+        section[len(FARM_PREFIX) :]
+        for section in sections
+        if section.startswith(FARM_PREFIX) and "." not in section[len(FARM_PREFIX) :]
+    ]
+
+
+def select_farms(spec: str, available: list) -> list:
+    """The farms named in ``spec``: "a,b,c", or "all" for every configured farm."""
+
+    if not available:
+        raise FarmError(f"No [{FARM_PREFIX}<name>] sections are configured.")
+
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+
+    if names == ["all"]:
+        return list(available)
+
+    unknown = [name for name in names if name not in available]
+
+    if unknown or not names:
+        raise FarmError(
+            f"Unknown farm(s): {', '.join(unknown) or spec!r}, expected some of: {', '.join(available)} or all."
+        )
+
+    return list(dict.fromkeys(names))
+
+
+def fan_out(clients: dict, work, chunk_size: int = 500, queue_size: int = 64):
+    """
+    Run ``work(client)``, an iterator of rows, for every farm at once in a
+    thread pool and yield ``(farm, rows, error)`` as chunks arrive. Output
+    starts with the first farm to answer, and the whole run takes as long as
+    the slowest farm. A farm that fails yields its error once, with no rows.
+
+    Workers block while ``queue_size`` chunks are waiting, so memory stays
+    bounded however large the results are.
+    """
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+
+                return True
+
+            except queue.Full:
+                continue
+
+        return False
+
+    def run(farm, client):
+        rows = None
+
+        try:
+            rows = work(client)
+            chunk = []
+
+            for row in rows:
+                chunk.append(row)
+
+                if len(chunk) >= chunk_size:
+                    if not put((farm, chunk, None)):
+                        return
+
+                    chunk = []
+
+            if chunk:
+                put((farm, chunk, None))
+
+        except Exception as error:
+            put((farm, None, error))
+
+        finally:
+            # Closing the generator returns its connection straight away.
+            if hasattr(rows, "close"):
+                rows.close()
+
+            put((farm, None, None))
+
+    executor = ThreadPoolExecutor(max_workers=max(len(clients), 1))
+
+    try:
+        for farm, client in clients.items():
+            executor.submit(run, farm, client)
+
+        running = len(clients)
+
+        while running:
+            farm, rows, error = results.get()
+
+            if rows is None and error is None:
+                running -= 1
+
+            else:
+                yield farm, rows, error
+
+    finally:
+        # Unblock workers if the caller stopped reading early.
+        stop.set()
+
+        executor.shutdown(wait=True)
+
+
+def herd_report(rows: list) -> list:
+    """
+    Herd-wide totals per (period, unit) of per-farm report rows, i.e. dicts
+    of ``REPORT_COLUMNS`` plus "farm". The average is per cow per day, like
+    the per-cow averages it merges.
+    """
+
+    herd = {}
+
+    for row in rows:
+        key = (row["period"], row["unit"])
+
+        if key not in herd:
+            herd[key] = {
+                "farm": "all",
+                "period": row["period"],
+                "unit": row["unit"],
+                "farms": set(),
+                "cows": 0,
+                "days": 0,
+                "total": Decimal(0),
+            }
+
+        totals = herd[key]
+
+        totals["farms"].add(row["farm"])
+        totals["cows"] += 1
+        totals["days"] += row["days"]
+        totals["total"] += Decimal(row["total"])
+
+    merged = []
+
+    for key in sorted(herd):
+        totals = herd[key]
+
+        totals["farms"] = len(totals["farms"])
+        totals["average"] = round(totals["total"] / totals["days"], 2)
+
+        merged.append(totals)
+
+    return merged
@@ -0,0 +1,179 @@
+import io
+import csv
+import json
+from datetime import datetime
+
+RECORD_COLUMNS = (
+    "animal",
+    "morning_production",
+    "afternoon_production",
+    "evening_production",
+    "production_unit",
+    "production_date",
+)
+
+DEFAULT_UNIT = "Litres"
+
+# What to do with a record whose (animal, production_date) already exists.
+CONFLICT_MODES = ("error", "skip", "update")
+
+
+class RecordError(ValueError):
+    pass
+
+
+def detect_format(filename: str) -> str:
+    return "jsonl" if filename.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_records(stream, fmt: str):
+    """
+    Yield ``(line number, raw record)`` pairs from a CSV (with a header row)
+    or JSONL stream, one at a time so memory use does not depend on file size.
+    """
+
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+
+        for record in reader:
+            yield reader.line_num, record
+
+    elif fmt == "jsonl":
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+
+            except json.JSONDecodeError as error:
+                yield line_num, RecordError(f"invalid JSON: {error}")
+
+                continue
+
+            if not isinstance(record, dict):
+                yield line_num, RecordError("expected a JSON object")
+
+                continue
+
+            yield line_num, record
+
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'.")
+
+
+def parse_ids(text: str) -> list:
+    """Parse record ids separated by commas and/or whitespace."""
+
+    ids = []
+
+    for token in text.replace(",", " ").split():
+        try:
+            ids.append(int(token))
+
+        except ValueError:
+            raise RecordError(f"id must be an integer, got {token!r}")
+
+    return ids
+
+
+def validate_field(column: str, value):
+    """Convert a single raw value for ``column`` to its Python type."""
+
+    if column == "animal":
+        animal = str(value or "").strip()
+
+        if not animal:
+            raise RecordError("animal is required")
+
+        return animal
+
+    if column in RECORD_COLUMNS[1:4]:
+        try:
+            amount = float(value)
+
+        except (TypeError, ValueError):
+            raise RecordError(f"{column} must be a number, got {value!r}")
+
+        if amount < 0:
+            raise RecordError(f"{column} must not be negative")
+
+        return amount
+
+    if column == "production_unit":
+        return str(value or DEFAULT_UNIT).strip()
+
+    if column == "production_date":
+        try:
+            return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+
+        except ValueError:
+            raise RecordError(f"production_date must be YYYY-MM-DD, got {value!r}")
+
+    raise RecordError(f"unknown field '{column}'")
+
+
+def validate_record(record: dict) -> tuple:
+    """Return the record as a tuple ordered like ``RECORD_COLUMNS``."""
+
+    return tuple(
+        validate_field(column, record.get(column)) for column in RECORD_COLUMNS
+    )
+
+
+def copy_escape(value) -> str:
+    """Render a value in the text format understood by ``COPY ... FROM STDIN``."""
+
+    if value is None:
+        return "\\N"
+
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_batches(records, batch_size: int, on_reject):
+    """
+    Validate ``(line number, record)`` pairs and group the good ones into
+    COPY text buffers of at most ``batch_size`` rows.
+
+    Yields ``(buffer, row count, production dates)`` tuples; invalid records
+    are passed to ``on_reject(line number, record, error)`` and skipped.
+    """
+
+    buffer = io.StringIO()
+    count = 0
+    dates = set()
+
+    for line_num, record in records:
+        try:
+            if isinstance(record, RecordError):
+                raise record
+
+            row = validate_record(record)
+
+        except RecordError as error:
+            on_reject(line_num, record, error)
+
+            continue
+
+        buffer.write("\t".join(copy_escape(value) for value in row))
+        buffer.write("\n")
+        count += 1
+        dates.add(row[-1])
+
+        if count >= batch_size:
+            buffer.seek(0)
+            yield buffer, count, dates
+
+            buffer = io.StringIO()
+            count = 0
+            dates = set()
+
+    if count:
+        buffer.seek(0)
+        yield buffer, count, dates
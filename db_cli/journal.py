@@ -0,0 +1,232 @@
+import os
+import json
+import uuid
+from datetime import date, datetime, timezone
+from contextlib import contextmanager
+from db_cli.ingest import RECORD_COLUMNS, RecordError, validate_field, validate_record
+
+try:
+    import fcntl
+
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+JOURNAL_DEFAULTS = {
+    "path": "~/.local/share/db_cli/journal.jsonl",
+    "offline": False,
+}
+
+# Keys of journal entries already applied, so a replayed entry is skipped
+# instead of being written twice.
+APPLIED_TABLE = """
+CREATE TABLE IF NOT EXISTS db_cli_journal (
+    key TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+MARK_APPLIED = (
+    "INSERT INTO db_cli_journal (key) VALUES (%s) ON CONFLICT (key) DO NOTHING"
+)
+
+
+class JournalError(RecordError):
+    pass
+
+
+def json_value(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+def replay_params(entry: dict) -> tuple:
+    """Validate a journal entry and return the parameters of its statement."""
+
+    if "error" in entry:
+        raise JournalError(entry["error"])
+
+    op = entry.get("op")
+
+    if op == "create":
+        return validate_record(entry.get("values") or {})
+
+    if op == "update":
+        column = entry.get("column")
+
+        if column not in RECORD_COLUMNS:
+            raise JournalError(f"unknown column {column!r}")
+
+        try:
+            id = int(entry.get("id"))
+
+        except (TypeError, ValueError):
+            raise JournalError(f"id must be an integer, got {entry.get('id')!r}")
+
+        return validate_field(column, entry.get("value")), id
+
+    raise JournalError(f"unknown journal operation {op!r}")
+
+
+class Journal:
+    """
+    An append-only, fsync'd JSON lines file of writes made while offline.
+
+    Every entry carries a unique idempotency key. ``pending`` reads entries
+    past the synced offset (kept in ``<path>.offset``), ``advance`` moves
+    that offset once a batch is committed, and ``compact`` empties the file
+    when everything in it has been synced. Entries that cannot be applied
+    are set aside in ``<path>.rejects`` by ``reject``.
+    """
+
+    def __init__(self, path: str = JOURNAL_DEFAULTS["path"]) -> None:
+        self.path = os.path.expanduser(path)
+        self.offset_path = self.path + ".offset"
+        self.rejects_path = self.path + ".rejects"
+
+        directory = os.path.dirname(self.path)
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def locked(self):
+        """Hold an exclusive lock on the journal, across processes."""
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+            yield fd
+
+        finally:
+            os.close(fd)
+
+    def append(self, op: str, table: str, **fields) -> dict:
+        entry = {
+            "key": uuid.uuid4().hex,
+            "op": op,
+            "table": table,
+            **fields,
+            "queued_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+        line = (json.dumps(entry, default=json_value) + "\n").encode()
+
+        with self.locked():
+            # One O_APPEND write per entry, flushed to disk before returning.
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+
+            finally:
+                os.close(fd)
+
+        return entry
+
+    def reject(self, rejects: list) -> None:
+        """Append ``(entry, error)`` pairs to the rejects file and flush it."""
+
+        lines = "".join(
+            json.dumps({**entry, "error": str(error).strip()}, default=json_value)
+            + "\n"
+            for entry, error in rejects
+        )
+
+        with open(self.rejects_path, "a") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def offset(self) -> int:
+        try:
+            with open(self.offset_path) as file:
+                return int(file.read().strip() or 0)
+
+        except FileNotFoundError:
+            return 0
+
+    def advance(self, offset: int) -> None:
+        temporary = self.offset_path + ".tmp"
+
+        with open(temporary, "w") as file:
+            file.write(str(offset))
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary, self.offset_path)
+
+    def pending(self, batch_size: int):
+        """
+        Yield ``(entries, offset after the batch)`` for unsynced entries.
+
+        A final line without a newline is an append that was cut short and
+        is left for the next sync.
+        """
+
+        batch = []
+
+        try:
+            file = open(self.path, "rb")
+
+        except FileNotFoundError:
+            return
+
+        with file:
+            file.seek(self.offset())
+
+            offset = file.tell()
+
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+
+                try:
+                    entry = json.loads(line)
+
+                except json.JSONDecodeError as error:
+                    # Passed on so that sync can set it aside like any entry
+                    # it cannot apply, rather than stopping at it every time.
+                    entry = {
+                        "key": None,
+                        "line": line.decode("utf-8", "replace").rstrip("\n"),
+                        "error": f"corrupt journal entry at byte {offset}: {error}",
+                    }
+
+                offset += len(line)
+                batch.append(entry)
+
+                if len(batch) >= batch_size:
+                    yield batch, offset
+
+                    batch = []
+
+        if batch:
+            yield batch, offset
+
+    def count(self) -> int:
+        return sum(len(entries) for entries, _ in self.pending(1000))
+
+    def compact(self) -> bool:
+        """Empty the journal if every entry in it has been synced."""
+
+        with self.locked() as fd:
+            if os.fstat(fd).st_size != self.offset():
+                return False
+
+            # Reset the offset first: if we stop in between, the next sync
+            # replays entries that are then skipped by their keys.
+            self.advance(0)
+
+            os.ftruncate(fd, 0)
+            os.fsync(fd)
+
+        return True
@@ -0,0 +1,99 @@
+import json
+import time
+import click
+import threading
+from datetime import datetime, timezone
+
+PHASES = ("connect", "execute", "fetch", "render")
+
+
+class Recorder:
+    """
+    Collects time spent per phase, row and query counts for one command.
+
+    "connect" is time spent getting a connection from the pool, "execute"
+    covers execute()/COPY, "fetch" covers reading rows and "render" is
+    everything else (formatting and printing output).
+    """
+
+    def __init__(self, command: str | None) -> None:
+        self.command = command
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.rows = 0
+        self.queries = 0
+        self.started = time.perf_counter()
+
+        # Farm commands record from several threads at once.
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float, rows: int = 0) -> None:
+        with self._lock:
+            self.seconds[phase] += seconds
+            self.rows += rows
+
+            if phase == "execute":
+                self.queries += 1
+
+    def result(self) -> dict:
+        total = time.perf_counter() - self.started
+
+        with self._lock:
+            measured = sum(self.seconds[phase] for phase in PHASES[:-1])
+
+            self.seconds["render"] = max(total - measured, 0.0)
+
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "command": self.command,
+            "total_ms": round(total * 1000, 3),
+            **{f"{phase}_ms": round(self.seconds[phase] * 1000, 3) for phase in PHASES},
+            "rows": self.rows,
+            "queries": self.queries,
+        }
+
+
+# The recorder of the running command, None when instrumentation is off so
+# the hooks cost a single attribute check.
+current: Recorder | None = None
+
+_stack = []
+
+
+def record(phase: str, seconds: float, rows: int = 0) -> None:
+    if current is not None:
+        current.add(phase, seconds, rows)
+
+
+def start(command: str | None) -> Recorder:
+    global current
+
+    _stack.append(current)
+
+    current = Recorder(command)
+
+    return current
+
+
+def finish(recorder: Recorder, show: bool, path: str | None) -> None:
+    global current
+
+    current = _stack.pop() if _stack else None
+
+    result = recorder.result()
+
+    if show:
+        phases = " | ".join(
+            f"{phase}: {result[f'{phase}_ms']:.2f} ms" for phase in PHASES
+        )
+
+        click.echo(
+            click.style(
+                f"[{result['command']}] total: {result['total_ms']:.2f} ms | {phases} | rows: {result['rows']} | queries: {result['queries']}",
+                fg="magenta",
+            ),
+            err=True,
+        )
+
+    if path is not None:
+        with open(path, "a") as file:
+            file.write(json.dumps(result) + "\n")
@@ -0,0 +1,131 @@
+import os
+import re
+
+MIGRATIONS_DIR = "migrations"
+
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# "-- step: description" starts a new step within a migration file.
+STEP_MARKER = re.compile(r"^--\s*step\b:?[ \t]*(.*)$", re.MULTILINE)
+
+# Statements that Postgres refuses to run inside a transaction block.
+NON_TRANSACTIONAL = re.compile(
+    r"\b(CONCURRENTLY|VACUUM|ALTER\s+SYSTEM|ALTER\s+TYPE\s+\S+\s+ADD\s+VALUE)\b",
+    re.IGNORECASE,
+)
+
+SCHEMA_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    duration_ms REAL
+);
+"""
+
+# Dry runs only look: they neither create schema_migrations nor take the lock.
+HAS_SCHEMA_MIGRATIONS = "SELECT to_regclass('schema_migrations') IS NOT NULL"
+
+RECORD_MIGRATION = (
+    "INSERT INTO schema_migrations (version, name, duration_ms) VALUES (%s, %s, %s)"
+    " ON CONFLICT (version) DO NOTHING"
+)
+
+# Key of the advisory lock that keeps two migrate runs from overlapping.
+MIGRATION_LOCK = 0x6D696772
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Step:
+    def __init__(self, description: str, sql: str) -> None:
+        self.description = description
+        self.sql = sql
+        self.transactional = NON_TRANSACTIONAL.search(strip_comments(sql)) is None
+
+
+class Migration:
+    """
+    One numbered ``.sql`` file, split into steps at ``-- step:`` lines.
+
+    A migration whose steps can all run in a transaction is applied
+    atomically. Otherwise (e.g. ``CREATE INDEX CONCURRENTLY``) every step is
+    committed on its own, so such migrations should be written to be re-run.
+    """
+
+    def __init__(self, version: int, name: str, path: str, steps: list) -> None:
+        self.version = version
+        self.name = name
+        self.path = path
+        self.steps = steps
+
+    @property
+    def label(self) -> str:
+        return f"{self.version:04d}_{self.name}"
+
+    @property
+    def transactional(self) -> bool:
+        return all(step.transactional for step in self.steps)
+
+
+def strip_comments(sql: str) -> str:
+    return re.sub(r"--[^\n]*", "", sql)
+
+
+def first_line(sql: str) -> str:
+    for line in strip_comments(sql).splitlines():
+        if line.strip():
+            return line.strip()
+
+    return ""
+
+
+def parse_steps(text: str) -> list:
+    markers = list(STEP_MARKER.finditer(text))
+
+    chunks = []
+
+    if not markers:
+        chunks.append((None, text))
+
+    else:
+        chunks.append((None, text[: markers[0].start()]))
+
+        for marker, following in zip(markers, markers[1:] + [None]):
+            end = following.start() if following is not None else len(text)
+
+            chunks.append((marker.group(1).strip(), text[marker.end() : end]))
+
+    return [
+        Step(description or first_line(sql), sql.strip())
+        for description, sql in chunks
+        if strip_comments(sql).strip()
+    ]
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> list:
+    migrations = {}
+
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+
+        if match is None:
+            continue
+
+        version = int(match.group(1))
+
+        if version in migrations:
+            raise MigrationError(
+                f"Migrations {migrations[version].label} and {filename} share version {version}."
+            )
+
+        path = os.path.join(directory, filename)
+
+        with open(path) as file:
+            steps = parse_steps(file.read())
+
+        migrations[version] = Migration(version, match.group(2), path, steps)
+
+    return [migrations[version] for version in sorted(migrations)]
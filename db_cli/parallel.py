@@ -0,0 +1,134 @@
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+import psycopg2  # type: ignore
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from db_cli.export import export_query, open_output
+
+
+def slice_bounds(low, high, slices: int, step_unit=1) -> list:
+    """
+    Split the inclusive range ``low``..``high`` (ints or dates) into at most
+    ``slices`` half-open ``[start, end)`` ranges of near equal width.
+    """
+
+    span = (high - low) // step_unit + 1
+    slices = max(min(slices, span), 1)
+
+    bounds = [low + ((span * i) // slices) * step_unit for i in range(slices)]
+
+    return list(zip(bounds, bounds[1:] + [high + step_unit]))
+
+
+def slice_path(path: str, index: int) -> str:
+    """``out.csv.gz`` -> ``out.part03.csv.gz``."""
+
+    directory, name = os.path.split(path)
+    stem, dot, extension = name.partition(".")
+
+    return os.path.join(directory, f"{stem}.part{index:02d}{dot}{extension}")
+
+
+def export_slice(
+    params: dict,
+    snapshot: str,
+    query: str,
+    fmt: str,
+    path: str,
+    compress: bool,
+    header: bool,
+    itersize: int,
+) -> int:
+    """
+    Export one slice from a worker process, reading from the coordinator's
+    exported snapshot so every slice sees the same data.
+    """
+
+    conn = psycopg2.connect(**params)
+
+    try:
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+
+        cur = conn.cursor()
+        cur.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+        cur.close()
+
+        with open_output(path, compress) as stream:
+            return export_query(conn, query, fmt, stream, header, itersize)
+
+    finally:
+        conn.close()
+
+
+def run_slices(params: dict, snapshot: str, jobs: list, workers: int) -> list:
+    """Run ``export_slice`` argument tuples in a process pool, returning row counts in order."""
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(export_slice, params, snapshot, *job) for job in jobs
+        ]
+
+        return [future.result() for future in futures]
+
+
+def merge_slices(
+    paths: list, path: str, header: str = "", compress: bool = False
+) -> None:
+    """
+    Concatenate slice files into ``path`` (or stdout for "-"), after a single
+    ``header`` when given. Gzip files may be concatenated as they are, since
+    a gzip stream can hold several members.
+    """
+
+    prefix = header.encode("utf-8")
+
+    if prefix and compress:
+        prefix = gzip.compress(prefix)
+
+    def concatenate(target):
+        target.write(prefix)
+
+        for part in paths:
+            with open(part, "rb") as source:
+                shutil.copyfileobj(source, target)
+
+    if path == "-":
+        sys.stdout.flush()
+
+        concatenate(sys.stdout.buffer)
+
+        sys.stdout.buffer.flush()
+
+        return
+
+    with open(path, "wb") as target:
+        concatenate(target)
+
+
+def temporary_directory(path: str) -> str:
+    """A scratch directory next to the output, so merging does not cross filesystems."""
+
+    directory = os.path.dirname(os.path.abspath(path)) if path != "-" else None
+
+    return tempfile.mkdtemp(prefix="db_cli_export_", dir=directory)
+
+
+@contextmanager
+def scratch_parts(path: str, count: int):
+    """
+    Paths of ``count`` part files in a ``temporary_directory`` for ``path``,
+    which is removed with everything in it afterwards.
+    """
+
+    scratch = temporary_directory(path)
+
+    try:
+        yield [
+            os.path.join(scratch, f"part{index:02d}") for index in range(1, count + 1)
+        ]
+
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,65 @@
+import re
+from datetime import date
+from psycopg2 import sql  # type: ignore
+
+IS_PARTITIONED = "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))"
+
+LIST_PARTITIONS = """
+SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint,
+       pg_size_pretty(pg_total_relation_size(c.oid))
+FROM pg_inherits AS i
+JOIN pg_class AS c ON c.oid = i.inhrelid
+WHERE i.inhparent = to_regclass(%s)
+ORDER BY c.relname
+"""
+
+# Whether the table named like a partition of ``table`` is attached to it.
+# "partitions --detach-before" leaves detached tables in place under that name.
+IS_ATTACHED = """
+SELECT EXISTS (
+    SELECT 1 FROM pg_inherits
+    WHERE inhrelid = to_regclass(%s) AND inhparent = to_regclass(%s)
+)
+"""
+
+
+class PartitionError(Exception):
+    pass
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+
+    return date(month.year, month.month + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(table: str, name: str) -> date | None:
+    """The month a partition created by ``create_partition`` covers, if it is one."""
+
+    match = re.fullmatch(re.escape(table) + r"_y(\d{4})m(\d{2})", name)
+
+    if match is None:
+        return None
+
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition(table: str, month: date):
+    return sql.SQL(
+        "CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {table}"
+        " FOR VALUES FROM ({start}) TO ({end})"
+    ).format(
+        partition=sql.Identifier(partition_name(table, month)),
+        table=sql.Identifier(table),
+        start=sql.Literal(month),
+        end=sql.Literal(next_month(month)),
+    )
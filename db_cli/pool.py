@@ -0,0 +1,301 @@
+import time
+import threading
+import psycopg2  # type: ignore
+from psycopg2 import extensions  # type: ignore
+from psycopg2.pool import PoolError  # type: ignore
+from db_cli import metrics
+
+
+class TimedCursor(extensions.cursor):
+    """A cursor reporting execute and fetch times to ``db_cli.metrics``."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+
+        try:
+            return super().execute(query, vars)
+
+        finally:
+            metrics.record("execute", time.perf_counter() - start, self._affected())
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+
+        try:
+            return super().copy_expert(sql, file, size)
+
+        finally:
+            metrics.record(
+                "execute", time.perf_counter() - start, max(self.rowcount, 0)
+            )
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        metrics.record("fetch", time.perf_counter() - start, int(row is not None))
+
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        metrics.record("fetch", time.perf_counter() - start, len(rows))
+
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        metrics.record("fetch", time.perf_counter() - start, len(rows))
+
+        return rows
+
+    def __iter__(self):
+        iterator = super().__iter__()
+        seconds = 0.0
+        count = 0
+
+        try:
+            while True:
+                start = time.perf_counter()
+
+                try:
+                    row = next(iterator)
+
+                except StopIteration:
+                    return
+
+                finally:
+                    seconds += time.perf_counter() - start
+
+                count += 1
+
+                yield row
+
+        finally:
+            metrics.record("fetch", seconds, count)
+
+    def _affected(self) -> int:
+        # Rows written by INSERT/UPDATE/DELETE; reads are counted when fetched.
+        if self.description is None and self.rowcount > 0:
+            return self.rowcount
+
+        return 0
+
+
+class PooledConnection(extensions.connection):
+    """A connection that remembers which statements it has prepared."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.prepared = set()
+        self.schema_version = 0
+
+    def cursor(self, *args, **kwargs):
+        if metrics.current is not None and "cursor_factory" not in kwargs:
+            kwargs["cursor_factory"] = TimedCursor
+
+        return super().cursor(*args, **kwargs)
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of warm psycopg2 connections.
+
+    Connections are opened lazily up to ``max_size``, handed back on
+    ``putconn`` and kept for reuse. Idle connections beyond ``min_size``
+    are closed once they have been unused for ``idle_timeout`` seconds, and
+    every checkout can optionally be verified with a ``SELECT 1``.
+    """
+
+    def __init__(
+        self,
+        params: dict,
+        min_size: int = 1,
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        health_check: bool = True,
+    ) -> None:
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size (min: {min_size}, max: {max_size}).")
+
+        self.params = params
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+
+        self._idle = []  # (connection, last returned at) pairs, oldest first
+        self._in_use = 0
+        self._closed = False
+        self._lock = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._in_use + len(self._idle)
+
+    def getconn(self, timeout: float | None = None):
+        if metrics.current is None:
+            return self._getconn(timeout)
+
+        start = time.perf_counter()
+
+        try:
+            return self._getconn(timeout)
+
+        finally:
+            metrics.record("connect", time.perf_counter() - start)
+
+    def _getconn(self, timeout: float | None = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            conn = self._checkout(deadline)
+
+            if conn is None:
+                break
+
+            # Checked outside the lock, so a slow or dead connection does not
+            # hold up every other checkout and return while it is verified.
+            if self._is_healthy(conn):
+                return conn
+
+            self._discard(conn)
+
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+
+        # Open the new connection outside the lock so a slow handshake does
+        # not block other threads returning connections.
+        try:
+            return psycopg2.connect(connection_factory=PooledConnection, **self.params)
+
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+
+            raise
+
+    def putconn(self, conn, close: bool = False) -> None:
+        if not conn.closed and not close:
+            status = conn.info.transaction_status
+
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                # Never hand out a connection with a half-finished transaction.
+                try:
+                    conn.rollback()
+
+                except psycopg2.Error:
+                    close = True
+
+        with self._lock:
+            self._in_use -= 1
+
+            if conn.closed or close or self._closed:
+                self._discard(conn)
+
+            else:
+                self._idle.append((conn, time.monotonic()))
+
+            self._lock.notify()
+
+    def _checkout(self, deadline: float | None):
+        """
+        Take an idle connection, or None once a slot is reserved for a new
+        one; either way it already counts as in use.
+        """
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+
+                self._prune()
+
+                if self._idle:
+                    conn, _ = self._idle.pop()
+
+                    self._in_use += 1
+
+                    return conn
+
+                if self._in_use + len(self._idle) < self.max_size:
+                    self._in_use += 1
+
+                    return None
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+
+                if remaining is not None and remaining <= 0:
+                    raise PoolError(
+                        f"connection pool exhausted ({self.max_size} connections in use)"
+                    )
+
+                self._lock.wait(remaining)
+
+    def warm_up(self) -> None:
+        """Open connections until at least ``min_size`` exist."""
+
+        conns = [self.getconn() for _ in range(max(self.min_size - self.size, 0))]
+
+        for conn in conns:
+            self.putconn(conn)
+
+    def closeall(self) -> None:
+        with self._lock:
+            self._closed = True
+
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+            self._lock.notify_all()
+
+    def _prune(self) -> None:
+        if self.idle_timeout <= 0:
+            return
+
+        cutoff = time.monotonic() - self.idle_timeout
+
+        # ``_idle`` is ordered by return time, so stale connections are at the front.
+        while (
+            self._idle
+            and self._in_use + len(self._idle) > self.min_size
+            and self._idle[0][1] < cutoff
+        ):
+            conn, _ = self._idle.pop(0)
+            self._discard(conn)
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+
+        if not self.health_check:
+            return True
+
+        try:
+            # Untimed: the check is part of the "connect" phase, not a query.
+            cur = conn.cursor(cursor_factory=extensions.cursor)
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+
+        except psycopg2.Error:
+            return False
+
+        return True
+
+    @staticmethod
+    def _discard(conn) -> None:
+        try:
+            conn.close()
+
+        except psycopg2.Error:
+            pass
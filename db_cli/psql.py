@@ -1,15 +1,62 @@
+import os
+import sys
+import csv
+import time
+import json
+import atexit
 import click
-from pytz import timezone
+from decimal import Decimal
 from datetime import datetime
-import psycopg2  # type: ignore
 from configparser import ConfigParser
+from db_cli.ingest import (
+    CONFLICT_MODES,
+    RECORD_COLUMNS,
+    copy_batches,
+    detect_format,
+    read_records,
+)
+from db_cli.export import EXPORT_FORMATS, export_query, header_line, open_output
+from db_cli.updates import collect_changes, group_changes
+from db_cli.replicas import REPLICA_DEFAULTS, REPLICA_PREFIX, REPLICA_STRATEGIES
+
+# psycopg2, pytz and the modules built on them are imported where they are
+# first needed, so "--help" and argument errors never pay for loading them.
+
+
+POOL_DEFAULTS = {
+    "pool_min_size": 1,
+    "pool_max_size": 5,
+    "pool_idle_timeout": 300.0,
+    "pool_health_check": True,
+}
+
+INSERT_RECORD = "INSERT INTO {}(animal_id, morning_production, afternoon_production, evening_production, production_unit, production_date) VALUES($1, $2, $3, $4, $5, $6)"
 
 
 class PostgresConnect:
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, section: str = "postgresql") -> None:
         self.path = path
         self.db = {}
-        self.section = "postgresql"
+        self.section = section
+        self.pool_options = dict(POOL_DEFAULTS)
+        self._pool = None
+        self._schema_version = 0
+        self._partitioned = {}
+        self._partitions = {}
+        self._animals = {}
+        self._animal_tables = {}
+        self.cache_options = None
+        self._cache = None
+        self.journal_options = {}
+        self._journal = None
+        self.offline = False
+        self.offline_default = False
+        self.replicas = {}
+        self.replica_options = {}
+        self.use_replicas = True
+        self._router = None
+        self.farms = []
+        self._farms = {}
 
         parser = ConfigParser()
         parser.read(self.path)
@@ -23,11 +70,442 @@ class PostgresConnect:
                 f"Section {self.section} not found in the {self.path} file."
             )
 
+        # Pool settings live in the same section but are not libpq parameters.
+        for key, default in POOL_DEFAULTS.items():
+            if key in self.db:
+                value = self.db.pop(key)
+
+                if isinstance(default, bool):
+                    self.pool_options[key] = parser.getboolean(self.section, key)
+                else:
+                    self.pool_options[key] = type(default)(value)
+
+        self.replica_options = {
+            key: type(default)(self.db.pop(key, default))
+            for key, default in REPLICA_DEFAULTS.items()
+        }
+
+        if self.replica_options["replica_strategy"] not in REPLICA_STRATEGIES:
+            raise Exception(
+                f"replica_strategy must be one of: {', '.join(REPLICA_STRATEGIES)}."
+            )
+
+        # Reads may be served by replicas, each in its own section with the
+        # same connection parameters as the primary.
+        prefix = REPLICA_PREFIX.format(self.section)
+
+        for section in parser.sections():
+            if section.startswith(prefix):
+                self.replicas[section[len(prefix) :]] = {
+                    key: value
+                    for key, value in parser.items(section)
+                    if key not in POOL_DEFAULTS
+                }
+
+        from db_cli.farms import farm_names
+
+        self.farms = farm_names(parser.sections())
+
+        # The result cache is optional and only enabled by a [cache] section.
+        if parser.has_section("cache"):
+            self.cache_options = dict(parser.items("cache"))
+
+        # Offline writes go to a local journal until they are synced.
+        if parser.has_section("journal"):
+            self.journal_options = dict(parser.items("journal"))
+            self.offline_default = parser.getboolean(
+                "journal", "offline", fallback=False
+            )
+            self.offline = self.offline_default
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            from db_cli.pool import ConnectionPool
+
+            self._pool = ConnectionPool(
+                self.db,
+                min_size=self.pool_options["pool_min_size"],
+                max_size=self.pool_options["pool_max_size"],
+                idle_timeout=self.pool_options["pool_idle_timeout"],
+                health_check=self.pool_options["pool_health_check"],
+            )
+
+            atexit.register(self.close)
+
+        return self._pool
+
+    @property
+    def router(self):
+        if self._router is None and self.replicas:
+            from db_cli.pool import ConnectionPool
+            from db_cli.replicas import Replica, ReplicaRouter
+
+            replicas = [
+                Replica(
+                    name,
+                    ConnectionPool(
+                        params,
+                        min_size=self.pool_options["pool_min_size"],
+                        max_size=self.pool_options["pool_max_size"],
+                        idle_timeout=self.pool_options["pool_idle_timeout"],
+                        health_check=self.pool_options["pool_health_check"],
+                    ),
+                )
+                for name, params in self.replicas.items()
+            ]
+
+            self._router = ReplicaRouter(
+                replicas,
+                strategy=self.replica_options["replica_strategy"],
+                max_lag=self.replica_options["replica_max_lag"],
+                check_interval=self.replica_options["replica_check_interval"],
+            )
+
+            atexit.register(self.close)
+
+        return self._router
+
+    @property
+    def cache(self):
+        if self._cache is None and self.cache_options is not None:
+            from db_cli.cache import CACHE_DEFAULTS, ResultCache
+
+            options = {
+                key: type(default)(self.cache_options.get(key, default))
+                for key, default in CACHE_DEFAULTS.items()
+            }
+
+            self._cache = ResultCache(**options)
+
+        return self._cache
+
+    @property
+    def journal(self):
+        if self._journal is None:
+            from db_cli.journal import JOURNAL_DEFAULTS, Journal
+
+            self._journal = Journal(
+                self.journal_options.get("path", JOURNAL_DEFAULTS["path"])
+            )
+
+        return self._journal
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+
+        if self._router is not None:
+            self._router.closeall()
+            self._router = None
+
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+        for client in self._farms.values():
+            client.close()
+
+        self._farms.clear()
+
+    def farm_clients(self, spec: str) -> dict:
+        """Clients of the farms named in ``spec`` ("a,b,c" or "all"), by name."""
+
+        from db_cli.farms import FARM_PREFIX, select_farms
+
+        names = select_farms(spec, self.farms)
+
+        for name in names:
+            if name not in self._farms:
+                self._farms[name] = PostgresConnect(self.path, FARM_PREFIX + name)
+
+        return {name: self._farms[name] for name in names}
+
+    def _read_conn(self, cached: bool = False):
+        """
+        A connection for read-only queries and the pool to return it to: a
+        healthy replica if any are configured, otherwise the primary.
+
+        Results that will be ``cached`` are read from the primary: a lagging
+        replica could miss a write made just before, and the cache would then
+        keep serving the stale result after the replica caught up.
+        """
+
+        if cached and self.cache is not None:
+            return self.pool, self.pool.getconn()
+
+        if self.use_replicas and self.router is not None:
+            pool, conn = self.router.getconn()
+
+            if conn is not None:
+                return pool, conn
+
+        return self.pool, self.pool.getconn()
+
+    def _queue(self, op: str, table: str, **fields):
+        # Offline mode: record the write locally and return without a round trip.
+        try:
+            self.journal.append(op, table, **fields)
+
+            click.echo(
+                click.style(
+                    "\nRecord has been saved to the offline journal, run sync to write it to the database.\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        return
+
+    def _invalidate(self, table: str):
+        # Drop cached reads of ``table`` after writing to it through this client.
+        if self.cache is not None:
+            self.cache.invalidate(table)
+
+    def _tables_added(self):
+        # New tables only change the cached list of tables.
+        if self.cache is not None:
+            from db_cli.cache import SCHEMA_TAG
+
+            self.cache.invalidate(SCHEMA_TAG)
+
+    def _renamed(self):
+        # Cow names appear in the records of every table, and in the name cache.
+        self._animals.clear()
+
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _cache_key(self, key: tuple) -> str:
+        # One cache file serves every database.ini and farm, so keys name
+        # the database they were read from.
+        database = self.db.get("database", self.db.get("dbname"))
+
+        return self.cache.key(
+            self.section, self.db.get("host"), self.db.get("port"), database, *key
+        )
+
+    def _cache_get(self, key: tuple):
+        if self.cache is None:
+            return None
+
+        return self.cache.get(self._cache_key(key))
+
+    def _cache_put(self, key: tuple, table: str | None, value):
+        if self.cache is not None:
+            from db_cli.cache import SCHEMA_TAG
+
+            self.cache.put(
+                self._cache_key(key), SCHEMA_TAG if table is None else table, value
+            )
+
+    def _schema_changed(self):
+        self._schema_version += 1
+        self._partitioned.clear()
+        self._partitions.clear()
+        self._animals.clear()
+        self._animal_tables.clear()
+
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _ensure_partitions(
+        self, conn, cur, table: str, dates, commit: bool = True
+    ) -> set:
+        """
+        Create the monthly partitions ``dates`` fall into, if ``table`` is
+        partitioned and they do not exist yet. New partitions are committed
+        straight away so a failing insert cannot roll them back behind the cache.
+
+        With ``commit=False`` they are left in the caller's transaction
+        instead; the caller passes the returned months to
+        ``_partitions_created`` once it has committed.
+        """
+
+        from db_cli.partitions import (
+            IS_ATTACHED,
+            IS_PARTITIONED,
+            PartitionError,
+            create_partition,
+            month_start,
+            next_month,
+            partition_name,
+        )
+
+        if table not in self._partitioned:
+            cur.execute(IS_PARTITIONED, (table,))
+
+            self._partitioned[table] = cur.fetchone()[0]
+
+        if not self._partitioned[table]:
+            return set()
+
+        known = self._partitions.setdefault(table, set())
+
+        months = {month_start(date) for date in dates} - known
+
+        if not months:
+            return months
+
+        for month in sorted(months):
+            cur.execute(create_partition(table, month))
+
+            # CREATE TABLE IF NOT EXISTS does nothing when a detached
+            # partition of that month is still there under the same name.
+            name = partition_name(table, month)
+
+            cur.execute(IS_ATTACHED, (name, table))
+
+            if not cur.fetchone()[0]:
+                raise PartitionError(
+                    f"Table '{name}' for {month:%Y-%m} is not attached to '{table}': attach it again with ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{next_month(month)}'), or rename or drop it."
+                )
+
+        if commit:
+            conn.commit()
+
+            self._partitions_created(table, months)
+
+        return months
+
+    def _partitions_created(self, table: str, months: set) -> None:
+        self._partitions.setdefault(table, set()).update(months)
+
+        if months:
+            self._tables_added()
+
+    def _copy_in(self, conn, cur, table: str, batches, on_conflict: str = "error"):
+        """
+        COPY ``(buffer, row count, production dates)`` batches into ``table``,
+        committing after each one, and yield ``(rows read, rows written)``
+        for every batch.
+
+        Each batch is copied into a temporary staging table, new cows are
+        added to ``animals``, and the rows are moved into ``table`` with their
+        cow ids by one ``INSERT ... SELECT`` (``ON CONFLICT`` as requested).
+        """
+
+        from psycopg2 import sql  # type: ignore
+        from db_cli.queries import add_staged_animals, load_from, staging_table
+
+        staging = f"{table}_staging"
+
+        statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+            sql.Identifier(staging),
+            sql.SQL(", ").join(map(sql.Identifier, RECORD_COLUMNS)),
+        )
+
+        statement = statement.as_string(conn)
+
+        # Private to this connection; its rows are dropped at every commit.
+        cur.execute(staging_table(staging))
+
+        add_animals = add_staged_animals(staging)
+        load = load_from(table, staging, on_conflict)
+
+        for buffer, count, dates in batches:
+            self._ensure_partitions(conn, cur, table, dates)
+
+            cur.copy_expert(statement, buffer)
+
+            cur.execute(add_animals)
+            cur.execute(load)
+
+            written = cur.rowcount
+
+            conn.commit()
+
+            self._invalidate(table)
+
+            yield count, written
+
+    def _joins_animals(self, conn, table: str) -> bool:
+        """
+        Whether ``table`` refers to cows by ``animal_id``, so that their names
+        can be joined in. Other tables given with --table are read as they are.
+        """
+
+        from db_cli.queries import HAS_ANIMAL_ID
+
+        if table not in self._animal_tables:
+            cur = conn.cursor()
+
+            cur.execute(HAS_ANIMAL_ID, (table,))
+
+            self._animal_tables[table] = cur.fetchone()[0]
+
+            cur.close()
+
+        return self._animal_tables[table]
+
+    def _animal_ids(self, conn, cur, names) -> dict:
+        """
+        Map cow names to ``animals.id``, adding cows seen for the first time.
+        Known names are served from a per-client cache without a query.
+        """
+
+        from db_cli.queries import ADD_ANIMALS, ANIMAL_IDS
+
+        missing = list(set(names) - self._animals.keys())
+
+        if missing:
+            cur.execute(ADD_ANIMALS, (missing,))
+            cur.execute(ANIMAL_IDS, (missing,))
+
+            # Committed right away, so a later rollback cannot leave ids in
+            # the cache that do not exist.
+            conn.commit()
+
+            self._animals.update(cur.fetchall())
+
+        return {name: self._animals[name] for name in names}
+
+    def _execute_prepared(
+        self, conn, cur, name: str, statement: str, params: tuple, table: str = ""
+    ):
+        """
+        Run ``statement`` (written with $1, $2, ... placeholders and an
+        optional "{}" for the table name) as a server-side prepared statement.
+        Each connection prepares a statement once, so repeated calls skip
+        parsing and planning.
+        """
+
+        from psycopg2 import sql  # type: ignore
+
+        # Tables may have been dropped or recreated since the statements were
+        # prepared, in which case their result types could have changed.
+        if conn.schema_version != self._schema_version:
+            if conn.prepared:
+                cur.execute("DEALLOCATE ALL")
+
+            conn.prepared.clear()
+            conn.schema_version = self._schema_version
+
+        if name not in conn.prepared:
+            cur.execute(
+                sql.SQL("PREPARE {} AS ").format(sql.Identifier(name))
+                + sql.SQL(statement).format(sql.Identifier(table))
+            )
+
+            conn.prepared.add(name)
+
+        cur.execute(
+            sql.SQL("EXECUTE {} ({})").format(
+                sql.Identifier(name),
+                sql.SQL(", ").join(sql.Placeholder() * len(params)),
+            ),
+            params,
+        )
+
     def check_connection(self):
         conn = None
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
@@ -51,16 +529,21 @@ class PostgresConnect:
 
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
-    def create_tables(self, path: str):
+    def create_tables(self, path: str, unique: bool = False):
         with open(path, "r") as file:
             sql_commands = file.read()
 
+        if unique:
+            from db_cli.queries import UNIQUE_RECORDS
+
+            sql_commands += UNIQUE_RECORDS
+
         conn = None
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
@@ -68,8 +551,10 @@ class PostgresConnect:
 
             conn.commit()
 
+            self._schema_changed()
+
             cur.execute(
-                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';"
+                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public' ORDER BY table_name;"
             )
 
             tables = cur.fetchall()
@@ -97,117 +582,255 @@ class PostgresConnect:
 
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
-    def delete_tables(self, table: str):
+    def migrate(
+        self,
+        directory: str,
+        target: int | None = None,
+        dry_run: bool = False,
+        lock_timeout: str = "5s",
+        statement_timeout: str = "0",
+        retries: int = 3,
+    ):
+        from psycopg2 import errors  # type: ignore
+        from db_cli.migrate import (
+            HAS_SCHEMA_MIGRATIONS,
+            MIGRATION_LOCK,
+            RECORD_MIGRATION,
+            SCHEMA_MIGRATIONS,
+            load_migrations,
+        )
+
         conn = None
 
+        migration = step = None
+        changed = False
+
         try:
-            conn = psycopg2.connect(**self.db)
+            migrations = load_migrations(directory)
+
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(f"DROP TABLE {table};")
+            if dry_run:
+                # Without schema_migrations, every migration is pending.
+                cur.execute(HAS_SCHEMA_MIGRATIONS)
+
+                recorded = cur.fetchone()[0]
+
+            else:
+                # Held until the connection is closed, so concurrent runs queue up.
+                cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK,))
+
+                cur.execute(SCHEMA_MIGRATIONS)
+
+                recorded = True
+
+            applied = set()
+
+            if recorded:
+                cur.execute("SELECT version FROM schema_migrations")
+
+                applied = {version for version, in cur.fetchall()}
 
             conn.commit()
 
+            if not dry_run:
+                self._tables_added()
+
+            pending = [
+                migration
+                for migration in migrations
+                if migration.version not in applied
+                and (target is None or migration.version <= target)
+            ]
+
+            if not pending:
+                click.echo(
+                    click.style(
+                        f"\nThe schema is up to date ({len(applied)} migrations applied).\n",
+                        fg="yellow",
+                        bold=True,
+                    )
+                )
+
+                return
+
             click.echo(
                 click.style(
-                    f"\nTable {table} has been deleted successfully.\n",
-                    fg="green",
+                    f"\n{len(pending)} pending migrations{' (dry run)' if dry_run else ''}:\n",
+                    fg="cyan",
                     bold=True,
+                    underline=True,
                 )
             )
 
-            cur.close()
+            if dry_run:
+                for migration in pending:
+                    mode = (
+                        "one transaction"
+                        if migration.transactional
+                        else "one transaction per step"
+                    )
 
-        except Exception as error:
-            click.echo(click.style(f"{error}", fg="red", bold=True))
+                    click.echo(
+                        click.style(f"{migration.label} ({mode})", fg="cyan", bold=True)
+                    )
 
-        finally:
-            if conn is not None:
-                conn.close()
+                    for step in migration.steps:
+                        flag = "" if step.transactional else " [no transaction]"
 
-        return
+                        click.echo(
+                            click.style(f"  - {step.description}{flag}", fg="cyan")
+                        )
 
-    def view_tables(self):
-        conn = None
+                click.echo()
 
-        try:
-            conn = psycopg2.connect(**self.db)
+                return
 
-            cur = conn.cursor()
+            # Give up quickly instead of queueing behind (and blocking) other
+            # sessions when a lock is not available.
+            cur.execute("SET lock_timeout = %s", (lock_timeout,))
+            cur.execute("SET statement_timeout = %s", (statement_timeout,))
 
-            cur.execute(
-                "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';"
-            )
+            conn.commit()
 
-            tables = cur.fetchall()
+            total = time.perf_counter()
 
-            if tables:
-                count = 1
+            for migration in pending:
+                start = time.perf_counter()
+
+                changed = True
+
+                for attempt in range(retries + 1):
+                    try:
+                        for step in migration.steps:
+                            step_start = time.perf_counter()
+
+                            if step.transactional:
+                                cur.execute(step.sql)
+
+                                if not migration.transactional:
+                                    conn.commit()
+
+                            else:
+                                conn.commit()
+                                conn.autocommit = True
+
+                                try:
+                                    cur.execute(step.sql)
+
+                                finally:
+                                    conn.autocommit = False
+
+                            click.echo(
+                                click.style(
+                                    f"{migration.label}: {step.description} ({(time.perf_counter() - step_start) * 1000:.1f} ms)",
+                                    fg="cyan",
+                                    bold=True,
+                                )
+                            )
+
+                        break
+
+                    except errors.LockNotAvailable:
+                        # Only an atomic migration is safe to simply start over.
+                        if not migration.transactional or attempt == retries:
+                            raise
+
+                        conn.rollback()
+
+                        click.echo(
+                            click.style(
+                                f"{migration.label}: lock not available, retrying ({attempt + 1}/{retries})",
+                                fg="yellow",
+                                bold=True,
+                            )
+                        )
+
+                        time.sleep(attempt + 1)
+
+                elapsed = (time.perf_counter() - start) * 1000
+
+                cur.execute(
+                    RECORD_MIGRATION, (migration.version, migration.name, elapsed)
+                )
+
+                conn.commit()
 
                 click.echo(
                     click.style(
-                        "\nList of all the tables in the database:\n",
-                        fg="cyan",
+                        f"\n{migration.label} has been applied in {elapsed:.1f} ms.\n",
+                        fg="green",
                         bold=True,
-                        underline=True,
                     )
                 )
 
-                for table in tables:
-                    click.echo(click.style(f"{count}. {table}\n", fg="cyan", bold=True))
+            migration = None
 
-                    count += 1
+            click.echo(
+                click.style(
+                    f"{len(pending)} migrations applied in {time.perf_counter() - total:.2f}s.\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+            if migration is not None and step is not None:
+                committed = (
+                    "nothing of it has been committed"
+                    if migration.transactional
+                    else "the steps before it have been committed, so the migration should be safe to re-run"
+                )
 
-            else:
                 click.echo(
                     click.style(
-                        "\nNo tables have been created yet (0 tables found).\n",
+                        f"\n{migration.label} failed at step '{step.description}'; {committed}.\n",
                         fg="yellow",
                         bold=True,
                     )
                 )
 
-            cur.close()
-
-        except Exception as error:
-            click.echo(click.style(f"{error}", fg="red", bold=True))
-
         finally:
+            if changed:
+                self._schema_changed()
+
             if conn is not None:
-                conn.close()
+                # Closing the connection drops its advisory lock and timeouts.
+                self.pool.putconn(conn, close=True)
 
         return
 
-    def create_record(
-        self,
-        animal: str,
-        morning_production: float,
-        afternoon_production: float,
-        evening_production: float,
-        production_unit: str,
-        production_date: datetime,
-    ):
+    def delete_tables(self, table: str):
+        from psycopg2 import sql  # type: ignore
+
         conn = None
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(
-                f"INSERT INTO milk_production(animal, morning_production, afternoon_production, evening_production, production_unit, production_date) VALUES('{animal}', {morning_production}, { afternoon_production}, {evening_production}, '{production_unit}', '{production_date.date()}')"
-            )
+            cur.execute(sql.SQL("DROP TABLE {};").format(sql.Identifier(table)))
 
             conn.commit()
 
+            self._schema_changed()
+
             click.echo(
                 click.style(
-                    "\nRecord has been created successfully.\n", fg="green", bold=True
+                    f"\nTable {table} has been deleted successfully.\n",
+                    fg="green",
+                    bold=True,
                 )
             )
 
@@ -218,104 +841,146 @@ class PostgresConnect:
 
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
-    def view_all_records(self, table: str):
+    def view_tables(self):
         conn = None
 
-        try:
-            conn = psycopg2.connect(**self.db)
+        key = ("view_tables",)
 
-            cur = conn.cursor()
+        tables = self._cache_get(key)
 
-            cur.execute(f"SELECT * FROM {table};")
+        try:
+            if tables is None:
+                pool, conn = self._read_conn(cached=True)
+
+                cur = conn.cursor()
+
+                cur.execute(
+                    "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public' ORDER BY table_name;"
+                )
 
-            records = cur.fetchall()
+                tables = cur.fetchall()
 
-            if records:
+                cur.close()
+
+                self._cache_put(key, None, tables)
+
+            if tables:
                 count = 1
 
                 click.echo(
                     click.style(
-                        f"\nList of all the records in table '{table}':\n",
+                        "\nList of all the tables in the database:\n",
                         fg="cyan",
                         bold=True,
+                        underline=True,
                     )
                 )
 
-                for record in records:
-                    click.echo(
-                        click.style(
-                            f"{count}. | id: {record[0]} | cow: {record[1]} | morning: {record[2]} | noon: {record[3]} | evening: {record[4]} | unit: {record[5]} | date: {record[6]}\n",
-                            fg="cyan",
-                            bold=True,
-                        )
-                    )
+                for table in tables:
+                    click.echo(click.style(f"{count}. {table}\n", fg="cyan", bold=True))
 
                     count += 1
 
             else:
                 click.echo(
                     click.style(
-                        f"\n0 records in table '{table}'.\n",
+                        "\nNo tables have been created yet (0 tables found).\n",
                         fg="yellow",
                         bold=True,
                     )
                 )
 
-            cur.close()
-
         except Exception as error:
             click.echo(click.style(f"{error}", fg="red", bold=True))
 
         finally:
             if conn is not None:
-                conn.close()
+                pool.putconn(conn)
 
         return
 
-    def view_record(self, table: str, id: int):
+    def create_record(
+        self,
+        animal: str,
+        morning_production: float,
+        afternoon_production: float,
+        evening_production: float,
+        production_unit: str,
+        production_date: datetime,
+        on_conflict: str = "error",
+    ):
+        values = (
+            animal,
+            morning_production,
+            afternoon_production,
+            evening_production,
+            production_unit,
+            production_date.date(),
+        )
+
+        if self.offline:
+            return self._queue(
+                "create",
+                "milk_production",
+                values=dict(zip(RECORD_COLUMNS, values)),
+                on_conflict=on_conflict,
+            )
+
         conn = None
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(f"SELECT * FROM {table} WHERE id = {id};")
+            self._ensure_partitions(
+                conn, cur, "milk_production", [production_date.date()]
+            )
 
-            records = cur.fetchall()
+            animal_id = self._animal_ids(conn, cur, [animal])[animal]
 
-            if records:
-                count = 1
+            self._execute_prepared(
+                conn,
+                cur,
+                *insert_statement("milk_production", on_conflict),
+                (animal_id, *values[1:]),
+                "milk_production",
+            )
+
+            # (xmax = 0) is true for a new row and false for an updated one.
+            created = cur.fetchone()[0] if cur.rowcount and cur.description else None
 
+            conn.commit()
+
+            self._invalidate("milk_production")
+
+            if cur.rowcount == 0:
                 click.echo(
                     click.style(
-                        f"\nRecord of id '{id}' in table '{table}':\n",
-                        fg="cyan",
+                        f"\nA record for '{animal}' on {values[-1]} already exists, nothing was changed.\n",
+                        fg="yellow",
                         bold=True,
-                        underline=True,
                     )
                 )
 
-                for record in records:
-                    click.echo(
-                        click.style(
-                            f"{count}. | id: {record[0]} | cow: {record[1]} | morning: {record[2]} | noon: {record[3]} | evening: {record[4]} | unit: {record[5]} | date: {record[6]}\n",
-                            fg="cyan",
-                            bold=True,
-                        )
+            elif created is False:
+                click.echo(
+                    click.style(
+                        f"\nThe record for '{animal}' on {values[-1]} has been updated successfully.\n",
+                        fg="green",
+                        bold=True,
                     )
-
-                    count += 1
+                )
 
             else:
                 click.echo(
                     click.style(
-                        f"\nRecord of id '{id}' in table '{table}' does not exist.\n",
-                        fg="yellow",
+                        "\nRecord has been created successfully.\n",
+                        fg="green",
                         bold=True,
                     )
                 )
@@ -327,85 +992,204 @@ class PostgresConnect:
 
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
-    def delete_record(self, table: str, id: int):
+    def view_all_records(
+        self,
+        table: str,
+        limit: int | None = None,
+        after_id: int | None = None,
+        order: str = "asc",
+        date_from=None,
+        date_to=None,
+        itersize: int = 2000,
+        fmt: str = "table",
+        color: bool = True,
+    ):
+        from db_cli.cache import CachedResult
+        from db_cli.queries import records_page
+        from db_cli.render import RecordRenderer
+
         conn = None
+        cur = None
+
+        # Only bounded pages are cached; full scans are always streamed.
+        cacheable = (
+            self.cache is not None
+            and limit is not None
+            and limit <= self.cache.max_rows
+        )
+
+        key = ("view_all_records", table, limit, after_id, order, date_from, date_to)
+
+        result = self._cache_get(key) if cacheable else None
 
         try:
-            conn = psycopg2.connect(**self.db)
+            if result is None:
+                pool, conn = self._read_conn(cached=cacheable)
+
+                query, params = records_page(
+                    table,
+                    date_from,
+                    date_to,
+                    after_id,
+                    order,
+                    limit,
+                    joined=self._joins_animals(conn, table),
+                )
 
-            cur = conn.cursor()
+            if result is not None:
+                rows = result.rows
 
-            cur.execute(f"DELETE from {table} WHERE id = {id};")
+            elif cacheable:
+                cur = conn.cursor()
 
-            conn.commit()
+                cur.execute(query, params)
 
-            click.echo(
-                click.style(
-                    "\nRecord has been deleted successfully.\n", fg="green", bold=True
-                )
+                result = CachedResult.from_cursor(cur, cur.fetchall())
+
+                rows = result.rows
+
+                self._cache_put(key, table, result)
+
+            else:
+                # A named cursor keeps the result set on the server and streams it
+                # ``itersize`` rows at a time, so the first rows print immediately.
+                cur = conn.cursor(name="view_all_records")
+                cur.itersize = itersize
+
+                cur.execute(query, params)
+
+                rows = result = cur
+
+            renderer = RecordRenderer(
+                fmt,
+                color,
+                title=f"\nList of all the records in table '{table}':\n",
+                title_style={"fg": "cyan", "bold": True},
             )
 
-            cur.close()
+            count = renderer.write(rows, result)
+
+            # Keep notices out of machine-readable output.
+            notices_to_stderr = fmt != "table"
+
+            if count == 0:
+                click.echo(
+                    click.style(
+                        f"\n0 records in table '{table}'.\n",
+                        fg="yellow",
+                        bold=True,
+                    ),
+                    err=notices_to_stderr,
+                )
+
+            elif limit is not None and count == limit:
+                click.echo(
+                    click.style(
+                        f"More records may follow, continue with: --after-id {renderer.last[0]}\n",
+                        fg="yellow",
+                        bold=True,
+                    ),
+                    err=notices_to_stderr,
+                )
+
+            if cur is not None:
+                cur.close()
 
         except Exception as error:
             click.echo(click.style(f"{error}", fg="red", bold=True))
 
         finally:
             if conn is not None:
-                conn.close()
+                pool.putconn(conn)
 
         return
 
-    def update_name(self, table: str, id: int, name: str):
+    def view_record(self, table: str, id: int, fmt: str = "table", color: bool = True):
+        from db_cli.cache import CachedResult
+        from db_cli.queries import RECORD_BY_ID, ROW_BY_ID
+        from db_cli.render import RecordRenderer
+
         conn = None
 
+        key = ("view_record", table, str(id))
+
+        result = self._cache_get(key)
+
         try:
-            conn = psycopg2.connect(**self.db)
+            if result is None:
+                pool, conn = self._read_conn(cached=True)
+
+                cur = conn.cursor()
+
+                self._execute_prepared(
+                    conn,
+                    cur,
+                    f"select_{table}",
+                    RECORD_BY_ID if self._joins_animals(conn, table) else ROW_BY_ID,
+                    (id,),
+                    table,
+                )
 
-            cur = conn.cursor()
+                result = CachedResult.from_cursor(cur, cur.fetchall())
 
-            cur.execute(f"UPDATE {table} SET animal = '{name}' WHERE id = {id};")
+                cur.close()
 
-            conn.commit()
+                self._cache_put(key, table, result)
 
-            click.echo(
-                click.style(
-                    "\nRecord has been updated successfully.\n", fg="green", bold=True
-                )
+            renderer = RecordRenderer(
+                fmt,
+                color,
+                title=f"\nRecord of id '{id}' in table '{table}':\n",
+                title_style={"fg": "cyan", "bold": True, "underline": True},
             )
 
-            cur.close()
+            if not renderer.write(result.rows, result):
+                click.echo(
+                    click.style(
+                        f"\nRecord of id '{id}' in table '{table}' does not exist.\n",
+                        fg="yellow",
+                        bold=True,
+                    ),
+                    err=fmt != "table",
+                )
 
         except Exception as error:
             click.echo(click.style(f"{error}", fg="red", bold=True))
 
         finally:
             if conn is not None:
-                conn.close()
+                pool.putconn(conn)
 
         return
 
-    def update_morning(self, table: str, id: int, amount: float):
+    def delete_record(self, table: str, id: int):
         conn = None
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(
-                f"UPDATE {table} SET morning_production = {amount} WHERE id = {id};"
+            self._execute_prepared(
+                conn,
+                cur,
+                f"delete_{table}",
+                "DELETE FROM {} WHERE id = $1",
+                (id,),
+                table,
             )
 
             conn.commit()
 
+            self._invalidate(table)
+
             click.echo(
                 click.style(
-                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                    "\nRecord has been deleted successfully.\n", fg="green", bold=True
                 )
             )
 
@@ -416,27 +1200,98 @@ class PostgresConnect:
 
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
-    def update_noon(self, table: str, id: int, amount: float):
+    def delete_records(
+        self,
+        table: str,
+        ids=None,
+        before=None,
+        animals=(),
+        batch_size: int = 1000,
+        sleep: float = 0.0,
+    ):
+        """
+        Delete the records with the given ``ids``, or those matching
+        ``before``/``animals``, at most ``batch_size`` per transaction so
+        no statement holds its locks (or writes WAL) for long.
+        """
+
+        from psycopg2 import sql  # type: ignore
+        from db_cli.queries import delete_batch, record_filters
+
         conn = None
+        deleted = 0
+
+        start = time.perf_counter()
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(
-                f"UPDATE {table} SET afternoon_production = {amount} WHERE id = {id};"
-            )
+            if ids is not None:
+                statement = sql.SQL("DELETE FROM {} WHERE id = ANY(%s)").format(
+                    sql.Identifier(table)
+                )
 
-            conn.commit()
+                ids = sorted(set(ids))
+
+                batches = (
+                    ids[offset : offset + batch_size]
+                    for offset in range(0, len(ids), batch_size)
+                )
+
+                for batch in batches:
+                    cur.execute(statement, (batch,))
+
+                    conn.commit()
+
+                    deleted += cur.rowcount
+
+                    self._invalidate(table)
+
+                    if sleep:
+                        time.sleep(sleep)
+
+            else:
+                last_id = None
+
+                while True:
+                    # Keyset over ids, so each batch starts after the last
+                    # one instead of rescanning the rows just deleted.
+                    where, params = record_filters(
+                        animals=animals, after_id=last_id, before=before
+                    )
+
+                    cur.execute(delete_batch(table, where, batch_size), params)
+
+                    count, last_id = cur.fetchone()
+
+                    conn.commit()
+
+                    if not count:
+                        break
+
+                    deleted += count
+
+                    self._invalidate(table)
+
+                    if count < batch_size:
+                        break
+
+                    if sleep:
+                        time.sleep(sleep)
+
+            elapsed = time.perf_counter() - start
 
             click.echo(
                 click.style(
-                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                    f"\n{deleted} records deleted from table '{table}' in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
                 )
             )
 
@@ -445,60 +1300,274 @@ class PostgresConnect:
         except Exception as error:
             click.echo(click.style(f"{error}", fg="red", bold=True))
 
+            click.echo(
+                click.style(
+                    f"\n{deleted} records were deleted before the error.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
-    def update_evening(self, table: str, id: int, amount: float):
+    def archive(
+        self,
+        table: str,
+        before,
+        directory: str | None = None,
+        to_table: bool = False,
+        batch_size: int = 10000,
+        sleep: float = 0.0,
+    ):
+        """
+        Move records produced before ``before`` out of ``table``, in chunks of
+        ``batch_size``: each chunk is deleted and written to monthly files in
+        ``directory`` and/or ``<table>_archive`` in one transaction.
+        """
+
+        from db_cli.archive import archive_table_ddl, move_batch, write_buckets
+        from db_cli.queries import record_filters
+
         conn = None
+        archived = 0
+        files = {}
+
+        archive_table = f"{table}_archive" if to_table else None
+
+        start = time.perf_counter()
 
         try:
-            conn = psycopg2.connect(**self.db)
+            if directory is not None:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(
-                f"UPDATE {table} SET evening_production = {amount} WHERE id = {id};"
-            )
+            if archive_table is not None:
+                cur.execute(archive_table_ddl(table, archive_table))
 
-            conn.commit()
+                conn.commit()
+
+                self._tables_added()
+
+            last_id = None
+
+            while True:
+                where, params = record_filters(after_id=last_id, before=before)
+
+                cur.execute(
+                    move_batch(
+                        table,
+                        where,
+                        batch_size,
+                        archive_table,
+                        with_names=directory is not None,
+                    ),
+                    params,
+                )
+
+                if directory is not None:
+                    rows = cur.fetchall()
+
+                    count = len(rows)
+                    last_id = rows[-1][0] if rows else None
+
+                    # The files are on disk before the rows leave the table;
+                    # if the commit fails, a restore skips the duplicates.
+                    for path, written in write_buckets(directory, table, rows).items():
+                        files[path] = files.get(path, 0) + written
+
+                else:
+                    count, last_id = cur.fetchone()
+
+                conn.commit()
+
+                if not count:
+                    break
+
+                archived += count
+
+                self._invalidate(table)
+
+                if count < batch_size:
+                    break
+
+                if sleep:
+                    time.sleep(sleep)
+
+            elapsed = time.perf_counter() - start
+
+            destinations = [f"table '{archive_table}'"] if archive_table else []
+
+            if directory is not None:
+                destinations.append(f"{len(files)} files in '{directory}'")
 
             click.echo(
                 click.style(
-                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                    f"\n{archived} records produced before {before} archived from table '{table}' to {' and '.join(destinations)} in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
                 )
             )
 
+            for path, written in sorted(files.items()):
+                click.echo(click.style(f"{path}: {written} records", fg="cyan"))
+
+            if files:
+                click.echo()
+
             cur.close()
 
         except Exception as error:
             click.echo(click.style(f"{error}", fg="red", bold=True))
 
+            click.echo(
+                click.style(
+                    f"\n{archived} records were archived before the error.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
-    def update_date(self, table: str, id: int, date: datetime):
+    def restore(
+        self,
+        table: str,
+        paths=(),
+        from_table: bool = False,
+        date_from=None,
+        date_to=None,
+        batch_size: int = 10000,
+    ):
+        """
+        Bring archived records back into ``table`` with their original ids,
+        from archive files (streamed in with COPY) and/or from
+        ``<table>_archive``. Records already in ``table`` are skipped.
+        """
+
+        import gzip
+        from psycopg2 import sql  # type: ignore
+        from db_cli.archive import (
+            ARCHIVE_COLUMNS,
+            move_batch,
+            restore_from,
+            restore_staging,
+        )
+        from db_cli.queries import add_staged_animals, record_filters
+
         conn = None
+        restored = 0
+
+        start = time.perf_counter()
 
         try:
-            conn = psycopg2.connect(**self.db)
+            conn = self.pool.getconn()
 
             cur = conn.cursor()
 
-            cur.execute(
-                f"UPDATE {table} SET production_date = '{date}' WHERE id = {id};"
-            )
+            if paths:
+                staging = f"{table}_restore"
 
-            conn.commit()
+                cur.execute(restore_staging(staging))
+
+                copy = sql.SQL(
+                    "COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER)"
+                ).format(
+                    sql.Identifier(staging),
+                    sql.SQL(", ").join(map(sql.Identifier, ARCHIVE_COLUMNS)),
+                )
+
+                copy = copy.as_string(conn)
+
+                months = sql.SQL("SELECT DISTINCT production_date FROM {}").format(
+                    sql.Identifier(staging)
+                )
+                empty = sql.SQL("TRUNCATE {}").format(sql.Identifier(staging))
+
+                add_animals = add_staged_animals(staging)
+                insert = restore_from(table, staging)
+
+                # One archive file (one month) per transaction.
+                for path in paths:
+                    opener = gzip.open if path.endswith(".gz") else open
+
+                    cur.execute(empty)
+
+                    with opener(path, "rt", encoding="utf-8", newline="") as stream:
+                        cur.copy_expert(copy, stream)
+
+                    cur.execute(months)
+
+                    self._ensure_partitions(
+                        conn, cur, table, [day for day, in cur.fetchall()]
+                    )
+
+                    cur.execute(add_animals)
+                    cur.execute(insert)
+
+                    restored += cur.rowcount
+
+                    conn.commit()
+
+                    self._invalidate(table)
+
+            if from_table:
+                archive_table = f"{table}_archive"
+
+                where, params = record_filters(date_from, date_to)
+
+                cur.execute(
+                    sql.SQL("SELECT DISTINCT production_date FROM {}").format(
+                        sql.Identifier(archive_table)
+                    )
+                    + where,
+                    params,
+                )
+
+                self._ensure_partitions(
+                    conn, cur, table, [day for day, in cur.fetchall()]
+                )
+
+                last_id = None
+
+                while True:
+                    where, params = record_filters(date_from, date_to, after_id=last_id)
+
+                    cur.execute(
+                        move_batch(archive_table, where, batch_size, table), params
+                    )
+
+                    count, last_id = cur.fetchone()
+
+                    conn.commit()
+
+                    if not count:
+                        break
+
+                    restored += count
+
+                    self._invalidate(table)
+
+                    if count < batch_size:
+                        break
+
+            elapsed = time.perf_counter() - start
 
             click.echo(
                 click.style(
-                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                    f"\n{restored} records restored into table '{table}' in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
                 )
             )
 
@@ -507,112 +1576,2313 @@ class PostgresConnect:
         except Exception as error:
             click.echo(click.style(f"{error}", fg="red", bold=True))
 
+            click.echo(
+                click.style(
+                    f"\n{restored} records were restored before the error.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
         finally:
             if conn is not None:
-                conn.close()
+                self.pool.putconn(conn)
 
         return
 
+    def update_name(self, table: str, id: int, name: str):
+        from db_cli.queries import RENAME_ANIMAL
 
-my_db = PostgresConnect("database.ini")
+        if self.offline:
+            return self._queue("update", table, id=id, column="animal", value=name)
 
+        conn = None
 
-@click.group()
-def cli():
-    pass
+        try:
+            conn = self.pool.getconn()
 
+            cur = conn.cursor()
 
-@click.command()
-def check_connection():
-    my_db.check_connection()
+            self._execute_prepared(
+                conn,
+                cur,
+                f"rename_animal_{table}",
+                RENAME_ANIMAL,
+                (name, id),
+                table,
+            )
+
+            conn.commit()
+
+            self._renamed()
+
+            click.echo(
+                click.style(
+                    "\nThe cow has been renamed in all of its records.\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def update_morning(self, table: str, id: int, amount: float):
+        if self.offline:
+            return self._queue(
+                "update", table, id=id, column="morning_production", value=amount
+            )
+
+        conn = None
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            self._execute_prepared(
+                conn,
+                cur,
+                f"update_morning_{table}",
+                "UPDATE {} SET morning_production = $1 WHERE id = $2",
+                (amount, id),
+                table,
+            )
+
+            conn.commit()
+
+            self._invalidate(table)
+
+            click.echo(
+                click.style(
+                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def update_noon(self, table: str, id: int, amount: float):
+        if self.offline:
+            return self._queue(
+                "update", table, id=id, column="afternoon_production", value=amount
+            )
+
+        conn = None
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            self._execute_prepared(
+                conn,
+                cur,
+                f"update_noon_{table}",
+                "UPDATE {} SET afternoon_production = $1 WHERE id = $2",
+                (amount, id),
+                table,
+            )
+
+            conn.commit()
+
+            self._invalidate(table)
+
+            click.echo(
+                click.style(
+                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def update_evening(self, table: str, id: int, amount: float):
+        if self.offline:
+            return self._queue(
+                "update", table, id=id, column="evening_production", value=amount
+            )
+
+        conn = None
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            self._execute_prepared(
+                conn,
+                cur,
+                f"update_evening_{table}",
+                "UPDATE {} SET evening_production = $1 WHERE id = $2",
+                (amount, id),
+                table,
+            )
+
+            conn.commit()
+
+            self._invalidate(table)
+
+            click.echo(
+                click.style(
+                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def update_date(self, table: str, id: int, date: datetime):
+        if self.offline:
+            return self._queue(
+                "update", table, id=id, column="production_date", value=date.date()
+            )
+
+        conn = None
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            self._ensure_partitions(conn, cur, table, [date.date()])
+
+            self._execute_prepared(
+                conn,
+                cur,
+                f"update_date_{table}",
+                "UPDATE {} SET production_date = $1 WHERE id = $2",
+                (date.date(), id),
+                table,
+            )
+
+            conn.commit()
+
+            self._invalidate(table)
+
+            click.echo(
+                click.style(
+                    "\nRecord has been updated successfully.\n", fg="green", bold=True
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def import_records(
+        self,
+        stream,
+        fmt: str,
+        table: str,
+        batch_size: int,
+        reject_file=None,
+        on_conflict: str = "error",
+    ):
+        conn = None
+        imported = 0
+        skipped = 0
+        rejected = 0
+
+        def on_reject(line_num: int, record, error: Exception):
+            nonlocal rejected
+
+            rejected += 1
+
+            if reject_file is not None:
+                reject = {
+                    "line": line_num,
+                    "error": str(error),
+                    "record": None if isinstance(record, Exception) else record,
+                }
+
+                reject_file.write(json.dumps(reject, default=str) + "\n")
+
+        start = time.perf_counter()
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            batches = copy_batches(read_records(stream, fmt), batch_size, on_reject)
+
+            for count, written in self._copy_in(conn, cur, table, batches, on_conflict):
+                imported += written
+                skipped += count - written
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{imported} records imported into table '{table}' in {elapsed:.2f}s ({imported / max(elapsed, 1e-9):.0f} rows/s).\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+            if skipped:
+                click.echo(
+                    click.style(
+                        f"{skipped} duplicate records (same animal and production date) skipped.\n",
+                        fg="yellow",
+                        bold=True,
+                    )
+                )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+            click.echo(
+                click.style(
+                    f"\n{imported} records were committed before the import stopped.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        if rejected:
+            destination = (
+                f" (written to {reject_file.name})" if reject_file is not None else ""
+            )
+
+            click.echo(
+                click.style(
+                    f"{rejected} records rejected{destination}.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+        return
+
+    def export_records(
+        self,
+        path: str,
+        fmt: str,
+        table: str,
+        compress: bool = False,
+        date_from=None,
+        date_to=None,
+        animals=(),
+        itersize: int = 10000,
+    ):
+        from db_cli.queries import record_filters, records_from
+
+        conn = None
+
+        # Keep stdout clean for the exported data when streaming to a pipe.
+        to_stdout = path == "-"
+
+        start = time.perf_counter()
+
+        try:
+            pool, conn = self._read_conn()
+
+            where, params = record_filters(date_from, date_to, animals)
+
+            query = records_from(table, where, self._joins_animals(conn, table))
+
+            cur = conn.cursor()
+
+            query = cur.mogrify(query, params).decode()
+
+            cur.close()
+
+            with open_output(path, compress) as stream:
+                count = export_query(conn, query, fmt, stream, itersize=itersize)
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{count} records exported from table '{table}' in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
+                ),
+                err=to_stdout,
+            )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True), err=to_stdout)
+
+        finally:
+            if conn is not None:
+                pool.putconn(conn)
+
+        return
+
+    def apply_updates(
+        self,
+        stream,
+        fmt: str,
+        table: str,
+        batch_size: int,
+    ):
+        from psycopg2 import sql  # type: ignore
+        from psycopg2.extras import execute_values  # type: ignore
+        from db_cli.queries import RENAME_ANIMALS
+
+        changes, errors = collect_changes(stream, fmt)
+
+        if errors:
+            for line_num, error in errors:
+                click.echo(
+                    click.style(f"line {line_num}: {error}", fg="red", bold=True)
+                )
+
+            click.echo(
+                click.style(
+                    f"\n{len(errors)} invalid changes, nothing has been updated.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+            return
+
+        # A new name renames the record's cow, as update-name does; the other
+        # fields update the record itself.
+        renames = [
+            (id, fields.pop("animal"))
+            for id, fields in changes.items()
+            if "animal" in fields
+        ]
+
+        changes = {id: fields for id, fields in changes.items() if fields}
+
+        conn = None
+        updated = 0
+        renamed = 0
+
+        start = time.perf_counter()
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            rename = sql.SQL(RENAME_ANIMALS).format(sql.Identifier(table))
+
+            for offset in range(0, len(renames), batch_size):
+                batch = renames[offset : offset + batch_size]
+
+                execute_values(cur, rename, batch, page_size=len(batch))
+
+                renamed += cur.rowcount
+
+            # Rows moved to another month need their partition to exist first.
+            # It is created in the same transaction, so a failed run leaves none.
+            months = self._ensure_partitions(
+                conn,
+                cur,
+                table,
+                [
+                    fields["production_date"]
+                    for fields in changes.values()
+                    if "production_date" in fields
+                ],
+                commit=False,
+            )
+
+            for columns, rows in group_changes(changes).items():
+                statement = sql.SQL(
+                    "UPDATE {table} AS t SET {assignments} FROM (VALUES %s) AS v (id, {columns}) WHERE t.id = v.id"
+                ).format(
+                    table=sql.Identifier(table),
+                    assignments=sql.SQL(", ").join(
+                        sql.SQL("{column} = v.{column}").format(
+                            column=sql.Identifier(column)
+                        )
+                        for column in columns
+                    ),
+                    columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+                )
+
+                for offset in range(0, len(rows), batch_size):
+                    batch = rows[offset : offset + batch_size]
+
+                    execute_values(cur, statement, batch, page_size=len(batch))
+
+                    updated += cur.rowcount
+
+            # All batches share one transaction: either every change lands or none does.
+            conn.commit()
+
+            self._partitions_created(table, months)
+
+            if renames:
+                self._renamed()
+
+            else:
+                self._invalidate(table)
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{updated} records updated and {renamed} cows renamed in table '{table}' in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+            if updated < len(changes):
+                click.echo(
+                    click.style(
+                        f"{len(changes) - updated} ids were not found.\n",
+                        fg="yellow",
+                        bold=True,
+                    )
+                )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def report(
+        self,
+        table: str,
+        period: str,
+        fmt: str,
+        date_from=None,
+        date_to=None,
+        animals=(),
+    ):
+        try:
+            rows = self._report_rows(table, period, date_from, date_to, animals)
+
+            write_report(
+                rows,
+                fmt,
+                title=f"\nProduction per {period} in table '{table}':\n",
+                empty=f"\n0 records in table '{table}' match the report filters.\n",
+            )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        return
+
+    def _report_rows(
+        self, table: str, period: str, date_from=None, date_to=None, animals=()
+    ) -> list:
+        """The rows of ``production_report`` as dicts of ``REPORT_COLUMNS``."""
+
+        from db_cli.queries import REPORT_COLUMNS, production_report, record_filters
+
+        where, params = record_filters(date_from, date_to, animals)
+
+        pool, conn = self._read_conn()
+
+        try:
+            cur = conn.cursor()
+
+            cur.execute(production_report(table, period, where), params)
+
+            rows = [dict(zip(REPORT_COLUMNS, row)) for row in cur.fetchall()]
+
+            cur.close()
+
+        finally:
+            pool.putconn(conn)
+
+        return rows
+
+    def farm_records(
+        self,
+        farms: str,
+        table: str,
+        limit: int | None = None,
+        order: str = "asc",
+        date_from=None,
+        date_to=None,
+        itersize: int = 2000,
+        fmt: str = "table",
+        color: bool = True,
+    ):
+        """
+        ``view_all_records`` for several farms at once: every farm is queried
+        concurrently and rows are printed as they arrive, tagged with the
+        farm they came from. ``limit`` applies to each farm.
+        """
+
+        from db_cli.cache import CachedResult
+        from db_cli.farms import fan_out
+        from db_cli.queries import RECORD_FIELDS, records_page
+        from db_cli.render import RecordRenderer
+
+        errors = {}
+
+        notices_to_stderr = fmt != "table"
+
+        start = time.perf_counter()
+
+        try:
+            clients = self.farm_clients(farms)
+
+            query, params = records_page(
+                table, date_from, date_to, order=order, limit=limit
+            )
+
+            def records(client):
+                pool, conn = client._read_conn()
+
+                try:
+                    cur = conn.cursor(name="farm_records")
+                    cur.itersize = itersize
+
+                    cur.execute(query, params)
+
+                    yield from cur
+
+                    cur.close()
+
+                finally:
+                    pool.putconn(conn)
+
+            def tagged():
+                for farm, rows, error in fan_out(clients, records, itersize):
+                    if error is not None:
+                        errors[farm] = error
+
+                        continue
+
+                    for row in rows:
+                        yield (farm, *row)
+
+            renderer = RecordRenderer(
+                fmt,
+                color,
+                title=f"\nRecords in table '{table}' of farms {', '.join(clients)}:\n",
+                title_style={"fg": "cyan", "bold": True},
+            )
+
+            count = renderer.write(tagged(), CachedResult(("farm", *RECORD_FIELDS), []))
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{count} records from {len(clients) - len(errors)} of {len(clients)} farms in {elapsed:.2f}s.\n",
+                    fg="yellow" if errors or not count else "green",
+                    bold=True,
+                ),
+                err=notices_to_stderr,
+            )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        for farm, error in errors.items():
+            click.echo(
+                click.style(f"{farm}: {str(error).strip()}", fg="red", bold=True),
+                err=notices_to_stderr,
+            )
+
+        return
+
+    def farm_report(
+        self,
+        farms: str,
+        table: str,
+        period: str,
+        fmt: str,
+        date_from=None,
+        date_to=None,
+        animals=(),
+    ):
+        """
+        ``report`` for several farms at once, with per-cow rows tagged with
+        their farm followed by herd-wide totals merged from all of them.
+        """
+
+        from db_cli.farms import fan_out, herd_report
+
+        errors = {}
+        rows = []
+
+        try:
+            clients = self.farm_clients(farms)
+
+            def report_rows(client):
+                return client._report_rows(table, period, date_from, date_to, animals)
+
+            for farm, chunk, error in fan_out(clients, report_rows):
+                if error is not None:
+                    errors[farm] = error
+
+                    continue
+
+                rows.extend(dict(row, farm=farm) for row in chunk)
+
+            # Farms answer in any order; print them in the order asked for.
+            order = {farm: index for index, farm in enumerate(clients)}
+
+            rows.sort(
+                key=lambda row: (
+                    order[row["farm"]],
+                    row["animal"],
+                    row["period"],
+                    row["unit"],
+                )
+            )
+
+            write_report(
+                rows,
+                fmt,
+                title=f"\nProduction per {period} in table '{table}' of farms {', '.join(clients)}:\n",
+                empty=f"\n0 records in table '{table}' match the report filters.\n",
+                herd=herd_report(rows),
+            )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        for farm, error in errors.items():
+            click.echo(
+                click.style(f"{farm}: {str(error).strip()}", fg="red", bold=True),
+                err=fmt != "table",
+            )
+
+        return
+
+    def farm_export(
+        self,
+        farms: str,
+        path: str,
+        fmt: str,
+        table: str,
+        compress: bool = False,
+        date_from=None,
+        date_to=None,
+        animals=(),
+        itersize: int = 10000,
+    ):
+        """
+        ``export_records`` for several farms at once. Every farm is exported
+        concurrently to a file of its own, with a leading "farm" column, and
+        the files of the farms that succeeded are then joined into ``path``.
+        """
+
+        from concurrent.futures import ThreadPoolExecutor
+        from psycopg2 import sql  # type: ignore
+        from db_cli.parallel import merge_slices, scratch_parts
+        from db_cli.queries import RECORD_FIELDS, record_filters, records_from
+
+        errors = {}
+
+        to_stdout = path == "-"
+
+        start = time.perf_counter()
+
+        try:
+            clients = self.farm_clients(farms)
+
+            where, params = record_filters(date_from, date_to, animals)
+
+            query = sql.SQL("SELECT %s AS farm, r.* FROM ({}) AS r").format(
+                records_from(table, where)
+            )
+
+            def export(farm, part):
+                pool, conn = clients[farm]._read_conn()
+
+                try:
+                    cur = conn.cursor()
+
+                    bound = cur.mogrify(query, [farm, *params]).decode()
+
+                    cur.close()
+
+                    with open_output(part, compress) as stream:
+                        return export_query(
+                            conn, bound, fmt, stream, header=False, itersize=itersize
+                        )
+
+                finally:
+                    pool.putconn(conn)
+
+            with scratch_parts(path, len(clients)) as paths:
+                with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+                    futures = {
+                        farm: executor.submit(export, farm, part)
+                        for farm, part in zip(clients, paths)
+                    }
+
+                parts = []
+                counts = {}
+
+                for (farm, future), part in zip(futures.items(), paths):
+                    try:
+                        counts[farm] = future.result()
+
+                        parts.append(part)
+
+                    except Exception as error:
+                        errors[farm] = error
+
+                if counts:
+                    merge_slices(
+                        parts,
+                        path,
+                        header_line(fmt, ("farm", *RECORD_FIELDS)),
+                        compress,
+                    )
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{sum(counts.values())} records exported from table '{table}' of {len(counts)} of {len(clients)} farms in {elapsed:.2f}s.\n",
+                    fg="yellow" if errors else "green",
+                    bold=True,
+                ),
+                err=to_stdout,
+            )
+
+            for farm, count in counts.items():
+                click.echo(
+                    click.style(f"{farm}: {count} records", fg="green"),
+                    err=to_stdout,
+                )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True), err=to_stdout)
+
+        for farm, error in errors.items():
+            click.echo(
+                click.style(f"{farm}: {str(error).strip()}", fg="red", bold=True),
+                err=to_stdout,
+            )
+
+        return
+
+    def index_advice(self, min_rows: int):
+        from db_cli.queries import SEQ_SCAN_TABLES, UNUSED_INDEXES
+
+        conn = None
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            cur.execute(SEQ_SCAN_TABLES, (min_rows,))
+
+            tables = cur.fetchall()
+
+            cur.execute(UNUSED_INDEXES)
+
+            indexes = cur.fetchall()
+
+            cur.close()
+
+            if tables:
+                click.echo(
+                    click.style(
+                        "\nTables read mostly by sequential scans (consider an index on the filtered columns):\n",
+                        fg="yellow",
+                        bold=True,
+                        underline=True,
+                    )
+                )
+
+                for table, seq_scan, seq_tup_read, idx_scan, live_rows in tables:
+                    click.echo(
+                        click.style(
+                            f"{table} | rows: {live_rows} | seq scans: {seq_scan} | rows read by seq scans: {seq_tup_read} | index scans: {idx_scan}\n",
+                            fg="yellow",
+                            bold=True,
+                        )
+                    )
+
+            if indexes:
+                click.echo(
+                    click.style(
+                        "\nIndexes never used since statistics were last reset (consider dropping them):\n",
+                        fg="yellow",
+                        bold=True,
+                        underline=True,
+                    )
+                )
+
+                for table, index, size in indexes:
+                    click.echo(
+                        click.style(
+                            f"{index} on {table} | size: {size}\n",
+                            fg="yellow",
+                            bold=True,
+                        )
+                    )
+
+            if not tables and not indexes:
+                click.echo(
+                    click.style(
+                        "\nNo seq-scan heavy tables or unused indexes found.\n",
+                        fg="green",
+                        bold=True,
+                    )
+                )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def partitions(self, table: str, detach_before=None, drop_before=None):
+        from psycopg2 import sql  # type: ignore
+        from db_cli.partitions import LIST_PARTITIONS, next_month, partition_month
+
+        conn = None
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            cur.execute(LIST_PARTITIONS, (table,))
+
+            partitions = cur.fetchall()
+
+            before = drop_before or detach_before
+
+            if before is not None:
+                # Only whole months that end on or before the cut-off qualify.
+                old = [
+                    name
+                    for name, *_ in partitions
+                    if partition_month(table, name) is not None
+                    and next_month(partition_month(table, name)) <= before
+                ]
+
+                for name in old:
+                    if drop_before is not None:
+                        statement = sql.SQL("DROP TABLE {}").format(
+                            sql.Identifier(name)
+                        )
+
+                    else:
+                        statement = sql.SQL(
+                            "ALTER TABLE {} DETACH PARTITION {}"
+                        ).format(sql.Identifier(table), sql.Identifier(name))
+
+                    cur.execute(statement)
+
+                conn.commit()
+
+                self._schema_changed()
+
+                action = "dropped" if drop_before is not None else "detached"
+
+                click.echo(
+                    click.style(
+                        f"\n{len(old)} partitions of table '{table}' have been {action}.\n",
+                        fg="green",
+                        bold=True,
+                    )
+                )
+
+                cur.execute(LIST_PARTITIONS, (table,))
+
+                partitions = cur.fetchall()
+
+            if partitions:
+                click.echo(
+                    click.style(
+                        f"\nPartitions of table '{table}':\n",
+                        fg="cyan",
+                        bold=True,
+                        underline=True,
+                    )
+                )
+
+                for count, (name, bounds, rows, size) in enumerate(partitions, start=1):
+                    click.echo(
+                        click.style(
+                            f"{count}. {name} | {bounds} | rows: ~{max(rows, 0)} | size: {size}\n",
+                            fg="cyan",
+                            bold=True,
+                        )
+                    )
+
+            else:
+                click.echo(
+                    click.style(
+                        f"\nTable '{table}' has no partitions.\n",
+                        fg="yellow",
+                        bold=True,
+                    )
+                )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def seed(
+        self,
+        table: str,
+        cows: int,
+        start,
+        days: int,
+        yields: dict,
+        unit: str,
+        seed: int | None,
+        batch_size: int,
+    ):
+        from db_cli.seed import herd_batches
+
+        conn = None
+        seeded = 0
+
+        start_time = time.perf_counter()
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            batches = herd_batches(cows, start, days, yields, unit, seed, batch_size)
+
+            for count, _ in self._copy_in(conn, cur, table, batches):
+                seeded += count
+
+            elapsed = time.perf_counter() - start_time
+
+            click.echo(
+                click.style(
+                    f"\n{seeded} records for {cows} cows over {days} days seeded into table '{table}' in {elapsed:.2f}s ({seeded / max(elapsed, 1e-9):.0f} rows/s).\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+            click.echo(
+                click.style(
+                    f"\n{seeded} records were committed before seeding stopped.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        return
+
+    def parallel_export(
+        self,
+        path: str,
+        fmt: str,
+        table: str,
+        workers: int,
+        split_by: str = "id",
+        split_files: bool = False,
+        compress: bool = False,
+        date_from=None,
+        date_to=None,
+        animals=(),
+        itersize: int = 10000,
+    ):
+        from datetime import timedelta
+        from psycopg2 import sql  # type: ignore
+        from db_cli.queries import RECORD_FIELDS, record_filters, records_from
+        from db_cli.parallel import (
+            merge_slices,
+            run_slices,
+            scratch_parts,
+            slice_bounds,
+            slice_path,
+        )
+
+        conn = None
+
+        to_stdout = path == "-"
+
+        start = time.perf_counter()
+
+        try:
+            pool, conn = self._read_conn()
+
+            cur = conn.cursor()
+
+            # The snapshot stays valid only while this transaction is open,
+            # so it is kept open until every worker has finished.
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cur.execute("SELECT pg_export_snapshot()")
+
+            snapshot = cur.fetchone()[0]
+
+            where, params = record_filters(date_from, date_to, animals)
+
+            column = sql.Identifier("id" if split_by == "id" else "production_date")
+
+            cur.execute(
+                sql.SQL("SELECT min({column}), max({column}) FROM {table}").format(
+                    column=column, table=sql.Identifier(table)
+                )
+                + where,
+                params,
+            )
+
+            low, high = cur.fetchone()
+
+            if low is None:
+                bounds = []
+
+            elif split_by == "id":
+                bounds = slice_bounds(low, high, workers)
+
+            else:
+                bounds = slice_bounds(low, high, workers, timedelta(days=1))
+
+            queries = []
+
+            for lower, upper in bounds:
+                query = records_from(
+                    table,
+                    where
+                    + sql.SQL(" AND " if params else " WHERE ")
+                    + sql.SQL("{column} >= %s AND {column} < %s").format(column=column),
+                )
+
+                queries.append(cur.mogrify(query, params + [lower, upper]).decode())
+
+            def jobs(paths):
+                # Slices merged into one file get its header from merge_slices.
+                return [
+                    (query, fmt, slice_file, compress, split_files, itersize)
+                    for query, slice_file in zip(queries, paths)
+                ]
+
+            if split_files:
+                paths = [
+                    slice_path(path, index) for index in range(1, len(queries) + 1)
+                ]
+
+                counts = run_slices(pool.params, snapshot, jobs(paths), workers)
+
+            else:
+                with scratch_parts(path, len(queries)) as paths:
+                    counts = run_slices(pool.params, snapshot, jobs(paths), workers)
+
+                    merge_slices(paths, path, header_line(fmt, RECORD_FIELDS), compress)
+
+            cur.close()
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{sum(counts)} records exported from table '{table}' in {len(queries)} slices by {workers} workers in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
+                ),
+                err=to_stdout,
+            )
+
+            if split_files:
+                for slice_file, count in zip(paths, counts):
+                    click.echo(
+                        click.style(f"{slice_file}: {count} records", fg="green"),
+                        err=to_stdout,
+                    )
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True), err=to_stdout)
+
+        finally:
+            if conn is not None:
+                pool.putconn(conn)
+
+        return
+
+    def sync(self, batch_size: int):
+        import psycopg2  # type: ignore
+        from db_cli.journal import APPLIED_TABLE, JournalError, replay_params
+
+        conn = None
+
+        applied = 0
+        skipped = 0
+        rejected = []
+
+        start = time.perf_counter()
+
+        try:
+            conn = self.pool.getconn()
+
+            cur = conn.cursor()
+
+            cur.execute(APPLIED_TABLE)
+
+            conn.commit()
+
+            self._tables_added()
+
+            for entries, offset in self.journal.pending(batch_size):
+                batch = []
+                rejects = []
+
+                for entry in entries:
+                    try:
+                        batch.append((entry, replay_params(entry)))
+
+                    except JournalError as error:
+                        rejects.append((entry, error))
+
+                dates = {}
+
+                for entry, params in batch:
+                    if entry["op"] == "create":
+                        dates.setdefault(entry["table"], set()).add(params[-1])
+
+                    elif entry["column"] == "production_date":
+                        dates.setdefault(entry["table"], set()).add(params[0])
+
+                for table, table_dates in dates.items():
+                    self._ensure_partitions(conn, cur, table, table_dates)
+
+                ids = self._animal_ids(
+                    conn,
+                    cur,
+                    [params[0] for entry, params in batch if entry["op"] == "create"],
+                )
+
+                renamed = False
+
+                tables = set()
+
+                # Each entry's key is recorded in the same transaction as its
+                # write, so a replayed entry is recognised and skipped. An
+                # entry the database refuses is undone on its own and set aside.
+                for entry, params in batch:
+                    cur.execute("SAVEPOINT journal_entry")
+
+                    try:
+                        written = self._replay(conn, cur, entry, params, ids)
+
+                    except psycopg2.Error as error:
+                        cur.execute("ROLLBACK TO SAVEPOINT journal_entry")
+
+                        rejects.append((entry, error))
+
+                        continue
+
+                    cur.execute("RELEASE SAVEPOINT journal_entry")
+
+                    if not written:
+                        skipped += 1
+
+                        continue
+
+                    if entry["op"] == "update" and entry["column"] == "animal":
+                        renamed = True
+
+                    tables.add(entry["table"])
+                    applied += 1
+
+                conn.commit()
+
+                # Set aside before moving past them, so a crash in between
+                # only means they are retried.
+                if rejects:
+                    self.journal.reject(rejects)
+
+                    rejected.extend(rejects)
+
+                self.journal.advance(offset)
+
+                if renamed:
+                    self._renamed()
+
+                for table in tables:
+                    self._invalidate(table)
+
+            self.journal.compact()
+
+            elapsed = time.perf_counter() - start
+
+            click.echo(
+                click.style(
+                    f"\n{applied} journal entries synced to the database ({skipped} already applied) in {elapsed:.2f}s.\n",
+                    fg="green",
+                    bold=True,
+                )
+            )
+
+            cur.close()
+
+        except Exception as error:
+            click.echo(click.style(f"{error}", fg="red", bold=True))
+
+            click.echo(
+                click.style(
+                    f"\n{applied} journal entries were synced before the error, run sync again to retry the rest.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+        finally:
+            if conn is not None:
+                self.pool.putconn(conn)
+
+        if rejected:
+            click.echo(
+                click.style(
+                    f"{len(rejected)} journal entries could not be applied and were moved to {self.journal.rejects_path}:",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+            for entry, error in rejected:
+                click.echo(
+                    click.style(
+                        f"{entry.get('key')}: {str(error).strip()}", fg="yellow"
+                    )
+                )
+
+            click.echo()
+
+        return
+
+    def _replay(self, conn, cur, entry: dict, params: tuple, ids: dict) -> bool:
+        """Apply one journal entry, or return False if it was applied before."""
+
+        from db_cli.journal import MARK_APPLIED
+        from db_cli.queries import RENAME_ANIMAL
+
+        cur.execute(MARK_APPLIED, (entry["key"],))
+
+        if cur.rowcount == 0:
+            return False
+
+        table = entry["table"]
+
+        if entry["op"] == "create":
+            self._execute_prepared(
+                conn,
+                cur,
+                *insert_statement(table, entry.get("on_conflict", "error")),
+                (ids[params[0]], *params[1:]),
+                table,
+            )
+
+        elif entry["column"] == "animal":
+            self._execute_prepared(
+                conn,
+                cur,
+                f"rename_animal_{table}",
+                RENAME_ANIMAL,
+                params,
+                table,
+            )
+
+        else:
+            column = entry["column"]
+
+            self._execute_prepared(
+                conn,
+                cur,
+                f"sync_{column}_{table}",
+                f"UPDATE {{}} SET {column} = $1 WHERE id = $2",
+                params,
+                table,
+            )
+
+        return True
+
+    def replica_status(self):
+        if self.router is None:
+            click.echo(
+                click.style(
+                    f"\nNo [{REPLICA_PREFIX.format(self.section)}*] sections found in the {self.path} file, reads go to the primary.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+            return
+
+        click.echo(
+            click.style(
+                f"\nReplicas ({self.router.strategy}, max lag: {self.router.max_lag:g}s):\n",
+                fg="cyan",
+                bold=True,
+                underline=True,
+            )
+        )
+
+        for replica in self.router.replicas:
+            conn = None
+
+            try:
+                conn = replica.pool.getconn()
+
+                self.router.check(replica, conn)
+
+                if self.router.within_lag(replica):
+                    state = click.style("serving reads", fg="green", bold=True)
+
+                else:
+                    state = click.style("too far behind", fg="yellow", bold=True)
+
+                lag = "unknown" if replica.lag is None else f"{replica.lag:.1f}s"
+
+                click.echo(
+                    f"{replica.name}: {state} | lag: {lag} | latency: {replica.latency * 1000:.1f}ms"
+                )
+
+            except Exception as error:
+                click.echo(
+                    f"{replica.name}: "
+                    + click.style(
+                        f"unreachable ({str(error).strip()})", fg="red", bold=True
+                    )
+                )
+
+            finally:
+                if conn is not None:
+                    replica.pool.putconn(conn)
+
+        click.echo()
+
+        return
+
+    def cache_stats(self, clear: bool = False, reset: bool = False):
+        if self.cache is None:
+            click.echo(
+                click.style(
+                    "\nThe result cache is disabled, add a [cache] section to database.ini to enable it.\n",
+                    fg="yellow",
+                    bold=True,
+                )
+            )
+
+            return
+
+        stats = self.cache.stats()
+
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups * 100 if lookups else 0.0
+
+        click.echo(
+            click.style(f"\nResult cache '{self.cache.path}':\n", fg="cyan", bold=True)
+        )
+
+        click.echo(
+            click.style(
+                f"hits: {stats['hits']} | misses: {stats['misses']} | hit ratio: {ratio:.1f}%\n"
+                f"entries: {stats['entries']} / {self.cache.max_entries} | size: {stats['bytes']} / {self.cache.max_bytes} bytes | ttl: {self.cache.ttl:g}s\n",
+                fg="cyan",
+                bold=True,
+            )
+        )
+
+        if clear:
+            self.cache.clear()
+
+            click.echo(
+                click.style(
+                    "The result cache has been cleared.\n", fg="green", bold=True
+                )
+            )
+
+        if reset:
+            self.cache.reset_stats()
+
+            click.echo(
+                click.style(
+                    "The cache counters have been reset.\n", fg="green", bold=True
+                )
+            )
+
+        return
+
+
+def insert_statement(table: str, on_conflict: str) -> tuple:
+    """Name and text of the prepared INSERT of one record in ``on_conflict`` mode."""
+
+    if on_conflict == "error":
+        return f"insert_{table}", INSERT_RECORD
+
+    from db_cli.queries import conflict_clause
+
+    return (
+        f"insert_{table}_{on_conflict}",
+        INSERT_RECORD + conflict_clause(on_conflict) + " RETURNING (xmax = 0)",
+    )
+
+
+def report_value(value):
+    # Report sums and averages come back as Decimal, which json cannot encode.
+    if isinstance(value, Decimal):
+        return float(value)
+
+    return str(value)
+
+
+def write_report(rows: list, fmt: str, title: str, empty: str, herd=None):
+    """
+    Print ``report`` rows as a table, CSV or JSON. With ``herd`` totals
+    (several farms), rows carry a "farm" column and the totals follow them.
+    """
+
+    from db_cli.queries import REPORT_COLUMNS
+
+    if fmt == "csv":
+        writer = csv.DictWriter(
+            sys.stdout,
+            fieldnames=REPORT_COLUMNS if herd is None else ("farm", *REPORT_COLUMNS),
+            extrasaction="ignore",
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+
+        if herd is not None:
+            writer.writerows({**row, "animal": ""} for row in herd)
+
+    elif fmt == "json":
+        document = rows if herd is None else {"farms": rows, "herd": herd}
+
+        click.echo(json.dumps(document, default=report_value, indent=2))
+
+    elif rows:
+        click.echo(click.style(title, fg="cyan", bold=True, underline=True))
+
+        for row in rows:
+            farm = f"{row['farm']} | " if herd is not None else ""
+
+            click.echo(
+                click.style(
+                    f"{farm}{row['period']} | cow: {row['animal']} | days: {row['days']} | total: {row['total']} {row['unit']} | average: {row['average']} {row['unit']}",
+                    fg="cyan",
+                    bold=True,
+                )
+            )
+
+        if herd:
+            click.echo(
+                click.style("\nHerd totals:\n", fg="cyan", bold=True, underline=True)
+            )
+
+            for row in herd:
+                click.echo(
+                    click.style(
+                        f"{row['period']} | farms: {row['farms']} | cows: {row['cows']} | days: {row['days']} | total: {row['total']} {row['unit']} | average: {row['average']} {row['unit']}",
+                        fg="green",
+                        bold=True,
+                    )
+                )
+
+        click.echo()
+
+    else:
+        click.echo(click.style(empty, fg="yellow", bold=True))
+
+
+CONFIG_PATH = "database.ini"
+
+_db = None
+
+
+def get_db() -> PostgresConnect:
+    """Parse the configuration on first use and return the shared client."""
+
+    global _db
+
+    if _db is None:
+        try:
+            _db = PostgresConnect(CONFIG_PATH)
+
+        except Exception as error:
+            raise click.ClickException(str(error))
+
+    return _db
+
+
+def __getattr__(name: str):
+    # ``my_db`` used to be created at import time; keep it importable.
+    if name == "my_db":
+        return get_db()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def format_options(command):
+    """The output options shared by the view commands."""
+
+    command = click.option(
+        "--no-color",
+        "color",
+        is_flag=True,
+        flag_value=False,
+        default=True,
+        help="This prints plain, unstyled output (faster for large results).",
+    )(command)
+
+    return click.option(
+        "--format",
+        "fmt",
+        type=click.Choice(["table", "csv", "tsv", "json", "jsonl"]),
+        default="table",
+        help="This represents the output format, default: table.",
+    )(command)
+
+
+@click.group()
+@click.option(
+    "--timings",
+    is_flag=True,
+    help="This prints a connect/execute/fetch/render time breakdown and row counts after the command.",
+)
+@click.option(
+    "--metrics-json",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="This appends the same measurements as a JSON line to the given file.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="This saves create-record and update-* to the local journal instead of the database (see sync).",
+)
+@click.option(
+    "--primary",
+    is_flag=True,
+    help="This sends reads to the primary even when replicas are configured, e.g. to see a write straight away.",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    timings: bool,
+    metrics_json: str | None,
+    offline: bool,
+    primary: bool,
+):
+    # Flags apply to one command only: inside the shell the client is shared,
+    # so it is reset to the configured behaviour on every invocation.
+    if offline or primary or _db is not None:
+        db = get_db()
+
+        db.offline = offline or db.offline_default
+        db.use_replicas = not primary
+
+    if timings or metrics_json:
+        from db_cli import metrics
+
+        recorder = metrics.start(ctx.invoked_subcommand)
+
+        ctx.call_on_close(lambda: metrics.finish(recorder, timings, metrics_json))
+
+
+@click.command()
+def check_connection():
+    get_db().check_connection()
+
+
+@click.command()
+@click.option(
+    "--path",
+    default=None,
+    help='This refers to a ".sql" file that can be used to create tales in the database, default: "tables.sql".',
+)
+@click.option(
+    "--partitioned",
+    is_flag=True,
+    help='This creates milk_production partitioned by month of production_date (default path: "tables_partitioned.sql").',
+)
+@click.option(
+    "--unique",
+    is_flag=True,
+    help="This adds a unique index on (animal, production_date), so each cow has at most one record per day.",
+)
+def create_tables(path: str | None, partitioned: bool, unique: bool):
+    if path is None:
+        path = "tables_partitioned.sql" if partitioned else "tables.sql"
+
+    get_db().create_tables(path, unique)
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This refers to database table that is meant to be deleted.",
+)
+def delete_tables(table: str):
+    get_db().delete_tables(table)
+
+
+@click.command()
+def view_tables():
+    get_db().view_tables()
+
+
+@click.command()
+@click.option(
+    "--animal",
+    prompt="name of cow",
+    help="This represents the name of the animal (cow).",
+)
+@click.option(
+    "--morning-production",
+    prompt="morning production",
+    help="This represents the amount (e.g. in Litres) produced by the cow in the morning.",
+)
+@click.option(
+    "--afternoon-production",
+    prompt="afternoon production",
+    help="This represents the amount (e.g. in Litres) produced by the cow in the afternoon.",
+)
+@click.option(
+    "--evening-production",
+    prompt="evening production",
+    help="This represents the amount (e.g. in Litres) produced by the cow in the evening.",
+)
+@click.option(
+    "--production-unit",
+    default="Litres",
+    help="This represents the unit of production, default: Litres.",
+)
+@click.option(
+    "--production-date",
+    prompt="date of production",
+    help='This represents the date of production (of milk by each cow), e.g. "2023-10-231"',
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(CONFLICT_MODES),
+    default="error",
+    help="This decides what happens when the cow already has a record for that date (needs create-tables --unique), default: error.",
+)
+def create_record(
+    animal: str,
+    morning_production: float,
+    afternoon_production: float,
+    evening_production: float,
+    production_unit: str,
+    production_date: str,
+    on_conflict: str,
+):
+    from pytz import timezone
+
+    my_timezone = timezone("Africa/Nairobi")
+
+    date = my_timezone.localize(datetime.strptime(production_date, "%Y-%m-%d"))
+
+    get_db().create_record(
+        animal,
+        morning_production,
+        afternoon_production,
+        evening_production,
+        production_unit,
+        date,
+        on_conflict,
+    )
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
+)
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=None,
+    help="This represents the maximum number of records to show (one page).",
+)
+@click.option(
+    "--after-id",
+    type=int,
+    default=None,
+    help="This represents the id of the last record of the previous page; only records after it are shown.",
+)
+@click.option(
+    "--order",
+    type=click.Choice(["asc", "desc"]),
+    default="asc",
+    help="This represents the order of the records by id, default: asc.",
+)
+@click.option(
+    "--from",
+    "date_from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the earliest production date to show, e.g. "2023-06-01".',
+)
+@click.option(
+    "--to",
+    "date_to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the latest production date to show, e.g. "2023-06-30".',
+)
+@click.option(
+    "--itersize",
+    type=click.IntRange(min=1),
+    default=2000,
+    help="This represents the number of records fetched from the server per round trip, default: 2000.",
+)
+@click.option(
+    "--farms",
+    default=None,
+    help='This queries the named farms ("a,b,c" or "all") concurrently instead of the [postgresql] database.',
+)
+@format_options
+def view_all_records(
+    table: str,
+    limit: int | None,
+    after_id: int | None,
+    order: str,
+    date_from,
+    date_to,
+    itersize: int,
+    farms: str | None,
+    fmt: str,
+    color: bool,
+):
+    if farms is not None:
+        if after_id is not None:
+            raise click.UsageError("--after-id cannot be used with --farms.")
+
+        get_db().farm_records(
+            farms,
+            table,
+            limit=limit,
+            order=order,
+            date_from=date_from.date() if date_from else None,
+            date_to=date_to.date() if date_to else None,
+            itersize=itersize,
+            fmt=fmt,
+            color=color,
+        )
+
+        return
+
+    get_db().view_all_records(
+        table,
+        limit=limit,
+        after_id=after_id,
+        order=order,
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None,
+        itersize=itersize,
+        fmt=fmt,
+        color=color,
+    )
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
+)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+@format_options
+def view_record(table: str, id: int, fmt: str, color: bool):
+    get_db().view_record(table, id, fmt, color)
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to delete records from.",
+)
+@click.option(
+    "--ids",
+    default=None,
+    help='This represents the ids of the records to delete, e.g. "1,2,3".',
+)
+@click.option(
+    "--ids-file",
+    type=click.File("r"),
+    default=None,
+    help="This represents a file of record ids to delete, separated by commas or whitespace.",
+)
+@click.option(
+    "--before",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This deletes records produced before this date, e.g. "2023-01-01".',
+)
+@click.option(
+    "--animal",
+    "animals",
+    multiple=True,
+    help="This deletes the records of this animal (cow), can be repeated.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="This represents the number of records deleted per transaction, default: 1000.",
+)
+@click.option(
+    "--sleep",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    help="This represents the pause in seconds between batches, to ease the load on the server and replicas, default: 0.",
+)
+@click.option(
+    "--yes",
+    is_flag=True,
+    help="This skips the confirmation prompt for --before and --animal.",
+)
+def delete_records(
+    table: str,
+    ids: str | None,
+    ids_file,
+    before,
+    animals: tuple,
+    batch_size: int,
+    sleep: float,
+    yes: bool,
+):
+    from db_cli.ingest import RecordError, parse_ids
+
+    by_id = ids is not None or ids_file is not None
+
+    if by_id and (before or animals):
+        raise click.UsageError("Use either --ids/--ids-file or --before/--animal.")
+
+    if not by_id and not (before or animals):
+        raise click.UsageError(
+            "Give the records to delete with --ids, --ids-file, --before or --animal."
+        )
+
+    if by_id:
+        try:
+            record_ids = parse_ids(ids or "")
+
+            if ids_file is not None:
+                record_ids += parse_ids(ids_file.read())
+
+        except RecordError as error:
+            raise click.BadParameter(str(error))
+
+        get_db().delete_records(
+            table, ids=record_ids, batch_size=batch_size, sleep=sleep
+        )
+
+        return
+
+    if not yes:
+        scope = " and ".join(
+            part
+            for part in (
+                f"produced before {before.date()}" if before else "",
+                f"of {', '.join(animals)}" if animals else "",
+            )
+            if part
+        )
+
+        click.confirm(f"Delete every record in '{table}' {scope}?", abort=True)
+
+    get_db().delete_records(
+        table,
+        before=before.date() if before else None,
+        animals=animals,
+        batch_size=batch_size,
+        sleep=sleep,
+    )
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
+)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+def delete_record(table: str, id: int):
+    get_db().delete_record(table, id)
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
+)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+@click.option(
+    "--name",
+    prompt="name of cow",
+    help="This represents the name of the animal (cow).",
+)
+def update_name(table: str, id: int, name: str):
+    get_db().update_name(table, id, name)
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
+)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+@click.option(
+    "--morning-production",
+    prompt="morning production",
+    help="This represents the amount (e.g. in Litres) produced by the cow in the morning.",
+)
+def update_morning(table: str, id: int, morning_production: float):
+    get_db().update_morning(table, id, morning_production)
+
+
+@click.command()
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
+)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+@click.option(
+    "--afternoon-production",
+    prompt="afternoon production",
+    help="This represents the amount (e.g. in Litres) produced by the cow in the afternoon.",
+)
+def update_noon(table: str, id: int, afternoon_production: float):
+    get_db().update_noon(table, id, afternoon_production)
 
 
 @click.command()
 @click.option(
-    "--path",
-    default="tables.sql",
-    help='This refers to a ".sql" file that can be used to create tales in the database.',
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to query.",
 )
-def create_tables(path: str):
-    my_db.create_tables(path)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+@click.option(
+    "--evening-production",
+    prompt="evening production",
+    help="This represents the amount (e.g. in Litres) produced by the cow in the evening.",
+)
+def update_evening(table: str, id: int, evening_production: float):
+    get_db().update_evening(table, id, evening_production)
 
 
 @click.command()
 @click.option(
     "--table",
     default="milk_production",
-    help="This refers to database table that is meant to be deleted.",
+    help="This represents the name of the database table to query.",
 )
-def delete_tables(table: str):
-    my_db.delete_tables(table)
+@click.option(
+    "--id",
+    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+)
+@click.option(
+    "--production-date",
+    prompt="date of production",
+    help='This represents the date of production (of milk by each cow), e.g. "2023-10-231"',
+)
+def update_date(table: str, id: int, production_date: str):
+    from pytz import timezone
+
+    my_timezone = timezone("Africa/Nairobi")
+
+    date = my_timezone.localize(datetime.strptime(production_date, "%Y-%m-%d"))
+
+    get_db().update_date(table, id, date)
 
 
 @click.command()
-def view_tables():
-    my_db.view_tables()
+@click.option(
+    "--file",
+    "file",
+    type=click.File("r"),
+    default="-",
+    help='This represents a CSV (with a header row) or JSONL file of records to import, default: "-" (stdin).',
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["auto", "csv", "jsonl"]),
+    default="auto",
+    help="This represents the format of the input file, default: detected from the file extension.",
+)
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to import into.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="This represents the number of rows copied and committed per batch, default: 10000.",
+)
+@click.option(
+    "--reject-file",
+    type=click.File("w"),
+    default=None,
+    help="This represents a JSONL file that invalid rows are written to, along with the reason.",
+)
+@click.option(
+    "--on-conflict",
+    type=click.Choice(CONFLICT_MODES),
+    default="error",
+    help="This decides what happens to a record whose animal and production date already exist (needs create-tables --unique), default: error.",
+)
+def import_records(
+    file, fmt: str, table: str, batch_size: int, reject_file, on_conflict: str
+):
+    if fmt == "auto":
+        fmt = detect_format(file.name)
+
+    get_db().import_records(file, fmt, table, batch_size, reject_file, on_conflict)
 
 
 @click.command()
+@click.option(
+    "--file",
+    "path",
+    default="-",
+    help='This represents the file the records are written to, default: "-" (stdout).',
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(EXPORT_FORMATS),
+    default="csv",
+    help="This represents the output format, default: csv.",
+)
+@click.option(
+    "--gzip",
+    "compress",
+    is_flag=True,
+    help='This compresses the output with gzip (implied by a ".gz" file name).',
+)
+@click.option(
+    "--table",
+    default="milk_production",
+    help="This represents the name of the database table to export.",
+)
+@click.option(
+    "--from",
+    "date_from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the earliest production date to export, e.g. "2023-06-01".',
+)
+@click.option(
+    "--to",
+    "date_to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the latest production date to export, e.g. "2023-06-30".',
+)
 @click.option(
     "--animal",
-    prompt="name of cow",
-    help="This represents the name of the animal (cow).",
+    "animals",
+    multiple=True,
+    help="This represents the name of an animal (cow) to export, can be repeated.",
 )
 @click.option(
-    "--morning-production",
-    prompt="morning production",
-    help="This represents the amount (e.g. in Litres) produced by the cow in the morning.",
+    "--itersize",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="This represents the number of rows fetched per round trip for jsonl output, default: 10000.",
 )
 @click.option(
-    "--afternoon-production",
-    prompt="afternoon production",
-    help="This represents the amount (e.g. in Litres) produced by the cow in the afternoon.",
+    "--parallel",
+    type=click.IntRange(min=1),
+    default=1,
+    help="This represents the number of worker processes, each exporting one slice of the table, default: 1.",
 )
 @click.option(
-    "--evening-production",
-    prompt="evening production",
-    help="This represents the amount (e.g. in Litres) produced by the cow in the evening.",
+    "--split-by",
+    type=click.Choice(["id", "date"]),
+    default="id",
+    help="This represents the column the table is sliced on for --parallel, default: id.",
 )
 @click.option(
-    "--production-unit",
-    default="Litres",
-    help="This represents the unit of production, default: Litres.",
+    "--split-files",
+    is_flag=True,
+    help='This writes one file per slice (e.g. "out.part01.csv") instead of merging them.',
 )
 @click.option(
-    "--production-date",
-    prompt="date of production",
-    help='This represents the date of production (of milk by each cow), e.g. "2023-10-231"',
+    "--farms",
+    default=None,
+    help='This queries the named farms ("a,b,c" or "all") concurrently instead of the [postgresql] database.',
 )
-def create_record(
-    animal: str,
-    morning_production: float,
-    afternoon_production: float,
-    evening_production: float,
-    production_unit: str,
-    production_date: str,
+def export_records(
+    path: str,
+    fmt: str,
+    compress: bool,
+    table: str,
+    date_from,
+    date_to,
+    animals: tuple,
+    itersize: int,
+    parallel: int,
+    split_by: str,
+    split_files: bool,
+    farms: str | None,
 ):
-    my_timezone = timezone("Africa/Nairobi")
+    options = dict(
+        compress=compress or path.endswith(".gz"),
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None,
+        animals=animals,
+        itersize=itersize,
+    )
 
-    date = my_timezone.localize(datetime.strptime(production_date, "%Y-%m-%d"))
+    if farms is not None:
+        if parallel != 1 or split_files:
+            raise click.UsageError(
+                "--parallel and --split-files cannot be used with --farms."
+            )
 
-    my_db.create_record(
-        animal,
-        morning_production,
-        afternoon_production,
-        evening_production,
-        production_unit,
-        date,
+        get_db().farm_export(farms, path, fmt, table, **options)
+
+        return
+
+    if parallel == 1 and not split_files:
+        get_db().export_records(path, fmt, table, **options)
+
+        return
+
+    if split_files and path == "-":
+        raise click.UsageError("--split-files needs a file name given with --file.")
+
+    get_db().parallel_export(
+        path,
+        fmt,
+        table,
+        parallel,
+        split_by=split_by,
+        split_files=split_files,
+        **options,
     )
 
 
 @click.command()
+@click.option(
+    "--file",
+    "file",
+    type=click.File("r"),
+    default="-",
+    help='This represents a CSV (header: id,field,value) or JSONL file of changes, default: "-" (stdin).',
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["auto", "csv", "jsonl"]),
+    default="auto",
+    help="This represents the format of the changes file, default: detected from the file extension.",
+)
 @click.option(
     "--table",
     default="milk_production",
-    help="This represents the name of the database table to query.",
+    help="This represents the name of the database table to update.",
 )
-def view_all_records(table: str):
-    my_db.view_all_records(table)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="This represents the number of rows updated per statement, default: 1000.",
+)
+def apply_updates(file, fmt: str, table: str, batch_size: int):
+    if fmt == "auto":
+        fmt = detect_format(file.name)
+
+    get_db().apply_updates(file, fmt, table, batch_size)
 
 
 @click.command()
@@ -622,135 +3892,425 @@ def view_all_records(table: str):
     help="This represents the name of the database table to query.",
 )
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--period",
+    type=click.Choice(["day", "week", "month", "year"]),
+    default="month",
+    help="This represents the period production is totalled over, default: month.",
+)
+@click.option(
+    "--from",
+    "date_from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the earliest production date to include, e.g. "2023-01-01".',
+)
+@click.option(
+    "--to",
+    "date_to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the latest production date to include, e.g. "2023-12-31".',
+)
+@click.option(
+    "--animal",
+    "animals",
+    multiple=True,
+    help="This represents the name of an animal (cow) to include, can be repeated.",
+)
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["table", "csv", "json"]),
+    default="table",
+    help="This represents the output format, default: table.",
+)
+@click.option(
+    "--farms",
+    default=None,
+    help='This queries the named farms ("a,b,c" or "all") concurrently instead of the [postgresql] database.',
+)
+def report(
+    table: str,
+    period: str,
+    date_from,
+    date_to,
+    animals: tuple,
+    fmt: str,
+    farms: str | None,
+):
+    if farms is not None:
+        get_db().farm_report(
+            farms,
+            table,
+            period,
+            fmt,
+            date_from=date_from.date() if date_from else None,
+            date_to=date_to.date() if date_to else None,
+            animals=animals,
+        )
+
+        return
+
+    get_db().report(
+        table,
+        period,
+        fmt,
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None,
+        animals=animals,
+    )
+
+
+@click.command()
+@click.option(
+    "--min-rows",
+    type=click.IntRange(min=0),
+    default=10000,
+    help="This represents the smallest table (in live rows) worth reporting for sequential scans, default: 10000.",
 )
-def view_record(table: str, id: int):
-    my_db.view_record(table, id)
+def index_advice(min_rows: int):
+    get_db().index_advice(min_rows)
 
 
 @click.command()
 @click.option(
     "--table",
     default="milk_production",
-    help="This represents the name of the database table to query.",
+    help="This represents the name of the database table to archive records from.",
 )
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--older-than",
+    type=click.IntRange(min=0),
+    default=None,
+    help="This archives records produced more than this many days ago.",
 )
-def delete_record(table: str, id: int):
-    my_db.delete_record(table, id)
+@click.option(
+    "--before",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This archives records produced before this date, e.g. "2022-01-01".',
+)
+@click.option(
+    "--dir",
+    "directory",
+    default=None,
+    help='This represents the directory the monthly ".csv.gz" archive files are written to.',
+)
+@click.option(
+    "--to-table",
+    is_flag=True,
+    help="This moves the records into the <table>_archive table.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="This represents the number of records moved per transaction, default: 10000.",
+)
+@click.option(
+    "--sleep",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    help="This represents the pause in seconds between batches, default: 0.",
+)
+def archive(
+    table: str,
+    older_than: int | None,
+    before,
+    directory: str | None,
+    to_table: bool,
+    batch_size: int,
+    sleep: float,
+):
+    from datetime import date, timedelta
+
+    if (older_than is None) == (before is None):
+        raise click.UsageError(
+            "Give the retention window with either --older-than or --before."
+        )
+
+    if directory is None and not to_table:
+        raise click.UsageError("Give a destination with --dir and/or --to-table.")
+
+    cutoff = before.date() if before else date.today() - timedelta(days=older_than)
+
+    get_db().archive(table, cutoff, directory, to_table, batch_size, sleep)
 
 
 @click.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True, dir_okay=False))
 @click.option(
     "--table",
     default="milk_production",
-    help="This represents the name of the database table to query.",
+    help="This represents the name of the database table to restore records into.",
 )
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--from-table",
+    is_flag=True,
+    help="This moves records back from the <table>_archive table.",
 )
 @click.option(
-    "--name",
-    prompt="name of cow",
-    help="This represents the name of the animal (cow).",
+    "--from",
+    "date_from",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the earliest production date restored with --from-table, e.g. "2022-01-01".',
 )
-def update_name(table: str, id: int, name: str):
-    my_db.update_name(table, id, name)
+@click.option(
+    "--to",
+    "date_to",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This represents the latest production date restored with --from-table, e.g. "2022-12-31".',
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=10000,
+    help="This represents the number of records moved back per transaction with --from-table, default: 10000.",
+)
+def restore(
+    paths: tuple, table: str, from_table: bool, date_from, date_to, batch_size: int
+):
+    if not paths and not from_table:
+        raise click.UsageError("Give archive files to restore and/or --from-table.")
+
+    get_db().restore(
+        table,
+        paths,
+        from_table,
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None,
+        batch_size=batch_size,
+    )
 
 
 @click.command()
 @click.option(
     "--table",
     default="milk_production",
-    help="This represents the name of the database table to query.",
+    help="This represents the name of the partitioned database table.",
 )
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--detach-before",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This detaches (but keeps) monthly partitions that end on or before this date, e.g. "2022-01-01".',
 )
 @click.option(
-    "--morning-production",
-    prompt="morning production",
-    help="This represents the amount (e.g. in Litres) produced by the cow in the morning.",
+    "--drop-before",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help='This drops monthly partitions that end on or before this date, e.g. "2022-01-01".',
 )
-def update_morning(table: str, id: int, morning_production: float):
-    my_db.update_morning(table, id, morning_production)
+def partitions(table: str, detach_before, drop_before):
+    if detach_before and drop_before:
+        raise click.UsageError("Use either --detach-before or --drop-before, not both.")
+
+    if drop_before:
+        click.confirm(
+            f"Drop every partition of '{table}' before {drop_before.date()}?",
+            abort=True,
+        )
+
+    get_db().partitions(
+        table,
+        detach_before=detach_before.date() if detach_before else None,
+        drop_before=drop_before.date() if drop_before else None,
+    )
 
 
 @click.command()
 @click.option(
     "--table",
     default="milk_production",
-    help="This represents the name of the database table to query.",
+    help="This represents the name of the database table to fill.",
 )
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--cows",
+    type=click.IntRange(min=1),
+    default=100,
+    help="This represents the number of cows in the generated herd, default: 100.",
 )
 @click.option(
-    "--afternoon-production",
-    prompt="afternoon production",
-    help="This represents the amount (e.g. in Litres) produced by the cow in the afternoon.",
+    "--start",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default="2023-01-01",
+    help='This represents the first production date, default: "2023-01-01".',
 )
-def update_noon(table: str, id: int, afternoon_production: float):
-    my_db.update_noon(table, id, afternoon_production)
+@click.option(
+    "--days",
+    type=click.IntRange(min=1),
+    default=365,
+    help="This represents the number of consecutive days of production, default: 365.",
+)
+@click.option(
+    "--morning",
+    type=(float, float),
+    default=(8.0, 1.5),
+    help="This represents the mean and standard deviation of morning yields, default: 8.0 1.5.",
+)
+@click.option(
+    "--afternoon",
+    type=(float, float),
+    default=(6.0, 1.2),
+    help="This represents the mean and standard deviation of afternoon yields, default: 6.0 1.2.",
+)
+@click.option(
+    "--evening",
+    type=(float, float),
+    default=(7.0, 1.4),
+    help="This represents the mean and standard deviation of evening yields, default: 7.0 1.4.",
+)
+@click.option(
+    "--production-unit",
+    default="Litres",
+    help="This represents the unit of production, default: Litres.",
+)
+@click.option(
+    "--seed",
+    "seed",
+    type=int,
+    default=None,
+    help="This represents the random seed; the same seed always generates the same herd.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=50000,
+    help="This represents the number of rows copied and committed per batch, default: 50000.",
+)
+def seed(
+    table: str,
+    cows: int,
+    start,
+    days: int,
+    morning: tuple,
+    afternoon: tuple,
+    evening: tuple,
+    production_unit: str,
+    seed: int | None,
+    batch_size: int,
+):
+    get_db().seed(
+        table,
+        cows,
+        start.date(),
+        days,
+        {"morning": morning, "afternoon": afternoon, "evening": evening},
+        production_unit,
+        seed,
+        batch_size,
+    )
 
 
 @click.command()
 @click.option(
-    "--table",
-    default="milk_production",
-    help="This represents the name of the database table to query.",
+    "--path",
+    "directory",
+    default="migrations",
+    help='This represents the directory of numbered ".sql" migrations, default: "migrations".',
 )
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--target",
+    type=int,
+    default=None,
+    help="This represents the last migration version to apply, default: all.",
 )
 @click.option(
-    "--evening-production",
-    prompt="evening production",
-    help="This represents the amount (e.g. in Litres) produced by the cow in the evening.",
+    "--dry-run",
+    is_flag=True,
+    help="This lists the pending migrations and their steps without applying them.",
 )
-def update_evening(table: str, id: int, evening_production: float):
-    my_db.update_evening(table, id, evening_production)
+@click.option(
+    "--lock-timeout",
+    default="5s",
+    help='This represents how long a step may wait for a lock before giving up, default: "5s".',
+)
+@click.option(
+    "--statement-timeout",
+    default="0",
+    help='This represents the longest a single step may run, default: "0" (no limit).',
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=3,
+    help="This represents how often a migration is retried after a lock timeout, default: 3.",
+)
+def migrate(
+    directory: str,
+    target: int | None,
+    dry_run: bool,
+    lock_timeout: str,
+    statement_timeout: str,
+    retries: int,
+):
+    get_db().migrate(
+        directory, target, dry_run, lock_timeout, statement_timeout, retries
+    )
 
 
 @click.command()
 @click.option(
-    "--table",
-    default="milk_production",
-    help="This represents the name of the database table to query.",
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=500,
+    help="This represents the number of journal entries written per transaction, default: 500.",
+)
+def sync(batch_size: int):
+    get_db().sync(batch_size)
+
+
+@click.command()
+def replicas():
+    get_db().replica_status()
+
+
+@click.command()
+@click.option("--clear", is_flag=True, help="This empties the result cache.")
+@click.option(
+    "--reset", is_flag=True, help="This resets the cache hit and miss counters."
 )
+def cache_stats(clear: bool, reset: bool):
+    get_db().cache_stats(clear, reset)
+
+
+@click.command()
 @click.option(
-    "--id",
-    help="This represents the id (a unique identifier) of a record in a table in the database to query.",
+    "--history-file",
+    default="~/.db_cli_history",
+    help="This represents the file the shell command history is kept in.",
 )
 @click.option(
-    "--production-date",
-    prompt="date of production",
-    help='This represents the date of production (of milk by each cow), e.g. "2023-10-231"',
+    "--timing/--no-timing",
+    default=True,
+    help="This shows how long each command took, default: on.",
 )
-def update_date(table: str, id: int, production_date: str):
-    my_timezone = timezone("Africa/Nairobi")
+def shell(history_file: str, timing: bool):
+    # Open the pooled connection(s) up front so the first command is as fast as the rest.
+    try:
+        get_db().pool.warm_up()
 
-    date = my_timezone.localize(datetime.strptime(production_date, "%Y-%m-%d"))
+    except Exception as error:
+        click.echo(click.style(f"{error}", fg="red", bold=True))
 
-    my_db.update_date(table, id, date)
+    from db_cli.shell import run_shell
+
+    run_shell(cli, history_file, timing)
 
 
 cli.add_command(check_connection)
 
 cli.add_command(create_tables)
 cli.add_command(delete_tables)
+cli.add_command(migrate)
 
 cli.add_command(view_tables)
 
 cli.add_command(create_record)
 cli.add_command(delete_record)
+cli.add_command(delete_records)
 
 cli.add_command(update_name)
 cli.add_command(update_morning)
@@ -761,5 +4321,21 @@ cli.add_command(update_date)
 cli.add_command(view_all_records)
 cli.add_command(view_record)
 
+cli.add_command(import_records)
+cli.add_command(export_records)
+cli.add_command(seed)
+cli.add_command(apply_updates)
+
+cli.add_command(report)
+cli.add_command(index_advice)
+cli.add_command(cache_stats)
+cli.add_command(sync)
+cli.add_command(partitions)
+cli.add_command(archive)
+cli.add_command(restore)
+
+cli.add_command(replicas)
+cli.add_command(shell)
+
 if __name__ == "__main__":
     cli()
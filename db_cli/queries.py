@@ -0,0 +1,298 @@
+from psycopg2 import sql  # type: ignore
+from db_cli.ingest import CONFLICT_MODES, RECORD_COLUMNS
+
+
+def record_filters(
+    date_from=None,
+    date_to=None,
+    animals=(),
+    after_id=None,
+    descending=False,
+    before=None,
+):
+    """
+    Build a ``WHERE`` clause (possibly empty) and its parameters for the
+    common record filters, so they are evaluated by Postgres rather than
+    by filtering rows in Python.
+    """
+
+    clauses = []
+    params = []
+
+    if date_from is not None:
+        clauses.append(sql.SQL("production_date >= %s"))
+        params.append(date_from)
+
+    if date_to is not None:
+        clauses.append(sql.SQL("production_date <= %s"))
+        params.append(date_to)
+
+    if before is not None:
+        clauses.append(sql.SQL("production_date < %s"))
+        params.append(before)
+
+    if animals:
+        clauses.append(
+            sql.SQL("animal_id IN (SELECT id FROM animals WHERE name = ANY(%s))")
+        )
+        params.append(list(animals))
+
+    # Keyset pagination: continue strictly after the last id already seen.
+    if after_id is not None:
+        clauses.append(sql.SQL("id < %s" if descending else "id > %s"))
+        params.append(after_id)
+
+    if not clauses:
+        return sql.SQL(""), params
+
+    return sql.SQL(" WHERE ") + sql.SQL(" AND ").join(clauses), params
+
+
+# Records as users see them: the cow's name joined in place of animal_id.
+RECORD_SELECT = (
+    "SELECT r.id, a.name AS animal, r.morning_production, r.afternoon_production,"
+    " r.evening_production, r.production_unit, r.production_date"
+)
+
+# Column names of RECORD_SELECT.
+RECORD_FIELDS = ("id", *RECORD_COLUMNS)
+
+RECORD_BY_ID = (
+    RECORD_SELECT
+    + " FROM {} AS r JOIN animals AS a ON a.id = r.animal_id WHERE r.id = $1"
+)
+
+# Rows of tables that do not refer to cows by animal_id are shown as they are.
+ROW_BY_ID = "SELECT * FROM {} WHERE id = $1"
+
+HAS_ANIMAL_ID = (
+    "SELECT EXISTS (SELECT 1 FROM pg_attribute WHERE attrelid = to_regclass(%s)"
+    " AND attname = 'animal_id' AND NOT attisdropped)"
+)
+
+
+def records_from(table: str, where=sql.SQL(""), joined: bool = True):
+    """
+    Select the records of ``table`` matching ``where`` (as built by
+    ``record_filters``), with the name of each cow joined from ``animals``
+    unless ``joined`` is false. The filters apply to ``table`` itself, so
+    its indexes are used.
+    """
+
+    if not joined:
+        return sql.SQL("SELECT * FROM {table}{where}").format(
+            table=sql.Identifier(table), where=where
+        )
+
+    return sql.SQL(
+        RECORD_SELECT + " FROM (SELECT * FROM {table}{where}) AS r"
+        " JOIN animals AS a ON a.id = r.animal_id"
+    ).format(table=sql.Identifier(table), where=where)
+
+
+def records_page(
+    table: str,
+    date_from=None,
+    date_to=None,
+    after_id=None,
+    order: str = "asc",
+    limit: int | None = None,
+    joined: bool = True,
+):
+    """
+    ``records_from`` in id ``order``, continuing after ``after_id`` and
+    stopping after ``limit`` records when given. Returns the query and its
+    parameters.
+    """
+
+    descending = order == "desc"
+
+    where, params = record_filters(
+        date_from, date_to, after_id=after_id, descending=descending
+    )
+
+    query = records_from(table, where, joined) + sql.SQL(
+        " ORDER BY id DESC" if descending else " ORDER BY id"
+    )
+
+    if limit is not None:
+        query += sql.SQL(" LIMIT %s")
+        params.append(limit)
+
+    return query, params
+
+
+REPORT_PERIODS = ("day", "week", "month", "year")
+
+REPORT_COLUMNS = ("animal", "period", "unit", "days", "total", "average")
+
+
+def production_report(table: str, period: str, where):
+    """
+    Per-animal totals and daily averages of morning + afternoon + evening
+    production, grouped by ``date_trunc(period, production_date)``.
+
+    Rows are grouped on the integer ``animal_id``; names are joined to the
+    (much smaller) grouped result.
+    """
+
+    if period not in REPORT_PERIODS:
+        raise ValueError(f"Unsupported period '{period}'.")
+
+    return sql.SQL(
+        "SELECT a.name AS animal, p.period, p.unit, p.days, p.total, p.average FROM ("
+        "SELECT animal_id, date_trunc({period}, production_date)::date AS period,"
+        " production_unit AS unit, count(*) AS days,"
+        " round(sum(morning_production + afternoon_production + evening_production)::numeric, 2) AS total,"
+        " round(avg(morning_production + afternoon_production + evening_production)::numeric, 2) AS average"
+        " FROM {table}{where}"
+        " GROUP BY 1, 2, 3) AS p JOIN animals AS a ON a.id = p.animal_id"
+        " ORDER BY 1, 2, 3"
+    ).format(period=sql.Literal(period), table=sql.Identifier(table), where=where)
+
+
+SEQ_SCAN_TABLES = """
+SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0), n_live_tup
+FROM pg_stat_user_tables
+WHERE n_live_tup >= %s AND seq_scan > coalesce(idx_scan, 0)
+ORDER BY seq_tup_read DESC
+"""
+
+UNUSED_INDEXES = """
+SELECT s.relname, s.indexrelname, pg_size_pretty(pg_relation_size(s.indexrelid))
+FROM pg_stat_user_indexes AS s
+JOIN pg_index AS i ON i.indexrelid = s.indexrelid
+WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary
+ORDER BY pg_relation_size(s.indexrelid) DESC
+"""
+
+# Columns of the records table, with the cow stored as a key into animals.
+STORED_COLUMNS = (
+    "animal_id",
+    "morning_production",
+    "afternoon_production",
+    "evening_production",
+    "production_unit",
+    "production_date",
+)
+
+# A cow has at most one row per production date.
+CONFLICT_KEY = ("animal_id", "production_date")
+
+UPSERT_COLUMNS = (
+    "morning_production",
+    "afternoon_production",
+    "evening_production",
+    "production_unit",
+)
+
+UNIQUE_RECORDS = """
+CREATE UNIQUE INDEX IF NOT EXISTS milk_production_animal_date_key
+    ON milk_production (animal_id, production_date);
+
+-- The unique index serves the same lookups as the plain one it replaces.
+DROP INDEX IF EXISTS milk_production_animal_date_idx;
+"""
+
+
+def conflict_clause(mode: str) -> str:
+    """The ``ON CONFLICT`` clause for inserting records in ``mode``."""
+
+    if mode not in CONFLICT_MODES:
+        raise ValueError(f"Unsupported conflict mode '{mode}'.")
+
+    if mode == "error":
+        return ""
+
+    target = f" ON CONFLICT ({', '.join(CONFLICT_KEY)})"
+
+    if mode == "skip":
+        return f"{target} DO NOTHING"
+
+    return f"{target} DO UPDATE SET " + ", ".join(
+        f"{column} = EXCLUDED.{column}" for column in UPSERT_COLUMNS
+    )
+
+
+ADD_ANIMALS = (
+    "INSERT INTO animals (name) SELECT unnest(%s::text[])"
+    " ON CONFLICT (name) DO NOTHING"
+)
+
+ANIMAL_IDS = "SELECT name, id FROM animals WHERE name = ANY(%s)"
+
+# Renames the cow of a record, and so every record of that cow.
+RENAME_ANIMAL = (
+    "UPDATE animals SET name = $1 WHERE id = (SELECT animal_id FROM {} WHERE id = $2)"
+)
+
+# RENAME_ANIMAL for many records at once, with execute_values.
+RENAME_ANIMALS = (
+    "UPDATE animals AS a SET name = v.name FROM (VALUES %s) AS v (id, name), {} AS r"
+    " WHERE r.id = v.id AND a.id = r.animal_id"
+)
+
+
+def add_staged_animals(staging: str):
+    """Add the cows named in a staging table that are not in ``animals`` yet."""
+
+    return sql.SQL(
+        "INSERT INTO animals (name) SELECT DISTINCT animal FROM {}"
+        " ON CONFLICT (name) DO NOTHING"
+    ).format(sql.Identifier(staging))
+
+
+def load_from(table: str, staging: str, mode: str):
+    """
+    Move rows from a staging table (with cow names) into ``table`` (with cow
+    ids) in one ``INSERT ... SELECT``.
+
+    When conflicts are skipped or updated, duplicate keys within the staging
+    table are collapsed first, keeping the row loaded last, since
+    ``ON CONFLICT DO UPDATE`` cannot touch a row twice.
+    """
+
+    distinct = order = sql.SQL("")
+
+    if mode != "error":
+        distinct = sql.SQL("DISTINCT ON (a.id, s.production_date) ")
+        order = sql.SQL(" ORDER BY a.id, s.production_date, s.ctid DESC")
+
+    return sql.SQL(
+        "INSERT INTO {table} ({columns}) SELECT {distinct}a.id, {values}"
+        " FROM {staging} AS s JOIN animals AS a ON a.name = s.animal{order}"
+        + conflict_clause(mode)
+    ).format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(", ").join(map(sql.Identifier, STORED_COLUMNS)),
+        distinct=distinct,
+        values=sql.SQL(", ").join(
+            sql.SQL("s.{}").format(sql.Identifier(column))
+            for column in STORED_COLUMNS[1:]
+        ),
+        staging=sql.Identifier(staging),
+        order=order,
+    )
+
+
+def staging_table(staging: str):
+    """A temporary table for COPY input, emptied at every commit."""
+
+    return sql.SQL(
+        "CREATE TEMP TABLE IF NOT EXISTS {} (animal TEXT, morning_production REAL,"
+        " afternoon_production REAL, evening_production REAL, production_unit TEXT,"
+        " production_date DATE) ON COMMIT DELETE ROWS"
+    ).format(sql.Identifier(staging))
+
+
+def delete_batch(table: str, where, batch_size: int):
+    """
+    Delete the next (at most) ``batch_size`` records matching ``where``, in
+    id order, returning how many were deleted and the last deleted id.
+    """
+
+    return sql.SQL(
+        "WITH doomed AS (SELECT id FROM {table}{where} ORDER BY id LIMIT {limit}),"
+        " deleted AS (DELETE FROM {table} AS t USING doomed WHERE t.id = doomed.id RETURNING t.id)"
+        " SELECT count(*), max(id) FROM deleted"
+    ).format(table=sql.Identifier(table), where=where, limit=sql.Literal(batch_size))
@@ -0,0 +1,154 @@
+import sys
+import io
+import csv
+import json
+import click
+
+FORMATS = ("table", "csv", "tsv", "json", "jsonl")
+
+# Short labels for the milk_production columns; other columns use their name.
+LABELS = {
+    "animal": "cow",
+    "morning_production": "morning",
+    "afternoon_production": "noon",
+    "evening_production": "evening",
+    "production_unit": "unit",
+    "production_date": "date",
+}
+
+
+class RecordRenderer:
+    """
+    Write query results as a styled table or as CSV/TSV/JSON/JSON lines.
+
+    Columns come from ``cursor.description``, and output is built in chunks
+    of ``chunk_size`` rows with one write per chunk rather than one per row.
+    The table layout prints ``title`` before the first row, and
+    ``color=False`` skips styling altogether.
+    """
+
+    def __init__(
+        self,
+        fmt: str = "table",
+        color: bool = True,
+        title: str | None = None,
+        title_style: dict | None = None,
+        chunk_size: int = 1000,
+    ) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'.")
+
+        self.fmt = fmt
+        self.color = color
+        self.title = title
+        self.title_style = title_style or {}
+        self.chunk_size = chunk_size
+        self.last = None
+
+    def write(self, rows, cursor) -> int:
+        """Render ``rows`` (any iterable, including ``cursor`` itself) and return how many there were."""
+
+        count = 0
+        columns = None
+        chunk = []
+        line = None
+
+        for row in rows:
+            if columns is None:
+                columns = [column[0] for column in cursor.description]
+                line = self._formatter(columns)
+
+                self._start(columns)
+
+            count += 1
+            chunk.append(line(count, row))
+
+            if len(chunk) >= self.chunk_size:
+                self._emit("".join(chunk))
+                chunk = []
+
+            self.last = row
+
+        if chunk:
+            self._emit("".join(chunk))
+
+        if columns is None and self.fmt != "table":
+            # No rows: still produce a well-formed (empty) document.
+            self._start([column[0] for column in cursor.description or ()])
+
+        if self.fmt == "json":
+            self._emit("\n]\n" if count else "]\n", style=False)
+
+        sys.stdout.flush()
+
+        return count
+
+    def _start(self, columns: list) -> None:
+        if self.fmt == "table":
+            if self.title is not None:
+                self._emit(self.title + "\n", **self.title_style)
+
+        elif self.fmt in ("csv", "tsv"):
+            self._emit(self._delimited(columns))
+
+        elif self.fmt == "json":
+            self._emit("[", style=False)
+
+    def _formatter(self, columns: list):
+        if self.fmt == "table":
+            labels = [LABELS.get(column, column) for column in columns]
+
+            def line(count, row):
+                fields = " | ".join(
+                    f"{label}: {value}" for label, value in zip(labels, row)
+                )
+
+                return f"{count}. | {fields}\n\n"
+
+        elif self.fmt in ("csv", "tsv"):
+            buffer = io.StringIO()
+            writer = self._writer(buffer)
+
+            def line(count, row):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerow(row)
+
+                return buffer.getvalue()
+
+        elif self.fmt == "json":
+
+            def line(count, row):
+                prefix = "\n" if count == 1 else ",\n"
+
+                return prefix + json.dumps(dict(zip(columns, row)), default=str)
+
+        else:
+
+            def line(count, row):
+                return json.dumps(dict(zip(columns, row)), default=str) + "\n"
+
+        return line
+
+    def _writer(self, buffer):
+        return csv.writer(
+            buffer, delimiter="\t" if self.fmt == "tsv" else ",", lineterminator="\n"
+        )
+
+    def _delimited(self, values) -> str:
+        buffer = io.StringIO()
+
+        self._writer(buffer).writerow(values)
+
+        return buffer.getvalue()
+
+    def _emit(self, text: str, style: bool = True, **styles) -> None:
+        if self.fmt == "table" and self.color:
+            if style:
+                text = click.style(text, **(styles or {"fg": "cyan", "bold": True}))
+
+            click.echo(text, nl=False)
+
+        else:
+            # Plain output has nothing to style or strip, so write it directly.
+            sys.stdout.write(text)
@@ -0,0 +1,159 @@
+import time
+import itertools
+import threading
+
+# "[<section>.replica.<name>]" sections of database.ini describe read replicas
+# of the database in "[<section>]", e.g. "[postgresql.replica.a]".
+REPLICA_PREFIX = "{}.replica."
+
+REPLICA_DEFAULTS = {
+    "replica_strategy": "round_robin",
+    "replica_max_lag": 30.0,
+    "replica_check_interval": 10.0,
+}
+
+REPLICA_STRATEGIES = ("round_robin", "latency")
+
+# Seconds the replica is behind. A replica that has replayed all the WAL it
+# received is not behind, however old its last transaction: the primary may
+# simply be idle. NULL (nothing replayed yet) counts as too far behind.
+REPLICA_LAG = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+class Replica:
+    def __init__(self, name: str, pool) -> None:
+        self.name = name
+        self.pool = pool
+        self.lag = None
+        self.latency = None  # moving average of the lag check round trip
+        self.checked_at = None
+        self.down_until = 0.0
+        self.error = None
+
+
+class ReplicaRouter:
+    """
+    Hands out connections to read replicas that are up and within
+    ``max_lag`` seconds of the primary.
+
+    Replicas are tried in turn (``round_robin``) or fastest first
+    (``latency``). A replica's lag is checked at most every
+    ``check_interval`` seconds; one that is down or too far behind is skipped
+    for that long. ``getconn`` returns ``(None, None)`` when no replica can
+    serve, so the caller falls back to the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: list,
+        strategy: str = "round_robin",
+        max_lag: float = 30.0,
+        check_interval: float = 10.0,
+    ) -> None:
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(
+                f"Unknown replica strategy {strategy!r}, expected one of: {', '.join(REPLICA_STRATEGIES)}."
+            )
+
+        self.replicas = replicas
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def candidates(self) -> list:
+        now = time.monotonic()
+
+        up = [replica for replica in self.replicas if replica.down_until <= now]
+
+        if not up:
+            return []
+
+        if self.strategy == "latency":
+            # Unmeasured replicas go first so that every one gets measured.
+            return sorted(
+                up, key=lambda replica: (replica.latency is not None, replica.latency)
+            )
+
+        with self._lock:
+            start = next(self._turn) % len(up)
+
+        return up[start:] + up[:start]
+
+    def getconn(self):
+        for replica in self.candidates():
+            conn = None
+
+            try:
+                conn = replica.pool.getconn()
+
+                if self._is_current(replica, conn):
+                    return replica.pool, conn
+
+                replica.pool.putconn(conn)
+
+            except Exception as error:
+                replica.error = str(error).strip()
+
+                self._skip(replica)
+
+                if conn is not None:
+                    replica.pool.putconn(conn, close=True)
+
+        return None, None
+
+    def check(self, replica: Replica, conn) -> None:
+        """Measure ``replica``'s lag, and the round trip taken to ask for it."""
+
+        start = time.perf_counter()
+
+        cur = conn.cursor()
+        cur.execute(REPLICA_LAG)
+
+        lag = cur.fetchone()[0]
+
+        cur.close()
+        conn.rollback()
+
+        latency = time.perf_counter() - start
+
+        replica.lag = None if lag is None else float(lag)
+        replica.latency = (
+            latency
+            if replica.latency is None
+            else 0.8 * replica.latency + 0.2 * latency
+        )
+        replica.checked_at = time.monotonic()
+        replica.error = None
+
+    def _is_current(self, replica: Replica, conn) -> bool:
+        if (
+            replica.checked_at is None
+            or time.monotonic() - replica.checked_at >= self.check_interval
+        ):
+            self.check(replica, conn)
+
+            if not self.within_lag(replica):
+                self._skip(replica)
+
+                return False
+
+        return True
+
+    def within_lag(self, replica: Replica) -> bool:
+        return replica.lag is not None and replica.lag <= self.max_lag
+
+    def _skip(self, replica: Replica) -> None:
+        replica.down_until = time.monotonic() + self.check_interval
+
+    def closeall(self) -> None:
+        for replica in self.replicas:
+            replica.pool.closeall()
@@ -0,0 +1,92 @@
+import io
+import random
+from datetime import date, timedelta
+
+# Each cow draws its yields from a pre-formatted sample of this many values
+# per session, so generating a row costs a few table lookups instead of three
+# Gaussian draws and three float formats.
+SAMPLE_SIZE = 256
+
+
+def herd_batches(
+    cows: int,
+    start: date,
+    days: int,
+    yields: dict,
+    unit: str = "Litres",
+    seed: int | None = None,
+    batch_size: int = 50000,
+):
+    """
+    Generate one record per cow per day as COPY text batches, in date order.
+
+    ``yields`` maps each session ("morning", "afternoon", "evening") to a
+    ``(mean, standard deviation)`` pair. Every cow also gets a fixed
+    productivity factor, so totals differ between cows the way they do in a
+    real herd. The same ``seed`` always produces the same data.
+
+    Yields ``(buffer, row count, production dates)`` tuples, like
+    ``db_cli.ingest.copy_batches``.
+    """
+
+    generator = random.Random(seed)
+    gauss = generator.gauss
+    pick = generator.getrandbits
+    bits = SAMPLE_SIZE.bit_length() - 1
+
+    herd = []
+
+    for number in range(1, cows + 1):
+        factor = generator.uniform(0.7, 1.3)
+
+        samples = [
+            [
+                f"{max(gauss(mean, deviation) * factor, 0.0):.2f}"
+                for _ in range(SAMPLE_SIZE)
+            ]
+            for mean, deviation in (
+                yields[session] for session in ("morning", "afternoon", "evening")
+            )
+        ]
+
+        herd.append((f"Cow {number}\t", *samples))
+
+    buffer = io.StringIO()
+    count = 0
+    dates = set()
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        suffix = f"\t{unit}\t{day}\n"
+
+        # Build a whole day (or the part that fits the batch) before writing,
+        # which is much cheaper than one write call per row.
+        position = 0
+
+        while position < cows:
+            chunk = herd[position : position + batch_size - count]
+            position += len(chunk)
+
+            buffer.write(
+                "".join(
+                    [
+                        f"{name}{morning[pick(bits)]}\t{afternoon[pick(bits)]}\t{evening[pick(bits)]}{suffix}"
+                        for name, morning, afternoon, evening in chunk
+                    ]
+                )
+            )
+
+            count += len(chunk)
+            dates.add(day)
+
+            if count >= batch_size:
+                buffer.seek(0)
+                yield buffer, count, dates
+
+                buffer = io.StringIO()
+                count = 0
+                dates = set()
+
+    if count:
+        buffer.seek(0)
+        yield buffer, count, dates
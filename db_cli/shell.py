@@ -0,0 +1,120 @@
+import os
+import time
+import shlex
+import click
+
+try:
+    import readline
+except ImportError:  # pragma: no cover - not available on Windows
+    readline = None
+
+
+EXIT_COMMANDS = ("exit", "quit")
+
+
+def load_history(path: str) -> None:
+    if readline is None:
+        return
+
+    try:
+        readline.read_history_file(path)
+
+    except OSError:
+        pass
+
+    readline.set_history_length(1000)
+
+
+def save_history(path: str) -> None:
+    if readline is None:
+        return
+
+    try:
+        readline.write_history_file(path)
+
+    except OSError:
+        pass
+
+
+def run_command(group: click.Group, args: list) -> None:
+    """Run one command line through ``group`` without leaving the process."""
+
+    try:
+        group.main(args, prog_name="db_cli", standalone_mode=False)
+
+    except click.exceptions.Abort:
+        click.echo(click.style("Aborted.", fg="yellow", bold=True))
+
+    except click.exceptions.ClickException as error:
+        error.show()
+
+    except SystemExit:
+        # ``--help`` and friends exit once they are done printing.
+        pass
+
+
+def run_shell(group: click.Group, history_file: str, timing: bool = True) -> None:
+    history_file = os.path.expanduser(history_file)
+
+    load_history(history_file)
+
+    click.echo(
+        click.style(
+            "\nType a command (e.g. view-all-records --limit 10), 'help' or 'exit'.\n",
+            fg="cyan",
+            bold=True,
+        )
+    )
+
+    try:
+        while True:
+            try:
+                line = input("db_cli> ")
+
+            except EOFError:
+                click.echo()
+
+                break
+
+            except KeyboardInterrupt:
+                click.echo()
+
+                continue
+
+            try:
+                args = shlex.split(line)
+
+            except ValueError as error:
+                click.echo(click.style(f"{error}", fg="red", bold=True))
+
+                continue
+
+            if not args:
+                continue
+
+            if args[0] in EXIT_COMMANDS:
+                break
+
+            if args[0] == "help":
+                args = ["--help"]
+
+            if args[0] == "shell":
+                click.echo(click.style("Already in the shell.", fg="yellow", bold=True))
+
+                continue
+
+            start = time.perf_counter()
+
+            try:
+                run_command(group, args)
+
+            except KeyboardInterrupt:
+                click.echo(click.style("\nInterrupted.", fg="yellow", bold=True))
+
+            if timing:
+                elapsed = (time.perf_counter() - start) * 1000
+
+                click.echo(click.style(f"({elapsed:.1f} ms)", dim=True))
+
+    finally:
+        save_history(history_file)
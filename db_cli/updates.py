@@ -0,0 +1,101 @@
+from db_cli.ingest import RecordError, read_records, validate_field
+
+# Short names match the existing update_* commands. Like update-name, "name"
+# renames the record's cow, and so changes the name in all of its records.
+FIELD_ALIASES = {
+    "name": "animal",
+    "morning": "morning_production",
+    "noon": "afternoon_production",
+    "afternoon": "afternoon_production",
+    "evening": "evening_production",
+    "unit": "production_unit",
+    "date": "production_date",
+}
+
+# Moves a record to another cow, given that cow's id in animals.
+MOVE_COLUMN = "animal_id"
+
+
+def parse_change(record: dict) -> tuple:
+    """
+    Turn one input record into ``(id, {column: value})``. Records are either
+    ``{"id", "field", "value"}`` (also the CSV header) or ``{"id", "fields": {...}}``.
+    """
+
+    try:
+        id = int(record.get("id"))
+
+    except (TypeError, ValueError):
+        raise RecordError(f"id must be an integer, got {record.get('id')!r}")
+
+    fields = record.get("fields")
+
+    if fields is None:
+        if not record.get("field"):
+            raise RecordError("either field/value or fields is required")
+
+        fields = {record["field"]: record.get("value")}
+
+    elif not isinstance(fields, dict) or not fields:
+        raise RecordError("fields must be a non-empty object")
+
+    changes = {}
+
+    for field, value in fields.items():
+        column = FIELD_ALIASES.get(field.strip(), field.strip())
+
+        if column == MOVE_COLUMN:
+            try:
+                changes[column] = int(value)
+
+            except (TypeError, ValueError):
+                raise RecordError(f"{column} must be an integer, got {value!r}")
+
+        else:
+            changes[column] = validate_field(column, value)
+
+    return id, changes
+
+
+def collect_changes(stream, fmt: str) -> tuple:
+    """
+    Read and validate every change, merging changes to the same id (later
+    values win). Returns ``(changes by id, [(line number, error)])``.
+    """
+
+    changes = {}
+    errors = []
+
+    for line_num, record in read_records(stream, fmt):
+        try:
+            if isinstance(record, RecordError):
+                raise record
+
+            id, fields = parse_change(record)
+
+        except RecordError as error:
+            errors.append((line_num, error))
+
+            continue
+
+        changes.setdefault(id, {}).update(fields)
+
+    return changes, errors
+
+
+def group_changes(changes: dict) -> dict:
+    """
+    Group rows by the set of columns they change, so each group can be
+    applied with one ``UPDATE ... FROM (VALUES ...)`` statement.
+
+    Returns ``{(column, ...): [(id, value, ...), ...]}``.
+    """
+
+    groups = {}
+
+    for id, fields in changes.items():
+        columns = tuple(sorted(fields))
+
+        groups.setdefault(columns, []).append((id, *(fields[c] for c in columns)))
+
+    return groups
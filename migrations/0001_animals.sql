@@ -0,0 +1,49 @@
+-- Move cow names out of milk_production into the animals table, replacing
+-- the free-text animal column with an integer animal_id. Tables created from
+-- the current tables.sql already have animal_id and are left as they are.
+
+CREATE TABLE IF NOT EXISTS animals (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+DO $$
+DECLARE
+    was_unique BOOLEAN := to_regclass('milk_production_animal_date_key') IS NOT NULL;
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = 'public'
+            AND table_name = 'milk_production'
+            AND column_name = 'animal'
+    ) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO animals (name)
+        SELECT DISTINCT animal FROM milk_production ORDER BY 1
+        ON CONFLICT (name) DO NOTHING;
+
+    ALTER TABLE milk_production ADD COLUMN animal_id INTEGER;
+
+    UPDATE milk_production AS r SET animal_id = a.id
+        FROM animals AS a WHERE a.name = r.animal;
+
+    ALTER TABLE milk_production
+        ALTER COLUMN animal_id SET NOT NULL,
+        ADD CONSTRAINT milk_production_animal_id_fkey
+            FOREIGN KEY (animal_id) REFERENCES animals (id);
+
+    -- Dropping the column drops its indexes; rebuild the (animal,
+    -- production_date) one on the id, unique if it was before.
+    ALTER TABLE milk_production DROP COLUMN animal;
+
+    IF was_unique THEN
+        CREATE UNIQUE INDEX milk_production_animal_date_key
+            ON milk_production (animal_id, production_date);
+    ELSE
+        CREATE INDEX IF NOT EXISTS milk_production_animal_date_idx
+            ON milk_production (animal_id, production_date);
+    END IF;
+END
+$$;
@@ -0,0 +1,24 @@
+-- One row per cow; records refer to it by a small integer id.
+CREATE TABLE IF NOT EXISTS animals (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS milk_production (
+    id SERIAL PRIMARY KEY,
+    animal_id INTEGER NOT NULL REFERENCES animals (id),
+    morning_production REAL NOT NULL DEFAULT 0,
+    afternoon_production REAL NOT NULL DEFAULT 0,
+    evening_production REAL NOT NULL DEFAULT 0,
+    production_unit VARCHAR(50) NOT NULL DEFAULT 'Litres',
+    production_date DATE NOT NULL
+);
+
+-- Lookups by cow, and by cow over a date range.
+CREATE INDEX IF NOT EXISTS milk_production_animal_date_idx
+    ON milk_production (animal_id, production_date);
+
+-- Rows are appended roughly in date order, so a tiny BRIN index is enough
+-- to prune date-range scans over the whole herd.
+CREATE INDEX IF NOT EXISTS milk_production_date_brin_idx
+    ON milk_production USING brin (production_date);
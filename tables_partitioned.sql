@@ -0,0 +1,23 @@
+CREATE TABLE IF NOT EXISTS animals (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+-- milk_production split into monthly partitions on production_date. The
+-- partitions themselves are created on demand by db_cli when rows arrive.
+CREATE TABLE IF NOT EXISTS milk_production (
+    id SERIAL,
+    animal_id INTEGER NOT NULL REFERENCES animals (id),
+    morning_production REAL NOT NULL DEFAULT 0,
+    afternoon_production REAL NOT NULL DEFAULT 0,
+    evening_production REAL NOT NULL DEFAULT 0,
+    production_unit VARCHAR(50) NOT NULL DEFAULT 'Litres',
+    production_date DATE NOT NULL,
+    PRIMARY KEY (id, production_date)
+) PARTITION BY RANGE (production_date);
+
+CREATE INDEX IF NOT EXISTS milk_production_animal_date_idx
+    ON milk_production (animal_id, production_date);
+
+CREATE INDEX IF NOT EXISTS milk_production_date_brin_idx
+    ON milk_production USING brin (production_date);
@@ -0,0 +1,91 @@
+from db_cli.psql import PostgresConnect
+
+
+class FakeCursor:
+    def __init__(self, ids: dict) -> None:
+        self.ids = ids
+        self.queries = []
+        self.rows = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+        if query.startswith("SELECT"):
+            self.rows = [(name, self.ids[name]) for name in params[0]]
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_animal_ids_are_cached(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text("[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n")
+
+    db = PostgresConnect(str(config))
+    conn = FakeConnection()
+    cur = FakeCursor({"Cow 1": 1, "Cow 2": 2})
+
+    assert db._animal_ids(conn, cur, ["Cow 1", "Cow 2", "Cow 1"]) == {
+        "Cow 1": 1,
+        "Cow 2": 2,
+    }
+    assert len(cur.queries) == 2
+    assert conn.commits == 1
+
+    # Known cows need no round trip; renames drop the cached names.
+    assert db._animal_ids(conn, cur, ["Cow 2"]) == {"Cow 2": 2}
+    assert len(cur.queries) == 2
+
+    db._renamed()
+
+    db._animal_ids(conn, cur, ["Cow 2"])
+
+    assert len(cur.queries) == 4
+
+
+class CatalogCursor:
+    def __init__(self, queries: list) -> None:
+        self.queries = queries
+
+    def execute(self, query, params=None):
+        self.queries.append(params[0])
+
+    def fetchone(self):
+        return (self.queries[-1] == "milk_production",)
+
+    def close(self):
+        pass
+
+
+class CatalogConnection:
+    def __init__(self) -> None:
+        self.queries = []
+
+    def cursor(self):
+        return CatalogCursor(self.queries)
+
+
+def test_only_tables_with_animal_ids_are_joined(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text("[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n")
+
+    db = PostgresConnect(str(config))
+    conn = CatalogConnection()
+
+    assert db._joins_animals(conn, "milk_production")
+    assert not db._joins_animals(conn, "other_table")
+    assert not db._joins_animals(conn, "other_table")
+    assert conn.queries == ["milk_production", "other_table"]
+
+    db._schema_changed()
+
+    db._joins_animals(conn, "other_table")
+
+    assert len(conn.queries) == 3
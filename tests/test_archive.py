@@ -0,0 +1,48 @@
+import csv
+import gzip
+from datetime import date
+from db_cli.archive import ARCHIVE_COLUMNS, bucket_path, write_buckets
+
+
+def row(id: int, day: date) -> tuple:
+    return (id, f"Cow {id}", 10.5, 12.3, 9.2, "Litres", day)
+
+
+def read(path: str) -> list:
+    with gzip.open(path, "rt", newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_bucket_path(tmp_path):
+    assert bucket_path(str(tmp_path), "milk_production", date(2022, 1, 31)) == str(
+        tmp_path / "milk_production_2022-01.csv.gz"
+    )
+
+
+def test_write_buckets_by_month(tmp_path):
+    written = write_buckets(
+        str(tmp_path),
+        "milk_production",
+        [row(1, date(2022, 1, 5)), row(2, date(2022, 2, 1)), row(3, date(2022, 1, 9))],
+    )
+
+    january = str(tmp_path / "milk_production_2022-01.csv.gz")
+    february = str(tmp_path / "milk_production_2022-02.csv.gz")
+
+    assert written == {january: 2, february: 1}
+
+    rows = read(january)
+
+    assert rows[0] == list(ARCHIVE_COLUMNS)
+    assert [r[0] for r in rows[1:]] == ["1", "3"]
+    assert rows[1][-1] == "2022-01-05"
+
+
+def test_appending_keeps_one_header(tmp_path):
+    write_buckets(str(tmp_path), "milk_production", [row(1, date(2022, 1, 5))])
+    write_buckets(str(tmp_path), "milk_production", [row(2, date(2022, 1, 6))])
+
+    rows = read(str(tmp_path / "milk_production_2022-01.csv.gz"))
+
+    assert rows[0] == list(ARCHIVE_COLUMNS)
+    assert [r[0] for r in rows[1:]] == ["1", "2"]
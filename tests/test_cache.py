@@ -0,0 +1,181 @@
+import time
+from datetime import date
+from db_cli.cache import SCHEMA_TAG, CachedResult, ResultCache
+from db_cli.psql import PostgresConnect
+
+ROW = (1, "Cow 1", 10.5, 12.3, 9.2, "Litres", date(2023, 6, 25))
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"))
+    key = cache.key("view_record", "milk_production", "1")
+
+    assert cache.get(key) is None
+
+    cache.put(key, "milk_production", CachedResult(["id"], [ROW]))
+
+    assert cache.get(key).rows == [ROW]
+    stats = cache.stats()
+
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["bytes"] > 0
+
+    cache.reset_stats()
+
+    assert cache.stats()["hits"] == 0
+
+
+def test_entries_expire(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), ttl=0.05)
+
+    cache.put("key", "milk_production", [ROW])
+    time.sleep(0.1)
+
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+
+    cache.put("a", "milk_production", 1)
+    cache.put("b", "milk_production", 2)
+    cache.get("a")
+    cache.put("c", "milk_production", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate_by_table(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"))
+
+    cache.put("records", "milk_production", 1)
+    cache.put("other", "other_table", 2)
+    cache.put("tables", SCHEMA_TAG, 3)
+
+    cache.invalidate("milk_production")
+
+    assert cache.get("records") is None
+    assert cache.get("other") == 2
+    assert cache.get("tables") == 3
+
+
+def test_view_record_served_from_cache(tmp_path, capsys):
+    # Port 1 refuses connections, so any output must come from the cache.
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\nconnect_timeout=1\n"
+        f"[cache]\npath={tmp_path / 'cache.sqlite3'}\nttl=60\n"
+    )
+
+    db = PostgresConnect(str(config))
+    db.cache.put(
+        db._cache_key(("view_record", "milk_production", "1")),
+        "milk_production",
+        CachedResult(["id", "animal"], [(1, "Cow 1")]),
+    )
+
+    db.view_record("milk_production", 1, fmt="csv")
+
+    assert capsys.readouterr().out.splitlines() == ["id,animal", "1,Cow 1"]
+
+    db._invalidate("milk_production")
+
+    assert db.cache.stats()["entries"] == 0
+
+    db.close()
+
+
+def test_keys_name_the_database(tmp_path):
+    cache = tmp_path / "cache.sqlite3"
+    dbs = []
+
+    for name in ("north", "south"):
+        config = tmp_path / f"{name}.ini"
+        config.write_text(
+            f"[postgresql]\nhost=127.0.0.1\nport=1\ndatabase={name}\n"
+            f"[cache]\npath={cache}\n"
+        )
+
+        dbs.append(PostgresConnect(str(config)))
+
+    north, south = dbs
+
+    north._cache_put(("view_record", "milk_production", "1"), "milk_production", 1)
+
+    assert north._cache_get(("view_record", "milk_production", "1")) == 1
+    assert south._cache_get(("view_record", "milk_production", "1")) is None
+
+    north.close()
+    south.close()
+
+
+class FakeCursor:
+    def __init__(self, queries: list) -> None:
+        self.queries = queries
+
+    def execute(self, query, params=None):
+        self.queries.append(str(query))
+
+    def fetchone(self):
+        # IS_PARTITIONED and IS_ATTACHED
+        return (True,)
+
+    def fetchall(self):
+        return [("milk_production",)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, queries: list) -> None:
+        self.queries = queries
+
+    def cursor(self):
+        return FakeCursor(self.queries)
+
+    def commit(self):
+        pass
+
+
+class FakePool:
+    def __init__(self) -> None:
+        self.queries = []
+
+    def getconn(self):
+        return FakeConnection(self.queries)
+
+    def putconn(self, conn, close: bool = False):
+        pass
+
+
+def test_new_partitions_drop_the_cached_table_list(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n"
+        f"[cache]\npath={tmp_path / 'cache.sqlite3'}\n"
+    )
+
+    db = PostgresConnect(str(config))
+    db._pool = pool = FakePool()
+
+    def listed() -> int:
+        return sum("information_schema.tables" in query for query in pool.queries)
+
+    db.view_tables()
+    db.view_tables()
+
+    assert listed() == 1
+
+    conn = pool.getconn()
+
+    db._ensure_partitions(conn, conn.cursor(), "milk_production", [date(2024, 2, 3)])
+    db.view_tables()
+
+    assert listed() == 2
+
+    db._pool = None
+    db.close()
@@ -0,0 +1,12 @@
+import re
+import inspect
+from db_cli.psql import PostgresConnect, cli
+
+
+def test_commands_have_client_methods():
+    # Every command hands its work to a method of the shared client.
+    for name, command in cli.commands.items():
+        source = inspect.getsource(command.callback)
+
+        for method in re.findall(r"get_db\(\)\.(\w+)\(", source):
+            assert callable(getattr(PostgresConnect, method, None)), (name, method)
@@ -0,0 +1,40 @@
+import pytest
+from click.testing import CliRunner
+from db_cli.ingest import RecordError, parse_ids
+from db_cli.psql import delete_records
+
+runner = CliRunner()
+
+
+def test_parse_ids():
+    assert parse_ids("1,2, 3\n4\t5") == [1, 2, 3, 4, 5]
+    assert parse_ids("") == []
+
+    with pytest.raises(RecordError):
+        parse_ids("1,two")
+
+
+def test_delete_records_needs_one_selection():
+    res = runner.invoke(delete_records, [])
+
+    assert res.exit_code == 2
+    assert "--ids, --ids-file, --before or --animal" in res.output
+
+    res = runner.invoke(delete_records, ["--ids", "1", "--animal", "Cow 1"])
+
+    assert res.exit_code == 2
+
+    res = runner.invoke(delete_records, ["--ids", "1,x"])
+
+    assert res.exit_code == 2
+    assert "id must be an integer" in res.output
+
+
+def test_range_delete_asks_first():
+    res = runner.invoke(
+        delete_records, ["--before", "2023-01-01", "--animal", "Cow 1"], input="n\n"
+    )
+
+    assert res.exit_code == 1
+    assert "produced before 2023-01-01 and of Cow 1?" in res.output
+    assert "Aborted" in res.output
@@ -0,0 +1,30 @@
+import gzip
+from datetime import date
+from db_cli.export import header_line, open_output, write_jsonl
+
+
+class FakeCursor:
+    description = [("id",), ("animal",), ("production_date",)]
+
+    def __iter__(self):
+        yield (1, "Cow 1", date(2023, 6, 25))
+        yield (2, "Cow 2", date(2023, 6, 26))
+
+
+def test_write_jsonl_gzip(tmp_path):
+    path = tmp_path / "records.jsonl.gz"
+
+    with open_output(str(path), compress=True) as stream:
+        count = write_jsonl(FakeCursor(), stream)
+
+    assert count == 2
+    assert gzip.open(path, "rt").read().splitlines() == [
+        '{"id": 1, "animal": "Cow 1", "production_date": "2023-06-25"}',
+        '{"id": 2, "animal": "Cow 2", "production_date": "2023-06-26"}',
+    ]
+
+
+def test_header_line():
+    assert header_line("csv", ("farm", "id")) == "farm,id\n"
+    assert header_line("tsv", ("farm", "id")) == "farm\tid\n"
+    assert header_line("jsonl", ("farm", "id")) == ""
@@ -0,0 +1,140 @@
+import time
+import pytest
+from datetime import date
+from decimal import Decimal
+from db_cli.farms import FarmError, fan_out, farm_names, herd_report, select_farms
+from db_cli.psql import PostgresConnect
+
+
+def test_farm_names_and_selection():
+    sections = ["postgresql", "farm.north", "farm.south", "farm.south.replica.a"]
+
+    farms = farm_names(sections)
+
+    assert farms == ["north", "south"]
+    assert select_farms("all", farms) == ["north", "south"]
+    assert select_farms("south, north,south", farms) == ["south", "north"]
+
+    with pytest.raises(FarmError, match="east"):
+        select_farms("north,east", farms)
+
+    with pytest.raises(FarmError):
+        select_farms("all", [])
+
+
+def test_fan_out_runs_farms_concurrently():
+    def work(delay):
+        time.sleep(delay)
+
+        yield from range(3)
+
+    start = time.perf_counter()
+
+    results = list(fan_out({"a": 0.3, "b": 0.3, "fast": 0.0}, work, chunk_size=2))
+
+    # Run one after the other, the two slow farms alone would take 0.6s.
+    assert time.perf_counter() - start < 0.5
+    assert results[0][0] == "fast"
+    assert sorted((farm, row) for farm, rows, _ in results for row in rows) == [
+        (farm, row) for farm in ("a", "b", "fast") for row in range(3)
+    ]
+
+
+def test_fan_out_reports_errors_and_stops_early():
+    def work(client):
+        if client == "broken":
+            raise ConnectionError("connection refused")
+
+        yield from range(100000)
+
+    results = fan_out({"broken": "broken", "big": "big"}, work, queue_size=2)
+
+    errors = {}
+
+    for farm, rows, error in results:
+        if error is not None:
+            errors[farm] = error
+
+        if errors:
+            break
+
+    results.close()
+
+    assert str(errors["broken"]) == "connection refused"
+
+
+def test_herd_report():
+    rows = [
+        {
+            "farm": "north",
+            "animal": "Cow 1",
+            "period": date(2023, 6, 1),
+            "unit": "Litres",
+            "days": 2,
+            "total": Decimal("40.00"),
+            "average": Decimal("20.00"),
+        },
+        {
+            "farm": "south",
+            "animal": "Cow 1",
+            "period": date(2023, 6, 1),
+            "unit": "Litres",
+            "days": 3,
+            "total": Decimal("30.00"),
+            "average": Decimal("10.00"),
+        },
+    ]
+
+    [herd] = herd_report(rows)
+
+    assert (herd["farms"], herd["cows"], herd["days"]) == (2, 2, 5)
+    assert herd["total"] == Decimal("70.00")
+    assert herd["average"] == Decimal("14.00")
+
+
+def test_unreachable_farms_are_reported(tmp_path, capsys):
+    # Port 1 refuses connections: both farms fail without stopping the command.
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\nconnect_timeout=1\n"
+        "[farm.north]\nhost=127.0.0.1\nport=1\ndatabase=north\nconnect_timeout=1\n"
+        "[farm.south]\nhost=127.0.0.1\nport=1\ndatabase=south\nconnect_timeout=1\n"
+    )
+
+    db = PostgresConnect(str(config))
+
+    assert db.farms == ["north", "south"]
+
+    db.farm_records("all", "milk_production", fmt="csv")
+
+    captured = capsys.readouterr()
+
+    assert captured.out.splitlines() == [
+        "farm,id,animal,morning_production,afternoon_production,"
+        "evening_production,production_unit,production_date"
+    ]
+    assert "0 records from 0 of 2 farms" in captured.err
+    assert "north:" in captured.err and "south:" in captured.err
+
+    db.close()
+
+
+def test_failed_farm_exports_are_reported(tmp_path, capsys):
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\nconnect_timeout=1\n"
+        "[farm.north]\nhost=127.0.0.1\nport=1\ndatabase=north\nconnect_timeout=1\n"
+        "[farm.south]\nhost=127.0.0.1\nport=1\ndatabase=south\nconnect_timeout=1\n"
+    )
+
+    db = PostgresConnect(str(config))
+
+    db.farm_export("all", str(tmp_path / "herd.csv"), "csv", "milk_production")
+
+    out = capsys.readouterr().out
+
+    assert "0 records exported from table 'milk_production' of 0 of 2 farms" in out
+    assert "north:" in out and "south:" in out
+    assert not (tmp_path / "herd.csv").exists()
+
+    db.close()
@@ -0,0 +1,57 @@
+import io
+from datetime import date
+from db_cli.ingest import copy_batches, read_records, validate_record
+
+
+def test_validate_record():
+    record = {
+        "animal": "Cow 1",
+        "morning_production": "10.5",
+        "afternoon_production": 12.3,
+        "evening_production": "9.2",
+        "production_date": "2023-06-25",
+    }
+
+    assert validate_record(record) == (
+        "Cow 1",
+        10.5,
+        12.3,
+        9.2,
+        "Litres",
+        date(2023, 6, 25),
+    )
+
+
+def test_copy_batches_rejects_invalid_rows():
+    stream = io.StringIO(
+        "animal,morning_production,afternoon_production,evening_production,production_date\n"
+        "Cow 1,10.5,12.3,9.2,2023-06-25\n"
+        "Cow 2,abc,12.3,9.2,2023-06-25\n"
+        "Cow\t3,1,2,3,2023-06-26\n"
+        ",1,2,3,2023-06-26\n"
+    )
+
+    rejects = []
+
+    batches = list(
+        copy_batches(
+            read_records(stream, "csv"),
+            batch_size=1,
+            on_reject=lambda line, record, error: rejects.append(line),
+        )
+    )
+
+    assert [count for _, count, _ in batches] == [1, 1]
+    assert batches[0][2] == {date(2023, 6, 25)}
+    assert batches[1][0].read() == "Cow\\t3\t1.0\t2.0\t3.0\tLitres\t2023-06-26\n"
+    assert rejects == [3, 5]
+
+
+def test_read_records_jsonl():
+    stream = io.StringIO('{"animal": "Cow 1"}\n\nnot json\n')
+
+    records = list(read_records(stream, "jsonl"))
+
+    assert records[0] == (1, {"animal": "Cow 1"})
+    assert records[1][0] == 3
+    assert isinstance(records[1][1], ValueError)
@@ -0,0 +1,156 @@
+import json
+import pytest
+from datetime import date, datetime
+from db_cli.journal import Journal, JournalError, replay_params
+from db_cli import psql
+from db_cli.psql import PostgresConnect
+
+
+def test_append_and_pending_batches(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+
+    keys = [
+        journal.append(
+            "update", "milk_production", id=i, column="animal", value=f"Cow {i}"
+        )["key"]
+        for i in range(5)
+    ]
+
+    batches = list(journal.pending(2))
+
+    assert [len(entries) for entries, _ in batches] == [2, 2, 1]
+    assert [entry["key"] for entries, _ in batches for entry in entries] == keys
+    assert len(set(keys)) == 5
+
+    journal.advance(batches[0][1])
+
+    assert journal.count() == 3
+    assert not journal.compact()
+
+    journal.advance(batches[-1][1])
+
+    assert journal.compact()
+    assert journal.count() == 0
+    assert (tmp_path / "journal.jsonl").read_text() == ""
+
+
+def test_torn_last_line_is_left_for_later(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    journal.append("update", "milk_production", id=1, column="animal", value="Cow 1")
+
+    with open(journal.path, "a") as file:
+        file.write('{"key": "half')
+
+    entries, offset = next(journal.pending(10))
+
+    assert len(entries) == 1
+    assert offset < (tmp_path / "journal.jsonl").stat().st_size
+
+
+def test_replay_params():
+    create = {
+        "op": "create",
+        "values": {
+            "animal": "Cow 1",
+            "morning_production": 10.5,
+            "afternoon_production": 12.3,
+            "evening_production": 9.2,
+            "production_unit": "Litres",
+            "production_date": "2023-06-25",
+        },
+    }
+
+    assert replay_params(create) == (
+        "Cow 1",
+        10.5,
+        12.3,
+        9.2,
+        "Litres",
+        date(2023, 6, 25),
+    )
+
+    update = {
+        "op": "update",
+        "id": "7",
+        "column": "production_date",
+        "value": "2023-06-26",
+    }
+
+    assert replay_params(update) == (date(2023, 6, 26), 7)
+
+    with pytest.raises(JournalError):
+        replay_params({"op": "update", "id": 7, "column": "id; DROP", "value": 1})
+
+    with pytest.raises(JournalError):
+        replay_params({"op": "delete"})
+
+
+def test_offline_writes_never_connect(tmp_path):
+    # Port 1 refuses connections, so the writes must land in the journal.
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\nconnect_timeout=1\n"
+        f"[journal]\npath={tmp_path / 'journal.jsonl'}\noffline=on\n"
+    )
+
+    db = PostgresConnect(str(config))
+
+    db.create_record("Cow 1", 10.5, 12.3, 9.2, "Litres", datetime(2023, 6, 25))
+    db.update_date("milk_production", 3, datetime(2023, 6, 26))
+
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / "journal.jsonl").read_text().splitlines()
+    ]
+
+    assert entries[0]["values"]["production_date"] == "2023-06-25"
+    assert (entries[1]["op"], entries[1]["id"], entries[1]["value"]) == (
+        "update",
+        3,
+        "2023-06-26",
+    )
+    assert db._pool is None
+
+
+def test_offline_flag_lasts_one_command(tmp_path, monkeypatch):
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n"
+        f"[journal]\npath={tmp_path / 'journal.jsonl'}\n"
+    )
+
+    monkeypatch.setattr(psql, "CONFIG_PATH", str(config))
+    monkeypatch.setattr(psql, "_db", None)
+
+    # The shell runs every line through the same group and client.
+    psql.cli.main(["--offline", "--primary", "cache-stats"], standalone_mode=False)
+
+    assert psql._db.offline and not psql._db.use_replicas
+
+    psql.cli.main(["cache-stats"], standalone_mode=False)
+
+    assert not psql._db.offline and psql._db.use_replicas
+
+    psql._db.close()
+
+
+def test_corrupt_entries_are_rejected(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+
+    with open(journal.path, "a") as file:
+        file.write("not json\n")
+
+    journal.append("update", "milk_production", id=1, column="animal", value="Cow 1")
+
+    entries, _ = next(journal.pending(10))
+
+    assert len(entries) == 2
+
+    with pytest.raises(JournalError, match="corrupt journal entry at byte 0"):
+        replay_params(entries[0])
+
+    journal.reject([(entries[0], JournalError("corrupt"))])
+
+    [reject] = (tmp_path / "journal.jsonl.rejects").read_text().splitlines()
+
+    assert json.loads(reject) == {"key": None, "line": "not json", "error": "corrupt"}
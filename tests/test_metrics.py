@@ -0,0 +1,85 @@
+import json
+import threading
+from db_cli import metrics
+from psycopg2 import extensions  # type: ignore
+from db_cli.pool import ConnectionPool
+
+
+def test_metrics_json_breakdown(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+
+    recorder = metrics.start("view-record")
+
+    metrics.record("connect", 0.001)
+    metrics.record("execute", 0.002)
+    metrics.record("fetch", 0.003, rows=4)
+
+    metrics.finish(recorder, show=False, path=str(path))
+
+    assert metrics.current is None
+
+    result = json.loads(path.read_text())
+
+    assert result["command"] == "view-record"
+    assert result["connect_ms"] == 1.0
+    assert result["execute_ms"] == 2.0
+    assert result["fetch_ms"] == 3.0
+    assert result["rows"] == 4
+    assert result["queries"] == 1
+    assert result["total_ms"] >= result["render_ms"]
+
+
+def test_record_is_a_no_op_when_disabled():
+    metrics.record("execute", 1.0)
+
+    assert metrics.current is None
+
+
+def test_concurrent_records_are_all_counted():
+    recorder = metrics.start("farm-records")
+
+    def work():
+        for _ in range(10000):
+            metrics.record("execute", 0.0, rows=1)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    metrics.finish(recorder, show=False, path=None)
+
+    assert (recorder.rows, recorder.queries) == (80000, 80000)
+
+
+class FakeCursor:
+    def execute(self, query, vars=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    closed = False
+
+    def __init__(self) -> None:
+        self.factories = []
+
+    def cursor(self, cursor_factory=None):
+        self.factories.append(cursor_factory)
+
+        return FakeCursor()
+
+    def rollback(self):
+        pass
+
+
+def test_health_check_is_not_timed():
+    conn = FakeConnection()
+
+    assert ConnectionPool({})._is_healthy(conn)
+    assert conn.factories == [extensions.cursor]
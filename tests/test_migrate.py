@@ -0,0 +1,115 @@
+import os
+import pytest
+from db_cli.migrate import MigrationError, load_migrations, parse_steps
+from db_cli.psql import PostgresConnect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_file_without_markers_is_one_step():
+    steps = parse_steps(
+        "-- comment\nCREATE TABLE a (id INT);\nCREATE TABLE b (id INT);\n"
+    )
+
+    assert len(steps) == 1
+    assert steps[0].description == "CREATE TABLE a (id INT);"
+    assert steps[0].transactional
+
+
+def test_steps_and_concurrent_indexes():
+    steps = parse_steps(
+        "ALTER TABLE a ADD COLUMN b INT;\n"
+        "-- step: index b\n"
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS a_b_idx ON a (b);\n"
+        "-- step:\n"
+        "-- mentioning concurrently in a comment is fine\n"
+        "ANALYZE a;\n"
+    )
+
+    assert [step.description for step in steps] == [
+        "ALTER TABLE a ADD COLUMN b INT;",
+        "index b",
+        "ANALYZE a;",
+    ]
+    assert [step.transactional for step in steps] == [True, False, True]
+
+
+def test_load_migrations_in_version_order(tmp_path):
+    (tmp_path / "0010_later.sql").write_text("SELECT 1;")
+    (tmp_path / "0002_index.sql").write_text("CREATE INDEX CONCURRENTLY i ON t (c);")
+    (tmp_path / "README.md").write_text("not a migration")
+
+    migrations = load_migrations(str(tmp_path))
+
+    assert [m.label for m in migrations] == ["0002_index", "0010_later"]
+    assert [m.transactional for m in migrations] == [False, True]
+
+    (tmp_path / "02_duplicate.sql").write_text("SELECT 2;")
+
+    with pytest.raises(MigrationError):
+        load_migrations(str(tmp_path))
+
+
+def test_shipped_migrations_load():
+    migrations = load_migrations(os.path.join(ROOT, "migrations"))
+
+    assert migrations[0].label == "0001_animals"
+    assert migrations[0].transactional
+
+
+class FakeCursor:
+    def __init__(self, queries: list) -> None:
+        self.queries = queries
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+
+    def fetchone(self):
+        # No schema_migrations table yet.
+        return (False,)
+
+    def fetchall(self):
+        raise AssertionError("schema_migrations does not exist")
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, queries: list) -> None:
+        self.queries = queries
+
+    def cursor(self):
+        return FakeCursor(self.queries)
+
+    def commit(self):
+        pass
+
+
+class FakePool:
+    def __init__(self) -> None:
+        self.queries = []
+
+    def getconn(self):
+        return FakeConnection(self.queries)
+
+    def putconn(self, conn, close: bool = False):
+        pass
+
+
+def test_dry_run_changes_nothing(tmp_path, capsys):
+    (tmp_path / "0001_animals.sql").write_text("CREATE TABLE animals (id INT);")
+
+    config = tmp_path / "database.ini"
+    config.write_text("[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n")
+
+    db = PostgresConnect(str(config))
+    db._pool = pool = FakePool()
+
+    db.migrate(str(tmp_path), dry_run=True)
+
+    assert "1 pending migrations (dry run)" in capsys.readouterr().out
+    assert not any("lock" in query or "CREATE" in query for query in pool.queries)
+
+    db._pool = None
+    db.close()
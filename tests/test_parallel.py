@@ -0,0 +1,38 @@
+import gzip
+from datetime import date, timedelta
+from db_cli.parallel import merge_slices, slice_bounds, slice_path
+
+
+def test_slice_bounds_cover_range():
+    assert slice_bounds(1, 10, 3) == [(1, 4), (4, 7), (7, 11)]
+    assert slice_bounds(5, 6, 4) == [(5, 6), (6, 7)]
+
+    day = timedelta(days=1)
+
+    assert slice_bounds(date(2023, 1, 1), date(2023, 1, 31), 2, day) == [
+        (date(2023, 1, 1), date(2023, 1, 16)),
+        (date(2023, 1, 16), date(2023, 2, 1)),
+    ]
+
+
+def test_slice_path():
+    assert slice_path("/tmp/out.csv.gz", 3) == "/tmp/out.part03.csv.gz"
+    assert slice_path("out", 12) == "out.part12"
+
+
+def test_merge_gzip_slices(tmp_path):
+    paths = []
+
+    for index, text in enumerate(["id\n1\n", "2\n"]):
+        path = tmp_path / f"part{index}"
+        path.write_bytes(gzip.compress(text.encode()))
+        paths.append(str(path))
+
+    merge_slices(paths, str(tmp_path / "out.csv.gz"))
+
+    assert gzip.open(tmp_path / "out.csv.gz", "rt").read() == "id\n1\n2\n"
+
+    # A header given on its own goes first, as a gzip member of its own.
+    merge_slices(paths[1:], str(tmp_path / "two.csv.gz"), "id\n", compress=True)
+
+    assert gzip.open(tmp_path / "two.csv.gz", "rt").read() == "id\n2\n"
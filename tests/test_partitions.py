@@ -0,0 +1,91 @@
+import pytest
+from datetime import date
+from db_cli.partitions import (
+    PartitionError,
+    month_start,
+    next_month,
+    partition_month,
+    partition_name,
+)
+from db_cli.psql import PostgresConnect
+
+
+def test_partition_names_round_trip():
+    month = month_start(date(2023, 12, 25))
+
+    assert month == date(2023, 12, 1)
+    assert next_month(month) == date(2024, 1, 1)
+    assert partition_name("milk_production", month) == "milk_production_y2023m12"
+    assert partition_month("milk_production", "milk_production_y2023m12") == month
+
+
+def test_partition_month_ignores_other_tables():
+    assert partition_month("milk_production", "milk_production_default") is None
+    assert partition_month("milk", "milk_production_y2023m12") is None
+
+
+class FakeCursor:
+    def __init__(self, attached: bool) -> None:
+        self.attached = attached
+        self.row = None
+
+    def execute(self, query, params=None):
+        # IS_PARTITIONED, then CREATE TABLE and IS_ATTACHED for every month.
+        self.row = (self.attached if "pg_inherits" in str(query) else True,)
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeConnection:
+    commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_detached_partitions_are_not_reused(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text("[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n")
+
+    db = PostgresConnect(str(config))
+    conn = FakeConnection()
+
+    with pytest.raises(PartitionError, match="milk_production_y2021m03"):
+        db._ensure_partitions(
+            conn, FakeCursor(attached=False), "milk_production", [date(2021, 3, 9)]
+        )
+
+    assert db._partitions["milk_production"] == set()
+    assert conn.commits == 0
+
+    db._ensure_partitions(
+        conn, FakeCursor(attached=True), "milk_production", [date(2021, 3, 9)]
+    )
+
+    assert db._partitions["milk_production"] == {date(2021, 3, 1)}
+
+
+def test_partitions_can_join_the_callers_transaction(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text("[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\n")
+
+    db = PostgresConnect(str(config))
+    conn = FakeConnection()
+
+    months = db._ensure_partitions(
+        conn,
+        FakeCursor(attached=True),
+        "milk_production",
+        [date(2021, 3, 9)],
+        commit=False,
+    )
+
+    # Nothing is committed or remembered until the caller has committed.
+    assert months == {date(2021, 3, 1)}
+    assert conn.commits == 0
+    assert db._partitions["milk_production"] == set()
+
+    db._partitions_created("milk_production", months)
+
+    assert db._partitions["milk_production"] == {date(2021, 3, 1)}
@@ -0,0 +1,113 @@
+import time
+import pytest
+import psycopg2  # type: ignore
+import threading
+from db_cli.pool import ConnectionPool
+from db_cli.psql import PostgresConnect
+
+
+def test_pool_options_from_config(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\n"
+        "host=localhost\n"
+        "database=test\n"
+        "pool_min_size=2\n"
+        "pool_max_size=8\n"
+        "pool_idle_timeout=30\n"
+        "pool_health_check=off\n"
+    )
+
+    db = PostgresConnect(str(config))
+
+    assert db.db == {"host": "localhost", "database": "test"}
+    assert db.pool_options == {
+        "pool_min_size": 2,
+        "pool_max_size": 8,
+        "pool_idle_timeout": 30.0,
+        "pool_health_check": False,
+    }
+
+
+def test_pool_rejects_invalid_sizes():
+    with pytest.raises(ValueError):
+        ConnectionPool({}, min_size=3, max_size=2)
+
+
+class DeadCursor:
+    def execute(self, query, vars=None):
+        time.sleep(0.3)
+
+        raise psycopg2.OperationalError("server closed the connection")
+
+
+class DeadConnection:
+    closed = False
+
+    def cursor(self, *args, **kwargs):
+        return DeadCursor()
+
+    def close(self):
+        self.closed = True
+
+
+def test_health_check_runs_outside_the_lock():
+    # Port 1 refuses connections, so the replacement connection fails fast.
+    pool = ConnectionPool({"host": "127.0.0.1", "port": 1, "connect_timeout": 1})
+
+    dead = DeadConnection()
+    pool._idle.append((dead, time.monotonic()))
+
+    def checkout():
+        with pytest.raises(psycopg2.OperationalError):
+            pool.getconn()
+
+    thread = threading.Thread(target=checkout)
+    thread.start()
+
+    time.sleep(0.05)
+    start = time.perf_counter()
+
+    assert pool.size == 1
+    assert time.perf_counter() - start < 0.1
+
+    thread.join()
+
+    assert dead.closed
+    assert pool.size == 0
+
+
+def test_pool_reuses_connection():
+    db = PostgresConnect("database.ini")
+
+    conn = db.pool.getconn()
+    pid = conn.get_backend_pid()
+    db.pool.putconn(conn)
+
+    conn = db.pool.getconn()
+
+    assert conn.get_backend_pid() == pid
+
+    db.pool.putconn(conn)
+    db.close()
+
+
+def test_prepared_statements_cached_per_connection():
+    db = PostgresConnect("database.ini")
+
+    conn = db.pool.getconn()
+    cur = conn.cursor()
+
+    for _ in range(2):
+        db._execute_prepared(conn, cur, "select_one", "SELECT $1::int", (1,))
+
+        assert cur.fetchone() == (1,)
+
+    cur.execute("SELECT count(*) FROM pg_prepared_statements WHERE name = 'select_one'")
+
+    assert cur.fetchone() == (1,)
+    assert conn.prepared == {"select_one"}
+
+    cur.close()
+    db.pool.putconn(conn)
+    db.close()
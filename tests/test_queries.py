@@ -0,0 +1,62 @@
+from datetime import date
+import pytest
+from db_cli.psql import insert_statement
+from db_cli.queries import conflict_clause, record_filters, records_page
+
+
+def test_record_filters_empty():
+    where, params = record_filters()
+
+    assert where.as_string(None) == ""
+    assert params == []
+
+
+def test_record_filters_keyset():
+    where, params = record_filters(
+        date(2023, 6, 1), None, ["Cow 1"], after_id=10, descending=True
+    )
+
+    assert where.as_string(None) == (
+        " WHERE production_date >= %s"
+        " AND animal_id IN (SELECT id FROM animals WHERE name = ANY(%s))"
+        " AND id < %s"
+    )
+    assert params == [date(2023, 6, 1), ["Cow 1"], 10]
+
+
+def test_conflict_clause():
+    assert conflict_clause("error") == ""
+    assert conflict_clause("skip") == (
+        " ON CONFLICT (animal_id, production_date) DO NOTHING"
+    )
+    assert conflict_clause("update").startswith(
+        " ON CONFLICT (animal_id, production_date) DO UPDATE SET"
+        " morning_production = EXCLUDED.morning_production,"
+    )
+
+    with pytest.raises(ValueError):
+        conflict_clause("replace")
+
+
+def test_insert_statement_names_differ_per_mode():
+    names = {
+        insert_statement("milk_production", mode)[0]
+        for mode in ("error", "skip", "update")
+    }
+
+    assert names == {
+        "insert_milk_production",
+        "insert_milk_production_skip",
+        "insert_milk_production_update",
+    }
+    assert insert_statement("milk_production", "skip")[1].endswith(
+        "DO NOTHING RETURNING (xmax = 0)"
+    )
+
+
+def test_records_of_other_tables_are_not_joined():
+    joined, params = records_page("milk_production", limit=5)
+    plain, _ = records_page("other_table", limit=5, joined=False)
+
+    assert "animals" in repr(joined) and params == [5]
+    assert "animals" not in repr(plain) and "SELECT * FROM " in repr(plain)
@@ -5,6 +5,7 @@ from db_cli.psql import (
     delete_tables,
     create_record,
     update_name,
+    apply_updates,
     update_morning,
     update_noon,
     update_evening,
@@ -25,7 +26,9 @@ def test_create_tables():
         "",
         "The following tables have been created:",
         "",
-        "1. ('milk_production',)",
+        "1. ('animals',)",
+        "",
+        "2. ('milk_production',)",
         "",
     ]
 
@@ -93,7 +96,47 @@ def test_update_name():
     res = runner.invoke(update_name, input_params)
 
     assert res.exit_code == 0
-    assert res.output == "\nRecord has been updated successfully.\n\n"
+    assert res.output == "\nThe cow has been renamed in all of its records.\n\n"
+
+
+def test_apply_updates_renames_like_update_name():
+    # A second record of the same cow: both commands rename the cow in both.
+    input_params = [
+        "--animal",
+        "Cow 2",
+        "--morning-production",
+        8.1,
+        "--afternoon-production",
+        7.4,
+        "--evening-production",
+        6.9,
+        "--production-unit",
+        "Litres",
+        "--production-date",
+        "2023-06-26",
+    ]
+
+    runner.invoke(create_record, input_params)
+
+    def cows():
+        lines = runner.invoke(view_all_records).output.splitlines()
+
+        return [line.split(" | ")[2] for line in lines if " | " in line]
+
+    runner.invoke(update_name, ["--id", 1, "--name", "Cow 3"])
+
+    assert cows() == ["cow: Cow 3", "cow: Cow 3"]
+
+    res = runner.invoke(
+        apply_updates,
+        ["--format", "jsonl"],
+        input='{"id": 2, "field": "name", "value": "Cow 2"}\n',
+    )
+
+    assert res.exit_code == 0
+    assert cows() == ["cow: Cow 2", "cow: Cow 2"]
+
+    runner.invoke(delete_record, ["--id", 2])
 
 
 def test_update_morning():
@@ -0,0 +1,63 @@
+import click
+from datetime import date
+from click.testing import CliRunner
+from db_cli.render import RecordRenderer
+
+runner = CliRunner()
+
+ROWS = [(1, "Cow 1", 10.5, 12.3, 9.2, "Litres", date(2023, 6, 25))]
+
+
+class FakeCursor:
+    description = [
+        (name,)
+        for name in (
+            "id",
+            "animal",
+            "morning_production",
+            "afternoon_production",
+            "evening_production",
+            "production_unit",
+            "production_date",
+        )
+    ]
+
+
+def render(fmt: str, rows=ROWS, color: bool = True):
+    @click.command()
+    def command():
+        RecordRenderer(fmt, color, title="\nRecords:\n", chunk_size=1).write(
+            rows, FakeCursor()
+        )
+
+    return runner.invoke(command)
+
+
+def test_table_layout_from_description():
+    for color in (True, False):
+        res = render("table", color=color)
+
+        assert res.output.splitlines() == [
+            "",
+            "Records:",
+            "",
+            "1. | id: 1 | cow: Cow 1 | morning: 10.5 | noon: 12.3 | evening: 9.2 | unit: Litres | date: 2023-06-25",
+            "",
+        ]
+
+
+def test_machine_readable_formats():
+    assert render("csv").output.splitlines() == [
+        "id,animal,morning_production,afternoon_production,evening_production,production_unit,production_date",
+        "1,Cow 1,10.5,12.3,9.2,Litres,2023-06-25",
+    ]
+    assert (
+        render("tsv").output.splitlines()[1]
+        == "1\tCow 1\t10.5\t12.3\t9.2\tLitres\t2023-06-25"
+    )
+    assert render("jsonl").output == (
+        '{"id": 1, "animal": "Cow 1", "morning_production": 10.5, "afternoon_production": 12.3,'
+        ' "evening_production": 9.2, "production_unit": "Litres", "production_date": "2023-06-25"}\n'
+    )
+    assert render("json", rows=ROWS * 2).output.count('"id": 1') == 2
+    assert render("json", rows=[]).output == "[]\n"
@@ -0,0 +1,151 @@
+import pytest
+from db_cli.psql import PostgresConnect
+from db_cli.replicas import Replica, ReplicaRouter
+
+
+class FakeCursor:
+    def __init__(self, lag) -> None:
+        self.lag = lag
+
+    def execute(self, query, vars=None):
+        pass
+
+    def fetchone(self):
+        return (self.lag,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, lag) -> None:
+        self.lag = lag
+
+    def cursor(self):
+        return FakeCursor(self.lag)
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, lag=0, down: bool = False) -> None:
+        self.lag = lag
+        self.down = down
+        self.out = 0
+
+    def getconn(self):
+        if self.down:
+            raise ConnectionError("connection refused")
+
+        self.out += 1
+
+        return FakeConnection(self.lag)
+
+    def putconn(self, conn, close: bool = False):
+        self.out -= 1
+
+
+def router(*pools, **options) -> ReplicaRouter:
+    return ReplicaRouter(
+        [Replica(f"r{index}", pool) for index, pool in enumerate(pools)], **options
+    )
+
+
+def test_round_robin():
+    a, b = FakePool(), FakePool()
+    replicas = router(a, b)
+
+    served = []
+
+    for _ in range(4):
+        pool, conn = replicas.getconn()
+        served.append(pool)
+        pool.putconn(conn)
+
+    assert served == [a, b, a, b]
+
+
+def test_lagging_and_down_replicas_are_skipped():
+    behind, down, current = FakePool(lag=120.0), FakePool(down=True), FakePool(lag=1.5)
+    replicas = router(behind, down, current, max_lag=30)
+
+    for _ in range(3):
+        pool, conn = replicas.getconn()
+
+        assert pool is current
+
+        pool.putconn(conn)
+
+    assert behind.out == down.out == 0
+    assert replicas.replicas[1].error == "connection refused"
+
+
+def test_no_replica_available_falls_back():
+    replicas = router(FakePool(lag=None), FakePool(down=True))
+
+    assert replicas.getconn() == (None, None)
+
+
+def test_least_latency():
+    a, b = FakePool(), FakePool()
+    replicas = router(a, b, strategy="latency")
+
+    replicas.replicas[0].latency = 0.050
+    replicas.replicas[1].latency = 0.002
+
+    pool, conn = replicas.getconn()
+
+    assert pool is b
+
+
+def test_replica_sections(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=primary\ndatabase=db_cli\n"
+        "replica_strategy=latency\nreplica_max_lag=5\n"
+        "[postgresql.replica.a]\nhost=replica-a\ndatabase=db_cli\npool_max_size=3\n"
+        "[postgresql.replica.b]\nhost=replica-b\ndatabase=db_cli\n"
+    )
+
+    db = PostgresConnect(str(config))
+
+    assert db.db == {"host": "primary", "database": "db_cli"}
+    assert db.replicas == {
+        "a": {"host": "replica-a", "database": "db_cli"},
+        "b": {"host": "replica-b", "database": "db_cli"},
+    }
+    assert db.router.strategy == "latency"
+    assert db.router.max_lag == 5.0
+
+    db.close()
+
+
+def test_unknown_strategy(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text("[postgresql]\nhost=primary\nreplica_strategy=random\n")
+
+    with pytest.raises(Exception, match="replica_strategy"):
+        PostgresConnect(str(config))
+
+
+def test_cache_fills_read_the_primary(tmp_path):
+    config = tmp_path / "database.ini"
+    config.write_text(
+        "[postgresql]\nhost=primary\n"
+        "[postgresql.replica.a]\nhost=replica-a\n"
+        f"[cache]\npath={tmp_path / 'cache.sqlite3'}\n"
+    )
+
+    db = PostgresConnect(str(config))
+
+    primary, replica = FakePool(), FakePool()
+
+    db._pool = primary
+    db._router = router(replica)
+
+    assert db._read_conn()[0] is replica
+    assert db._read_conn(cached=True)[0] is primary
+
+    db._pool = db._router = None
+    db.close()
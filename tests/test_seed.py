@@ -0,0 +1,32 @@
+from datetime import date
+from db_cli.seed import herd_batches
+
+YIELDS = {"morning": (8.0, 1.5), "afternoon": (6.0, 1.2), "evening": (7.0, 1.4)}
+
+
+def generate(**kwargs):
+    return [
+        (buffer.read(), count, dates)
+        for buffer, count, dates in herd_batches(
+            3, date(2023, 12, 31), 2, YIELDS, **kwargs
+        )
+    ]
+
+
+def test_herd_batches_are_deterministic():
+    assert generate(seed=7) == generate(seed=7)
+    assert generate(seed=7) != generate(seed=8)
+
+
+def test_herd_batches_split_on_batch_size():
+    batches = generate(seed=7, batch_size=4)
+
+    assert [count for _, count, _ in batches] == [4, 2]
+    assert batches[0][2] == {date(2023, 12, 31), date(2024, 1, 1)}
+    assert batches[1][2] == {date(2024, 1, 1)}
+
+    rows = [line.split("\t") for text, _, _ in batches for line in text.splitlines()]
+
+    assert [row[0] for row in rows] == ["Cow 1", "Cow 2", "Cow 3"] * 2
+    assert all(len(row) == 6 and row[4] == "Litres" for row in rows)
+    assert all(float(amount) >= 0 for row in rows for amount in row[1:4])
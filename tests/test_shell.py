@@ -0,0 +1,33 @@
+import click
+from click.testing import CliRunner
+from db_cli.shell import run_shell
+
+runner = CliRunner()
+
+
+@click.group()
+def group():
+    pass
+
+
+@group.command()
+@click.option("--name", prompt="name")
+def greet(name: str):
+    click.echo(f"hello {name}")
+
+
+@click.command()
+def repl():
+    run_shell(group, "/nonexistent/history", timing=False)
+
+
+def test_shell_runs_commands_until_exit():
+    res = runner.invoke(
+        repl, input="greet --name a\ngreet\nb\nunknown\nexit\ngreet --name c\n"
+    )
+
+    assert res.exit_code == 0
+    assert "hello a" in res.output
+    assert "hello b" in res.output
+    assert "No such command 'unknown'" in res.output
+    assert "hello c" not in res.output
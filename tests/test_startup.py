@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budgets, generous enough for slow CI machines.
+IMPORT_BUDGET_US = 250_000
+HELP_BUDGET_S = 1.5
+CHECK_CONNECTION_BUDGET_S = 3.0
+
+HEAVY_MODULES = ("psycopg2", "pytz")
+
+
+def run_cli(args: list, cwd, importtime: bool = False):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+
+    command = [sys.executable]
+
+    if importtime:
+        command += ["-X", "importtime"]
+
+    command += ["-m", "db_cli.psql", *args]
+
+    start = time.perf_counter()
+    res = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+
+    return res, time.perf_counter() - start
+
+
+def imported_modules(stderr: str) -> dict:
+    modules = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+
+    return modules
+
+
+def test_help_startup(tmp_path):
+    # No database.ini here: "--help" must not need one.
+    res, elapsed = run_cli(["--help"], tmp_path, importtime=True)
+
+    assert res.returncode == 0
+    assert "check-connection" in res.stdout
+    assert elapsed < HELP_BUDGET_S
+
+    modules = imported_modules(res.stderr)
+
+    assert not [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+    assert max(modules.values()) < IMPORT_BUDGET_US
+
+
+def test_missing_config(tmp_path):
+    res, _ = run_cli(["check-connection"], tmp_path)
+
+    assert res.returncode == 1
+    assert "Section postgresql not found" in res.stderr
+    assert "Traceback" not in res.stderr
+
+
+def test_check_connection_startup(tmp_path):
+    # Nothing listens on port 1, so this measures startup plus a refused connect.
+    (tmp_path / "database.ini").write_text(
+        "[postgresql]\nhost=127.0.0.1\nport=1\ndatabase=db_cli\nconnect_timeout=1\n"
+    )
+
+    res, elapsed = run_cli(["check-connection"], tmp_path)
+
+    assert res.returncode == 0
+    assert "Connection successful" not in res.stdout
+    assert elapsed < CHECK_CONNECTION_BUDGET_S
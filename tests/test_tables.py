@@ -19,7 +19,9 @@ def test_create_tables():
         "",
         "The following tables have been created:",
         "",
-        "1. ('milk_production',)",
+        "1. ('animals',)",
+        "",
+        "2. ('milk_production',)",
         "",
     ]
 
@@ -32,7 +34,9 @@ def test_view_tables():
         "",
         "List of all the tables in the database:",
         "",
-        "1. ('milk_production',)",
+        "1. ('animals',)",
+        "",
+        "2. ('milk_production',)",
         "",
     ]
 
@@ -0,0 +1,47 @@
+import io
+from datetime import date
+from db_cli.updates import collect_changes, group_changes
+
+
+def test_collect_and_group_changes():
+    stream = io.StringIO(
+        '{"id": 1, "field": "morning", "value": "5.8"}\n'
+        '{"id": 2, "field": "morning_production", "value": 4}\n'
+        '{"id": 1, "fields": {"date": "2023-08-12"}}\n'
+        '{"id": "x", "field": "morning", "value": 1}\n'
+        '{"id": 3, "field": "colour", "value": "brown"}\n'
+    )
+
+    changes, errors = collect_changes(stream, "jsonl")
+
+    assert changes == {
+        1: {"morning_production": 5.8, "production_date": date(2023, 8, 12)},
+        2: {"morning_production": 4.0},
+    }
+    assert [line for line, _ in errors] == [4, 5]
+
+    assert group_changes(changes) == {
+        ("morning_production", "production_date"): [(1, 5.8, date(2023, 8, 12))],
+        ("morning_production",): [(2, 4.0)],
+    }
+
+
+def test_collect_changes_csv():
+    stream = io.StringIO("id,field,value\n7,name,Cow 9\n")
+
+    changes, errors = collect_changes(stream, "csv")
+
+    assert changes == {7: {"animal": "Cow 9"}}
+    assert errors == []
+
+
+def test_animal_id_moves_the_record():
+    stream = io.StringIO(
+        '{"id": 7, "field": "animal_id", "value": "3"}\n'
+        '{"id": 8, "field": "animal_id", "value": "Cow 3"}\n'
+    )
+
+    changes, errors = collect_changes(stream, "jsonl")
+
+    assert changes == {7: {"animal_id": 3}}
+    assert [line for line, _ in errors] == [2]